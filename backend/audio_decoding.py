@@ -0,0 +1,252 @@
+import functools
+import io
+import re
+import struct
+import subprocess  # nosec - ffmpeg is only used as a last-resort decoder
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@functools.lru_cache(maxsize=None)
+def _torchaudio():
+    """Import torchaudio on first use so text-only workers never load torch"""
+    try:
+        import torchaudio
+        return torchaudio
+    except ImportError:
+        return None
+
+
+# Whisper expects mono float32 audio at 16 kHz
+TARGET_SAMPLE_RATE = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+RAW_PCM_MIME_TYPES = {'audio/pcm', 'audio/l16', 'audio/x-raw', 'audio/raw'}
+
+# Bits per sample a WAV fmt chunk may declare
+WAV_SAMPLE_BITS = (8, 16, 24, 32, 64)
+
+# audio/L16 is network byte order (RFC 2586, RFC 3551); the others are
+# little-endian unless their parameters say otherwise
+BIG_ENDIAN_PCM_MIME_TYPES = {'audio/l16'}
+
+
+class AudioDecodingError(ValueError):
+    """Raised when an uploaded clip cannot be decoded"""
+
+
+def decode_audio_bytes(data: bytes, mime_type: Optional[str] = None,
+                       sample_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Decode an in-memory audio clip into a mono float32 waveform
+
+    WAV and raw PCM are parsed directly from the buffer. Compressed formats
+    (webm/ogg/mp3/flac...) are decoded in-process by torchaudio when it is
+    available, and only fall back to piping the bytes through ffmpeg.
+
+    Args:
+        data: Encoded audio bytes
+        mime_type: Optional MIME type from the data URL or upload, e.g.
+            'audio/wav' or 'audio/L16;rate=16000'
+        sample_rate: Output sample rate
+
+    Returns:
+        1-D float32 array in [-1, 1] at the requested sample rate
+    """
+    if not data:
+        raise AudioDecodingError("Empty audio buffer")
+
+    base_type, params = _parse_mime_type(mime_type)
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        audio, source_rate = _decode_wav(data)
+    elif base_type in RAW_PCM_MIME_TYPES:
+        source_rate = _positive_int_param(params, 'rate', sample_rate)
+        channels = _positive_int_param(params, 'channels', 1)
+        audio = _pcm_to_float(data, 2, WAVE_FORMAT_PCM, channels,
+                              big_endian=_is_big_endian(base_type, params))
+    else:
+        decoded = _decode_with_torchaudio(data) if _torchaudio() is not None else None
+        if decoded is None:
+            # ffmpeg already resamples and downmixes for us
+            return _decode_with_ffmpeg(data, sample_rate)
+        audio, source_rate = decoded
+
+    return _resample(audio, source_rate, sample_rate)
+
+
+def decoding_params(data: bytes, mime_type: Optional[str] = None) -> Tuple[str, ...]:
+    """The parts of a MIME type that change how decode_audio_bytes reads `data`
+
+    Empty for WAV and compressed formats, which describe themselves; the
+    normalized type, rate, channels and byte order for raw PCM. Meant for
+    cache keys, so it never raises on malformed parameters.
+    """
+    base_type, params = _parse_mime_type(mime_type)
+    if (data[:4] == b'RIFF' and data[8:12] == b'WAVE') or base_type not in RAW_PCM_MIME_TYPES:
+        return ()
+    return (
+        base_type,
+        f"rate={params.get('rate', TARGET_SAMPLE_RATE)}",
+        f"channels={params.get('channels', 1)}",
+        'big-endian' if _is_big_endian(base_type, params) else 'little-endian',
+    )
+
+
+def _parse_mime_type(mime_type: Optional[str]) -> Tuple[str, dict]:
+    if not mime_type:
+        return '', {}
+    parts = [p.strip() for p in mime_type.split(';')]
+    params = {}
+    for part in parts[1:]:
+        key, _, value = part.partition('=')
+        if value:
+            params[key.strip().lower()] = value.strip()
+    return parts[0].lower(), params
+
+
+def _positive_int_param(params: dict, name: str, default: int) -> int:
+    value = params.get(name, default)
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise AudioDecodingError(f"Invalid {name} parameter: {value!r}")
+    if number <= 0:
+        raise AudioDecodingError(f"Invalid {name} parameter: {value!r}")
+    return number
+
+
+def _is_big_endian(base_type: str, params: dict) -> bool:
+    """Byte order of 16-bit raw PCM from its MIME type and parameters"""
+    endianness = params.get('endianness', '').lower()
+    if endianness in ('big', 'little'):
+        return endianness == 'big'
+    # GStreamer-style format=S16BE / S16LE
+    sample_format = params.get('format', '').upper()
+    if sample_format.endswith(('BE', 'LE')):
+        return sample_format.endswith('BE')
+    return base_type in BIG_ENDIAN_PCM_MIME_TYPES
+
+
+def _decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """Parse a RIFF/WAVE buffer without touching the filesystem"""
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack('<I', data[offset + 4:offset + 8])[0]
+        body = offset + 8
+
+        if chunk_id == b'fmt ':
+            if chunk_size < 16 or len(data) < body + 16:
+                raise AudioDecodingError(f"WAV fmt chunk too short: {chunk_size} bytes")
+            audio_format, channels, rate, _, _, bits = struct.unpack('<HHIIHH', data[body:body + 16])
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26 and len(data) >= body + 26:
+                # The real format code is the first two bytes of the sub-format GUID
+                audio_format = struct.unpack('<H', data[body + 24:body + 26])[0]
+            if channels < 1:
+                raise AudioDecodingError(f"Invalid WAV channel count: {channels}")
+            if rate < 1:
+                raise AudioDecodingError(f"Invalid WAV sample rate: {rate}")
+            if bits not in WAV_SAMPLE_BITS:
+                raise AudioDecodingError(f"Unsupported WAV bits per sample: {bits}")
+            fmt = (audio_format, channels, rate, bits)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise AudioDecodingError("WAV data chunk appears before fmt chunk")
+            audio_format, channels, rate, bits = fmt
+            # Browsers streaming WAV often leave the size as 0 or 0xFFFFFFFF
+            end = len(data) if chunk_size in (0, 0xFFFFFFFF) else min(len(data), body + chunk_size)
+            return _pcm_to_float(data[body:end], bits // 8, audio_format, channels), rate
+
+        # Chunks are word aligned
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise AudioDecodingError("WAV buffer has no data chunk")
+
+
+def _pcm_to_float(pcm: bytes, sample_width: int, audio_format: int, channels: int,
+                  big_endian: bool = False) -> np.ndarray:
+    if sample_width < 1 or channels < 1:
+        raise AudioDecodingError(f"Invalid PCM layout: {sample_width}-byte samples, {channels} channels")
+    frame_width = sample_width * channels
+    pcm = pcm[:len(pcm) - len(pcm) % frame_width]
+
+    if audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        dtype = {4: '<f4', 8: '<f8'}.get(sample_width)
+        if dtype is None:
+            raise AudioDecodingError(f"Unsupported float sample width: {sample_width}")
+        audio = np.frombuffer(pcm, dtype=dtype).astype(np.float32)
+    elif audio_format == WAVE_FORMAT_PCM:
+        if sample_width == 1:
+            audio = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif sample_width == 2:
+            audio = np.frombuffer(pcm, dtype='>i2' if big_endian else '<i2').astype(np.float32) / 32768.0
+        elif sample_width == 3:
+            raw = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3)
+            ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8)
+                    | (raw[:, 2].astype(np.int32) << 16))
+            ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+            audio = ints.astype(np.float32) / 8388608.0
+        elif sample_width == 4:
+            audio = np.frombuffer(pcm, dtype='<i4').astype(np.float32) / 2147483648.0
+        else:
+            raise AudioDecodingError(f"Unsupported PCM sample width: {sample_width}")
+    else:
+        raise AudioDecodingError(f"Unsupported WAV format code: {audio_format:#06x}")
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return audio
+
+
+def _decode_with_torchaudio(data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    try:
+        waveform, rate = _torchaudio().load(io.BytesIO(data))
+    except Exception:
+        return None
+    return waveform.mean(dim=0).numpy().astype(np.float32), rate
+
+
+def _decode_with_ffmpeg(data: bytes, sample_rate: int) -> np.ndarray:
+    """Pipe the buffer through ffmpeg, mirroring whisper.load_audio without a temp file"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except FileNotFoundError as e:
+        raise AudioDecodingError("ffmpeg is required to decode this audio format") from e
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode(errors='ignore').strip().splitlines()
+        raise AudioDecodingError(f"Failed to decode audio: {message[-1] if message else e}") from e
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def _resample(audio: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    if source_rate == target_rate or audio.size == 0:
+        return np.ascontiguousarray(audio, dtype=np.float32)
+    torchaudio = _torchaudio()
+    if torchaudio is not None:
+        import torch
+        resampled = torchaudio.functional.resample(torch.from_numpy(np.ascontiguousarray(audio)), source_rate, target_rate)
+        return resampled.numpy().astype(np.float32)
+    # Linear interpolation is adequate for speech recognition input
+    duration = audio.shape[0] / source_rate
+    target_length = int(round(duration * target_rate))
+    positions = np.linspace(0, audio.shape[0] - 1, num=target_length)
+    return np.interp(positions, np.arange(audio.shape[0]), audio).astype(np.float32)
+
+
+def split_data_url(audio_data: str) -> Tuple[Optional[str], str]:
+    """Split a 'data:<mime>;base64,<payload>' string into (mime type, payload)"""
+    match = re.match(r'data:([^,]*?)(;base64)?,', audio_data)
+    if not match:
+        return None, audio_data.split(',')[1] if ',' in audio_data else audio_data
+    return match.group(1) or None, audio_data[match.end():]
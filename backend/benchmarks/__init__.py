@@ -0,0 +1,4 @@
+"""Benchmark scripts for the CoreMentis backend.
+
+Run them from the backend directory, e.g. ``python -m benchmarks.whisper_batching``.
+"""
@@ -0,0 +1,175 @@
+"""Content search benchmark against a local stub of the search providers.
+
+Starts an HTTP server that serves canned Bing, YouTube and Google result
+pages with configurable per-provider delays, points a ContentScraper at it
+and compares:
+
+- sequential: scrape_bing_images() then scrape_youtube_videos()
+- concurrent: ContentScraper.search()
+- deadline:   search() while one provider is slower than the deadline; it
+              must return in about the deadline with the other's results
+
+    python -m benchmarks.content_search --bing-delay 0.4 --youtube-delay 0.6 --searches 10
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from content_scraper import ContentScraper
+
+FILLER = "<div class=\"filler\"><span>related searches</span><p>lorem ipsum dolor sit amet</p></div>\n"
+
+
+def bing_page(num_images: int = 40, filler: int = 200) -> str:
+    """A Bing image results page with `a.iusc` tiles carrying JSON metadata"""
+    tiles = "".join(
+        f'<li><a class="iusc" m=\'{{"murl":"https://images.example.org/{1920 + i}x1080/photo{i}.jpg",'
+        f'"turl":"https://tse.example.org/th?id={i}"}}\' href="/images/{i}">'
+        f'<img src="https://tse.example.org/th?id={i}&amp;w=200" /></a></li>\n'
+        for i in range(num_images)
+    )
+    return f"<html><head><title>Bing</title></head><body>{FILLER * filler}<ul>{tiles}</ul></body></html>"
+
+
+def youtube_page(num_videos: int = 20, filler: int = 200) -> str:
+    """A YouTube results page with the video list embedded as JSON"""
+    videos = ",".join(
+        f'{{"videoRenderer":{{"videoId":"vid{i:05d}","thumbnail":{{}},'
+        f'"title":{{"runs":[{{"text":"Lecture {i}: an introduction"}}]}}}}}}'
+        for i in range(num_videos)
+    )
+    return (f"<html><body>{FILLER * filler}<script>var ytInitialData = "
+            f'{{"contents":[{videos}]}};</script></body></html>')
+
+
+def google_page(num_images: int = 20, filler: int = 200) -> str:
+    """A Google image results page with lazily loaded `img` tags"""
+    images = "".join(
+        f'<img data-src="https://images.example.org/large/figure{i}.png" src="data:image/gif;base64,R0lGOD" />\n'
+        for i in range(num_images)
+    )
+    return f"<html><body>{FILLER * filler}{images}</body></html>"
+
+
+class StubSearchServer:
+    """Local HTTP server standing in for Bing, YouTube and Google
+
+    Pages are matched by path (/images/search, /results, /search). Each
+    provider can be delayed, or answer with an error status, to simulate
+    slow or failing upstreams.
+    """
+
+    ROUTES = {'/images/search': 'bing', '/results': 'youtube', '/search': 'google'}
+
+    def __init__(self, delays=None, statuses=None, pages=None):
+        self.delays = dict(delays or {})
+        self.statuses = dict(statuses or {})
+        self.pages = {'bing': bing_page(), 'youtube': youtube_page(), 'google': google_page()}
+        self.pages.update(pages or {})
+        self.requests = {provider: 0 for provider in self.pages}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                provider = stub.ROUTES.get(self.path.split('?', 1)[0])
+                if provider is None:
+                    self.send_error(404)
+                    return
+                with stub._lock:
+                    stub.requests[provider] += 1
+                time.sleep(stub.delays.get(provider, 0.0))
+                body = stub.pages[provider].encode()
+                self.send_response(stub.statuses.get(provider, 200))
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_urls(self):
+        return {provider: self.url for provider in self.pages}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def timed(func, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def summary(times):
+    return {
+        'median_ms': round(1000 * statistics.median(times), 1),
+        'max_ms': round(1000 * max(times), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bing-delay', type=float, default=0.4, help='Seconds before the Bing stub answers')
+    parser.add_argument('--youtube-delay', type=float, default=0.6, help='Seconds before the YouTube stub answers')
+    parser.add_argument('--deadline', type=float, default=1.0, help='search() deadline for the deadline scenario')
+    parser.add_argument('--searches', type=int, default=10, help='Searches per scenario')
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    delays = {'bing': args.bing_delay, 'youtube': args.youtube_delay}
+    report = {'delays': delays}
+
+    with StubSearchServer(delays=delays) as stub:
+        scraper = ContentScraper(base_urls=stub.base_urls, deadline=30.0)
+        sequential_times, (images, videos) = timed(
+            lambda: (scraper.scrape_bing_images("photosynthesis"), scraper.scrape_youtube_videos("photosynthesis")),
+            args.searches)
+        concurrent_times, (c_images, c_videos) = timed(lambda: scraper.search("photosynthesis"), args.searches)
+        report['sequential'] = dict(summary(sequential_times), images=len(images), videos=len(videos))
+        report['concurrent'] = dict(summary(concurrent_times), images=len(c_images), videos=len(c_videos))
+        report['speedup'] = round(statistics.median(sequential_times) / statistics.median(concurrent_times), 2)
+        report['bing_requests_per_search'] = stub.requests['bing'] / (2 * args.searches)
+        if (images, videos) != (c_images, c_videos):
+            raise SystemExit("Concurrent search returned different results")
+
+    slow = {'bing': args.bing_delay, 'youtube': args.deadline + 2.0}
+    with StubSearchServer(delays=slow) as stub:
+        scraper = ContentScraper(base_urls=stub.base_urls, deadline=args.deadline)
+        deadline_times, (d_images, d_videos) = timed(lambda: scraper.search("photosynthesis"), min(3, args.searches))
+        report['deadline'] = dict(summary(deadline_times), deadline_ms=1000 * args.deadline,
+                                  images=len(d_images), videos=len(d_videos))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""HTML extraction benchmark: BeautifulSoup vs. the streaming extractor.
+
+For each result page, times the previous BeautifulSoup ('html.parser')
+extraction against ContentScraper's streaming extraction (html_extract),
+fed in 64 KiB chunks like a streamed response, and records peak Python
+memory of each with tracemalloc. Both must return the same image URLs.
+
+Pages are the synthetic Bing/Google fixtures from benchmarks.content_search,
+or saved result pages passed with --fixtures (files named bing*.html or
+google*.html, e.g. saved from a browser).
+
+    python -m benchmarks.html_extraction --fixtures saved_pages/ --limit 10
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import statistics
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from benchmarks.content_search import bing_page, google_page
+from content_scraper import ContentScraper
+from html_extract import CHUNK_SIZE
+
+
+def legacy_bing_method1(content, limit):
+    """ContentScraper._scrape_bing_method1 before the streaming rewrite"""
+    soup = BeautifulSoup(content, 'html.parser')
+    images = []
+    for tag in soup.find_all("a", class_="iusc"):
+        m_json = tag.get("m")
+        if m_json:
+            match = re.search(r'"murl":"(.*?)"', m_json)
+            if match:
+                url = match.group(1).replace('\\u002f', '/').replace('\\', '')
+                if url.startswith("http") and not url.endswith(".webp"):
+                    images.append(url)
+        if len(images) >= limit:
+            break
+    return images
+
+
+def legacy_google(content, limit):
+    """The img-tag pass of ContentScraper._scrape_google_images before the rewrite"""
+    soup = BeautifulSoup(content, 'html.parser')
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src', '')
+        data_src = img.get('data-src', '')
+        if data_src and data_src.startswith('http') and not data_src.endswith('.gif'):
+            images.append(data_src)
+        elif src and src.startswith('http') and not src.endswith('.gif') and not 'thumb' in src.lower():
+            images.append(src)
+        if len(images) >= limit:
+            break
+    return images
+
+
+class _CannedResponse:
+    """Stands in for a streamed requests.Response holding a saved page"""
+
+    def __init__(self, content):
+        self.content = content
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+def load_pages(fixtures_dir):
+    if not fixtures_dir:
+        return [('synthetic-bing', 'bing', bing_page(num_images=60, filler=2000).encode()),
+                ('synthetic-google', 'google', google_page(num_images=40, filler=2000).encode())]
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+        name = os.path.basename(path)
+        provider = 'google' if name.startswith('google') else 'bing'
+        with open(path, 'rb') as f:
+            pages.append((name, provider, f.read()))
+    return pages
+
+
+def measure(func, repeat):
+    """Median seconds over `repeat` runs and the peak traced memory of one run"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='Directory of saved bing*.html / google*.html pages')
+    parser.add_argument('--limit', type=int, default=10, help='Images to extract per page (search uses 10)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per page (median is reported)')
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    scraper = ContentScraper()
+    rows = []
+    for name, provider, content in load_pages(args.fixtures):
+        if provider == 'bing':
+            legacy = lambda: legacy_bing_method1(content, args.limit)
+            streaming = lambda: scraper._scrape_bing_method1(
+                '', args.limit, scraper._chunks(_CannedResponse(content)))
+        else:
+            legacy = lambda: legacy_google(content, args.limit)
+            streaming = lambda: scraper._extract_google_images(scraper._chunks(_CannedResponse(content)), args.limit)
+
+        legacy_seconds, legacy_peak, legacy_images = measure(legacy, args.repeat)
+        stream_seconds, stream_peak, stream_images = measure(streaming, args.repeat)
+        rows.append({
+            'page': name,
+            'kb': round(len(content) / 1024, 1),
+            'beautifulsoup_ms': round(1000 * legacy_seconds, 2),
+            'streaming_ms': round(1000 * stream_seconds, 2),
+            'speedup': round(legacy_seconds / stream_seconds, 1) if stream_seconds else None,
+            'beautifulsoup_peak_kb': round(legacy_peak / 1024, 1),
+            'streaming_peak_kb': round(stream_peak / 1024, 1),
+            'images': len(stream_images),
+            'same_images': legacy_images == stream_images,
+        })
+        print(f"{name}: {rows[-1]['beautifulsoup_ms']} ms -> {rows[-1]['streaming_ms']} ms, "
+              f"peak {rows[-1]['beautifulsoup_peak_kb']} KiB -> {rows[-1]['streaming_peak_kb']} KiB")
+
+    report = {'limit': args.limit, 'chunk_size': CHUNK_SIZE, 'pages': rows}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if not all(row['same_images'] for row in rows):
+        raise SystemExit("Streaming extraction returned different images")
+
+
+if __name__ == '__main__':
+    main()
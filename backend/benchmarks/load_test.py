@@ -0,0 +1,412 @@
+"""Load test: how many concurrent students a node supports.
+
+Drives the chatbot and engagement APIs with synthetic traffic at increasing
+concurrency and records, per stage and endpoint, p50/p95/p99 latency,
+throughput and error rate:
+
+- message: /api/chatbot/message with short student questions
+- speech:  /api/chatbot/speech-to-text with generated WAV clips (tones + noise)
+- image:   /api/chatbot/image-to-text with generated text images (JPEG)
+- analyze: /api/analyze (engagement API) with generated webcam-like frames
+
+Each virtual student has its own chat session and loops over the endpoints
+by weight (closed loop: the next request starts when the previous answer
+arrives). Payloads are drawn from a pool of distinct ones, and every speech
+and image request is made unique (a few inaudible sample bits, a JPEG
+comment) so the content-hash result caches never answer them; the report
+measures Whisper and EasyOCR, not cache lookups.
+
+--mock-llm starts mock_llm_server in this process, and --spawn-api starts
+prefork_server.py pointed at it with content prefetching off, so the run
+needs no LLM provider and scrapes nothing:
+
+    python -m benchmarks.load_test --mock-llm --spawn-api --concurrency 1 4 16 32 \\
+        --stage-seconds 30 --output load.json --compare previous_load.json
+"""
+import argparse
+import base64
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import struct
+import subprocess  # nosec - starts our own API server
+import sys
+import threading
+import time
+import wave
+from collections import defaultdict
+
+import cv2
+import numpy as np
+import requests
+
+from mock_llm_server import MockLLMServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = {
+    'message': '/api/chatbot/message',
+    'speech': '/api/chatbot/speech-to-text',
+    'image': '/api/chatbot/image-to-text',
+    'analyze': '/api/analyze',
+}
+
+QUESTIONS = [
+    "What is photosynthesis?",
+    "Can you explain Newton's second law with an example?",
+    "How do I find the derivative of x squared times sin x?",
+    "Tell me about the causes of the French Revolution.",
+    "What is the difference between mitosis and meiosis?",
+    "Explain gradient descent in simple terms.",
+    "How does a binary search work?",
+    "Why is the sky blue?",
+]
+
+WORDS = [
+    "gradient", "descent", "matrix", "vector", "equation", "photosynthesis",
+    "mitochondria", "theorem", "integral", "derivative", "velocity", "Chapter 3",
+    "Homework #4", "Due: Friday", "3.14159", "x + y = 10",
+]
+
+
+def synthetic_wav(seed: int, seconds: float = 4.0, rate: int = 16000) -> bytes:
+    """A mono 16-bit WAV clip of a few tones with noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    audio = sum(np.sin(2 * np.pi * f * t) for f in rng.uniform(150, 900, size=3)) / 3
+    audio = 0.3 * audio + rng.normal(0, 0.01, size=len(t))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes((np.clip(audio, -1, 1) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def synthetic_text_image(seed: int, size=(1280, 960)) -> bytes:
+    """A JPEG of whiteboard-like lines of text"""
+    rng = random.Random(seed)
+    image = np.full((size[1], size[0], 3), [rng.randint(200, 255) for _ in range(3)], dtype=np.uint8)
+    y = rng.randint(60, 120)
+    while y < size[1] - 40:
+        line = " ".join(rng.sample(WORDS, rng.randint(1, 4)))
+        color = tuple(rng.randint(0, 80) for _ in range(3))
+        cv2.putText(image, line, (rng.randint(10, 120), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    rng.uniform(1.0, 2.0), color, 2, cv2.LINE_AA)
+        y += rng.randint(70, 120)
+    return cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def synthetic_frame(seed: int, size=(640, 480)) -> str:
+    """A webcam-like frame with a face-shaped blob, as a JPEG data URL"""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    frame = rng.integers(40, 90, size=(h, w, 3), dtype=np.uint8)
+    cx, cy = int(w / 2 + rng.integers(-60, 60)), int(h / 2 + rng.integers(-40, 40))
+    cv2.ellipse(frame, (cx, cy), (90, 120), 0, 0, 360, (140, 170, 210), -1)
+    for dx in (-35, 35):
+        cv2.circle(frame, (cx + dx, cy - 30), 10, (40, 40, 40), -1)
+    cv2.ellipse(frame, (cx, cy + 50), (35, 12), 0, 0, 180, (60, 60, 150), 3)
+    jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+    return 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode()
+
+
+class Payloads:
+    """Pools of distinct synthetic inputs, built before the load starts
+
+    clip() and image() return pool entries altered per call, so every
+    request has its own content hash.
+    """
+
+    def __init__(self, endpoints, pool_size: int, seed: int = 0):
+        self.clips = [synthetic_wav(seed + i) for i in range(pool_size)] if 'speech' in endpoints else []
+        self.images = [synthetic_text_image(seed + i) for i in range(pool_size)] if 'image' in endpoints else []
+        self.frames = [synthetic_frame(seed + i) for i in range(pool_size)] if 'analyze' in endpoints else []
+        self._serial = itertools.count()
+
+    def clip(self, rng) -> bytes:
+        """A pool WAV with a serial number in the lowest bit of its last 32 samples"""
+        serial = next(self._serial)
+        data = bytearray(rng.choice(self.clips))
+        samples = struct.unpack('<32h', data[-64:])
+        data[-64:] = struct.pack('<32h', *((s & ~1) | (serial >> i & 1) for i, s in enumerate(samples)))
+        return bytes(data)
+
+    def image(self, rng) -> bytes:
+        """A pool JPEG with a serial number in a comment segment after the SOI marker"""
+        comment = f"loadtest {next(self._serial)}".encode()
+        data = rng.choice(self.images)
+        return data[:2] + b'\xff\xfe' + struct.pack('>H', len(comment) + 2) + comment + data[2:]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+class Recorder:
+    """Latencies and errors of one stage, per endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def record(self, endpoint, seconds, error=None):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if error is not None:
+                self.errors[endpoint] += 1
+                self.error_samples.setdefault(endpoint, error)
+
+    def summary(self, elapsed):
+        rows = {}
+        with self._lock:
+            for endpoint, values in sorted(self.latencies.items()):
+                ms = sorted(1000 * v for v in values)
+                rows[endpoint] = {
+                    'requests': len(ms),
+                    'errors': self.errors[endpoint],
+                    'throughput_rps': round(len(ms) / elapsed, 2),
+                    'error_rate': round(self.errors[endpoint] / len(ms), 4),
+                    'p50_ms': round(percentile(ms, 50), 1),
+                    'p95_ms': round(percentile(ms, 95), 1),
+                    'p99_ms': round(percentile(ms, 99), 1),
+                    'max_ms': round(ms[-1], 1),
+                    'first_error': self.error_samples.get(endpoint),
+                }
+        return rows
+
+
+class Student:
+    """One virtual student: a chat session and a loop of weighted requests"""
+
+    def __init__(self, index, args, payloads, recorder, stop):
+        self.user_id = f"loadtest-{index}"
+        self.args = args
+        self.payloads = payloads
+        self.recorder = recorder
+        self.stop = stop
+        self.random = random.Random(args.seed * 1000 + index)
+        self.session = requests.Session()
+        self.endpoints = list(args.mix)
+        self.weights = [args.mix[name] for name in self.endpoints]
+
+    def run(self):
+        if set(self.args.mix) - {'analyze'}:
+            try:
+                self.session.post(f"{self.args.chatbot_url}/api/chatbot/initialize",
+                                  json={'user_id': self.user_id, 'course_context': 'Biology 101'},
+                                  timeout=self.args.timeout)
+            except requests.RequestException:
+                # Shows up as errors on the student's requests
+                pass
+        while not self.stop.is_set():
+            endpoint = self.random.choices(self.endpoints, self.weights)[0]
+            started = time.perf_counter()
+            error = None
+            try:
+                response = self.send(endpoint)
+                if response.status_code >= 400:
+                    error = f"HTTP {response.status_code}: {response.text[:200]}"
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+            if not self.stop.is_set():
+                # Requests still running when the stage ends are not counted
+                self.recorder.record(endpoint, time.perf_counter() - started, error)
+
+    def send(self, endpoint):
+        args = self.args
+        url = (args.engagement_url if endpoint == 'analyze' else args.chatbot_url) + ENDPOINTS[endpoint]
+        if endpoint == 'message':
+            return self.session.post(url, json={'user_id': self.user_id,
+                                                'message': self.random.choice(QUESTIONS)},
+                                     timeout=args.timeout)
+        if endpoint == 'analyze':
+            return self.session.post(url, json={'image': self.random.choice(self.payloads.frames)},
+                                     timeout=args.timeout)
+        field, data, name, mime = (('audio', self.payloads.clip(self.random), 'clip.wav', 'audio/wav')
+                                   if endpoint == 'speech' else
+                                   ('image', self.payloads.image(self.random), 'page.jpg', 'image/jpeg'))
+        if args.upload == 'base64':
+            encoded = f"data:{mime};base64," + base64.b64encode(data).decode()
+            return self.session.post(url, json={'user_id': self.user_id, field: encoded}, timeout=args.timeout)
+        if args.upload == 'raw':
+            return self.session.post(url, params={'user_id': self.user_id}, data=data,
+                                     headers={'Content-Type': mime}, timeout=args.timeout)
+        return self.session.post(url, data={'user_id': self.user_id}, files={field: (name, data, mime)},
+                                 timeout=args.timeout)
+
+
+def run_stage(concurrency, args, payloads):
+    recorder = Recorder()
+    stop = threading.Event()
+    students = [Student(i, args, payloads, recorder, stop) for i in range(concurrency)]
+    threads = [threading.Thread(target=student.run, daemon=True) for student in students]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    time.sleep(args.stage_seconds)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    for thread in threads:
+        thread.join(timeout=args.timeout)
+    rows = recorder.summary(elapsed)
+    total = sum(row['requests'] for row in rows.values())
+    errors = sum(row['errors'] for row in rows.values())
+    return {
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 1),
+        'throughput_rps': round(total / elapsed, 2),
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'endpoints': rows,
+    }
+
+
+def spawn_api(args, llm_url):
+    env = dict(os.environ, LLM_BACKENDS=json.dumps([{'name': 'mock', 'base_url': llm_url, 'model': 'mock-llm'}]),
+               # Prefetching would scrape live image/video providers during the run
+               CONTENT_PREFETCH_RATE='0')
+    process = subprocess.Popen(
+        [sys.executable, 'prefork_server.py', '--host', '127.0.0.1', '--port', str(args.api_port),
+         '--workers', str(args.api_workers)],
+        cwd=BACKEND_DIR, env=env)
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"API server exited with status {process.returncode}")
+        try:
+            if requests.get(f"{args.chatbot_url}/api/chatbot/status", timeout=2).ok:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    process.terminate()
+    raise SystemExit(f"API server did not answer within {args.startup_timeout} s")
+
+
+def compare(report, baseline):
+    """Print p95 and throughput changes against an earlier report, matched by stage and endpoint"""
+    previous = {stage['concurrency']: stage for stage in baseline.get('stages', [])}
+    for stage in report['stages']:
+        before = previous.get(stage['concurrency'])
+        if before is None:
+            continue
+        for endpoint, row in stage['endpoints'].items():
+            old = before['endpoints'].get(endpoint)
+            if not old:
+                continue
+            p95 = (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+            rps = (row['throughput_rps'] - old['throughput_rps']) / old['throughput_rps'] * 100 if old['throughput_rps'] else 0.0
+            print(f"c={stage['concurrency']:<4} {endpoint:<8} p95 {old['p95_ms']} -> {row['p95_ms']} ms ({p95:+.1f}%), "
+                  f"throughput {old['throughput_rps']} -> {row['throughput_rps']} rps ({rps:+.1f}%), "
+                  f"errors {old['error_rate']:.2%} -> {row['error_rate']:.2%}")
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chatbot-url', default='http://127.0.0.1:5001')
+    parser.add_argument('--engagement-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('message=4,speech=1,image=1,analyze=4'),
+                        help='Endpoint weights, e.g. message=4,speech=1,image=1,analyze=4')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 2, 4, 8, 16, 32],
+                        help='Concurrent students per stage')
+    parser.add_argument('--stage-seconds', type=float, default=30.0)
+    parser.add_argument('--upload', choices=['multipart', 'raw', 'base64'], default='multipart',
+                        help='How speech/image files are sent')
+    parser.add_argument('--pool-size', type=int, default=16, help='Distinct base payloads per kind (each request is still made unique)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mock-llm', action='store_true', help='Serve a mock LLM from this process')
+    parser.add_argument('--mock-first-token-ms', type=float, default=300.0)
+    parser.add_argument('--mock-token-ms', type=float, default=15.0)
+    parser.add_argument('--mock-tokens', type=int, default=150)
+    parser.add_argument('--mock-port', type=int, default=8090)
+    parser.add_argument('--spawn-api', action='store_true',
+                        help='Start prefork_server.py against the mock LLM (requires --mock-llm)')
+    parser.add_argument('--api-port', type=int, default=5001)
+    parser.add_argument('--api-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--startup-timeout', type=float, default=600.0)
+    parser.add_argument('--output', help='Optional path for the JSON report')
+    parser.add_argument('--compare', help='Earlier JSON report to compare p95/throughput against')
+    args = parser.parse_args()
+    if args.spawn_api:
+        if not args.mock_llm:
+            parser.error('--spawn-api requires --mock-llm')
+        args.chatbot_url = f"http://127.0.0.1:{args.api_port}"
+
+    print("Generating payloads...")
+    payloads = Payloads(args.mix, args.pool_size, args.seed)
+
+    mock = api = None
+    try:
+        if args.mock_llm:
+            mock = MockLLMServer(port=args.mock_port, first_token_ms=args.mock_first_token_ms,
+                                 token_ms=args.mock_token_ms, tokens=args.mock_tokens, seed=args.seed)
+            mock.__enter__()
+            print(f"Mock LLM at {mock.url}")
+        if args.spawn_api:
+            api = spawn_api(args, mock.url)
+        if 'analyze' in args.mix:
+            requests.post(f"{args.engagement_url}/api/initialize", json={'context': 'lecture'}, timeout=args.timeout)
+
+        stages = []
+        for concurrency in args.concurrency:
+            stage = run_stage(concurrency, args, payloads)
+            stages.append(stage)
+            print(f"c={concurrency}: {stage['throughput_rps']} rps, errors {stage['error_rate']:.2%}, " + ", ".join(
+                f"{name} p50/p95/p99 {row['p50_ms']}/{row['p95_ms']}/{row['p99_ms']} ms"
+                for name, row in stage['endpoints'].items()))
+    finally:
+        if api is not None:
+            api.terminate()
+            api.wait(timeout=30)
+        if mock is not None:
+            mock.__exit__(None, None, None)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': {'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {
+            'chatbot_url': args.chatbot_url,
+            'engagement_url': args.engagement_url,
+            'mix': args.mix,
+            'stage_seconds': args.stage_seconds,
+            'upload': args.upload,
+            'pool_size': args.pool_size,
+            'mock_llm': {'first_token_ms': args.mock_first_token_ms, 'token_ms': args.mock_token_ms,
+                         'tokens': args.mock_tokens} if args.mock_llm else None,
+            'api_workers': args.api_workers if args.spawn_api else None,
+        },
+        'stages': stages,
+        'mock_llm_requests': mock.get_stats() if mock is not None else None,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
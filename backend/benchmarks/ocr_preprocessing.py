@@ -0,0 +1,122 @@
+"""OCR latency benchmark: raw readtext vs. the preprocessing pipeline.
+
+Renders synthetic text images (see easyocr_openvino.generate_text_images),
+upscales them to phone-camera resolutions, JPEG-encodes them like an upload
+and compares, per resolution:
+
+- decode: PIL open + np.array vs. OCRPreprocessor.load_image (draft decoding)
+- ocr:    reader.readtext on the full image vs. OCRPreprocessor.readtext
+- parity: word-sequence similarity of the two outputs
+
+    python -m benchmarks.ocr_preprocessing --resolutions 1280x960 2592x1944 4032x3024
+"""
+import argparse
+import difflib
+import io
+import json
+import statistics
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from easyocr_openvino import generate_text_images
+from ocr_preprocessing import OCRPreprocessor
+
+
+def encode_jpeg(image: np.ndarray, quality: int = 90) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def timed(func, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def words(results):
+    return ' '.join(text for _, text, _ in results).split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resolutions', nargs='+', default=['1280x960', '2592x1944', '4032x3024'],
+                        help='WIDTHxHEIGHT sizes to test')
+    parser.add_argument('--images', type=int, default=3, help='Synthetic images per resolution')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per image (median is reported)')
+    parser.add_argument('--pytorch', action='store_true', help='Use the stock EasyOCR reader instead of OpenVINO')
+    parser.add_argument('--max-side', type=int, default=None)
+    parser.add_argument('--tile-size', type=int, default=None)
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    if args.pytorch:
+        import easyocr
+        reader = easyocr.Reader(['en'], gpu=False)
+    else:
+        from openvino_optimization import optimize_easyocr
+        reader, _ = optimize_easyocr()
+
+    preprocessor = OCRPreprocessor.from_environment()
+    if args.max_side is not None:
+        preprocessor.max_side = args.max_side
+    if args.tile_size is not None:
+        preprocessor.tile_size = args.tile_size
+
+    base_images = generate_text_images(num_images=args.images, seed=7)
+    # Warm up so one-off compilation and allocation is not timed
+    reader.readtext(base_images[0])
+
+    report = {
+        'backend': 'pytorch' if args.pytorch else 'openvino',
+        'max_side': preprocessor.max_side,
+        'tile_size': preprocessor.tile_size,
+        'resolutions': [],
+    }
+    for resolution in args.resolutions:
+        width, height = (int(v) for v in resolution.lower().split('x'))
+        rows = []
+        for base in base_images:
+            image = cv2.resize(base, (width, height), interpolation=cv2.INTER_CUBIC)
+            upload = encode_jpeg(image)
+
+            raw_decode, raw_image = timed(lambda: np.array(Image.open(io.BytesIO(upload)).convert('RGB')), args.repeat)
+            fast_decode, fast_image = timed(lambda: preprocessor.load_image(upload), args.repeat)
+            raw_ocr, raw_results = timed(lambda: reader.readtext(raw_image), args.repeat)
+            fast_ocr, fast_results = timed(lambda: preprocessor.readtext(reader, fast_image), args.repeat)
+
+            rows.append({
+                'raw_decode_ms': 1000 * raw_decode,
+                'preprocessed_decode_ms': 1000 * fast_decode,
+                'raw_ocr_ms': 1000 * raw_ocr,
+                'preprocessed_ocr_ms': 1000 * fast_ocr,
+                'tiles': len(preprocessor.split(preprocessor.downscale(fast_image)[0])),
+                'word_similarity': difflib.SequenceMatcher(None, words(raw_results), words(fast_results)).ratio(),
+            })
+
+        summary = {key: round(statistics.mean(row[key] for row in rows), 3) for key in rows[0]}
+        raw_total = summary['raw_decode_ms'] + summary['raw_ocr_ms']
+        fast_total = summary['preprocessed_decode_ms'] + summary['preprocessed_ocr_ms']
+        summary.update({
+            'resolution': resolution,
+            'megapixels': round(width * height / 1e6, 1),
+            'speedup': round(raw_total / fast_total, 2) if fast_total else None,
+        })
+        report['resolutions'].append(summary)
+        print(f"{resolution}: {raw_total:.0f} ms -> {fast_total:.0f} ms "
+              f"(x{summary['speedup']}, similarity {summary['word_similarity']:.2f})")
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
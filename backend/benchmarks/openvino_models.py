@@ -0,0 +1,326 @@
+"""Latency, throughput and memory benchmark for every OpenVINO model we serve.
+
+Targets:
+
+- ir:      the bundled face/landmark/head-pose/gaze/emotion IR models, per
+           precision folder (FP32, FP16, FP16-INT8), with random inputs
+- whisper: end-to-end transcription of synthetic clips, per precision
+- easyocr: end-to-end readtext on rendered text images, per precision
+
+Every target runs once per CPU configuration (inference threads x streams):
+warm-up calls first, then sequential latency percentiles, throughput under
+concurrency (AsyncInferQueue for IR models, a thread pool for the
+end-to-end pipelines) and the peak RSS observed while it ran. The JSON
+report is keyed so two releases can be diffed with --baseline.
+
+    python -m benchmarks.openvino_models --targets ir whisper easyocr --output report.json
+    python -m benchmarks.openvino_models --targets ir --baseline old.json
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import openvino as ov
+
+from model_registry import current_rss_bytes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IR_PRECISIONS = ('FP32', 'FP16', 'FP16-INT8')
+PIPELINE_PRECISIONS = ('FP32', 'FP16', 'INT8')
+
+
+class PeakRSSSampler:
+    """Polls this process's RSS in the background and keeps the maximum"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = current_rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+
+def latency_summary(times: List[float]) -> Dict[str, float]:
+    """Percentiles of per-call latencies, in milliseconds"""
+    ordered = sorted(times)
+
+    def pct(fraction):
+        return 1000 * ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        'runs': len(ordered),
+        'mean_ms': round(1000 * statistics.mean(ordered), 3),
+        'stdev_ms': round(1000 * statistics.stdev(ordered), 3) if len(ordered) > 1 else 0.0,
+        'min_ms': round(1000 * ordered[0], 3),
+        'p50_ms': round(pct(0.50), 3),
+        'p90_ms': round(pct(0.90), 3),
+        'p99_ms': round(pct(0.99), 3),
+        'max_ms': round(1000 * ordered[-1], 3),
+    }
+
+
+def time_calls(func: Callable[[], Any], warmup: int, runs: int) -> List[float]:
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def cpu_configs(threads: List[int], streams: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Named CPU property sets for the thread x stream grid; 0 threads means the default"""
+    configs = {}
+    for n_threads, n_streams in itertools.product(threads, streams):
+        props = {"NUM_STREAMS": n_streams}
+        if n_threads:
+            props["INFERENCE_NUM_THREADS"] = n_threads
+        configs[f"threads={n_threads or 'auto'},streams={n_streams}"] = props
+    return configs
+
+
+def random_inputs(model: ov.CompiledModel, seed: int = 0) -> List[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    inputs = []
+    for port in model.inputs:
+        shape = port.get_partial_shape()
+        if shape.is_dynamic:
+            raise ValueError(f"Input {port.get_any_name()} has a dynamic shape {shape}")
+        dtype = port.get_element_type().to_dtype()
+        data = rng.random(tuple(shape.to_shape()))
+        inputs.append((data * 255).astype(dtype) if np.issubdtype(dtype, np.integer) else data.astype(dtype))
+    return inputs
+
+
+def find_bundled_ir(precisions) -> List[Dict[str, str]]:
+    """IR models shipped in backend/<model>/<precision>/<model>.xml"""
+    found = []
+    for xml_path in sorted(glob.glob(os.path.join(BACKEND_DIR, '*', '*', '*.xml'))):
+        precision = os.path.basename(os.path.dirname(xml_path))
+        if precision in precisions:
+            found.append({
+                'name': os.path.splitext(os.path.basename(xml_path))[0],
+                'precision': precision,
+                'path': xml_path,
+            })
+    return found
+
+
+def benchmark_ir(core: ov.Core, path: str, config: Dict[str, Any], args) -> Dict[str, Any]:
+    weights = path[:-len('.xml')] + '.bin'
+    if not os.path.exists(weights):
+        return {'skipped': f"missing weights file {os.path.basename(weights)}"}
+
+    rss_before = current_rss_bytes()
+    with PeakRSSSampler() as sampler:
+        start = time.perf_counter()
+        compiled = core.compile_model(path, "CPU", config)
+        compile_seconds = time.perf_counter() - start
+        inputs = random_inputs(compiled)
+
+        request = compiled.create_infer_request()
+        latencies = time_calls(lambda: request.infer(inputs), args.warmup, args.runs)
+
+        jobs = args.concurrency or compiled.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS")
+        infer_queue = ov.AsyncInferQueue(compiled, jobs)
+        for _ in range(jobs):
+            infer_queue.start_async(inputs)
+        infer_queue.wait_all()
+
+        completed = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.duration:
+            infer_queue.start_async(inputs)
+            completed += 1
+        infer_queue.wait_all()
+        elapsed = time.perf_counter() - start
+
+    return {
+        'compile_seconds': round(compile_seconds, 3),
+        'weights_mb': round(os.path.getsize(weights) / 1024 ** 2, 2),
+        'latency': latency_summary(latencies),
+        'throughput': {
+            'infer_requests': jobs,
+            'inferences': completed,
+            'per_second': round(completed / elapsed, 2),
+        },
+        'streams': compiled.get_property("NUM_STREAMS"),
+        'peak_rss_mb': round(sampler.peak / 1024 ** 2, 1),
+        'rss_delta_mb': round((sampler.peak - rss_before) / 1024 ** 2, 1),
+    }
+
+
+def benchmark_pipeline(load: Callable[[], Any], call: Callable[[Any, Any], Any],
+                       samples: List[Any], args) -> Dict[str, Any]:
+    """Benchmark an end-to-end model (load, sequential latency, concurrent throughput)"""
+    rss_before = current_rss_bytes()
+    with PeakRSSSampler() as sampler:
+        start = time.perf_counter()
+        model = load()
+        load_seconds = time.perf_counter() - start
+
+        cycle = itertools.cycle(samples)
+        latencies = time_calls(lambda: call(model, next(cycle)), args.warmup, args.runs)
+
+        total = max(len(samples), args.concurrency * 2)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda i: call(model, samples[i % len(samples)]), range(total)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'load_seconds': round(load_seconds, 3),
+        'actual_precision': getattr(model, 'precision', None) or getattr(model, 'openvino_precision', None),
+        'latency': latency_summary(latencies),
+        'throughput': {
+            'concurrency': args.concurrency,
+            'calls': total,
+            'per_second': round(total / elapsed, 3),
+        },
+        'peak_rss_mb': round(sampler.peak / 1024 ** 2, 1),
+        'rss_delta_mb': round((sampler.peak - rss_before) / 1024 ** 2, 1),
+    }
+
+
+def run_whisper(core: ov.Core, precision: str, config: Dict[str, Any], args):
+    import whisper
+    from openvino_optimization import optimize_whisper_model
+    from benchmarks.whisper_batching import synthetic_clip
+
+    pytorch_model = whisper.load_model(args.whisper_model, device="cpu")
+    clips = [synthetic_clip(i, max_seconds=8.0) for i in range(4)]
+    return benchmark_pipeline(
+        # Compile with the grid point itself; a deployment profile would override it
+        lambda: optimize_whisper_model(args.whisper_model, precision, pytorch_model=pytorch_model,
+                                       config=config)[0],
+        lambda model, clip: model.transcribe(clip, fp16=False, temperature=0.0),
+        clips, args
+    )
+
+
+def run_easyocr(core: ov.Core, precision: str, config: Dict[str, Any], args):
+    from openvino_optimization import optimize_easyocr
+    from easyocr_openvino import generate_text_images
+
+    images = generate_text_images(num_images=4, seed=11)
+    return benchmark_pipeline(
+        lambda: optimize_easyocr(precision=precision, config=config)[0],
+        lambda reader, image: reader.readtext(image),
+        images, args
+    )
+
+
+def diff_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Relative change of p50 latency and throughput for entries present in both reports"""
+    changes = []
+    for key, result in current['results'].items():
+        old = baseline.get('results', {}).get(key)
+        if not old or 'latency' not in result or 'latency' not in old:
+            continue
+        p50, old_p50 = result['latency']['p50_ms'], old['latency']['p50_ms']
+        tput, old_tput = result['throughput']['per_second'], old['throughput']['per_second']
+        changes.append({
+            'key': key,
+            'p50_ms': [old_p50, p50],
+            'p50_change': round(p50 / old_p50 - 1, 4) if old_p50 else None,
+            'throughput': [old_tput, tput],
+            'throughput_change': round(tput / old_tput - 1, 4) if old_tput else None,
+        })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', nargs='+', default=['ir'], choices=['ir', 'whisper', 'easyocr'])
+    parser.add_argument('--precisions', nargs='+', default=None,
+                        help=f'IR folders ({", ".join(IR_PRECISIONS)}) and/or pipeline precisions '
+                             f'({", ".join(PIPELINE_PRECISIONS)}); default: all')
+    parser.add_argument('--threads', nargs='+', type=int, default=[0], help='INFERENCE_NUM_THREADS values (0 = default)')
+    parser.add_argument('--streams', nargs='+', default=['1', 'AUTO'], help='NUM_STREAMS values')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed calls before measuring')
+    parser.add_argument('--runs', type=int, default=50, help='Timed sequential calls for latency percentiles')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds of async inference for IR throughput')
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help='Parallel requests (default: OpenVINO optimal for IR, 4 for pipelines)')
+    parser.add_argument('--whisper-model', default='tiny')
+    parser.add_argument('--baseline', help='Earlier JSON report to diff against')
+    parser.add_argument('--output', help='Optional path for the JSON report')
+    args = parser.parse_args()
+
+    from openvino_optimization import get_core
+    core = get_core()
+
+    report = {
+        'host': {
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'openvino': ov.get_version(),
+            'cpu': core.get_property("CPU", "FULL_DEVICE_NAME"),
+        },
+        'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        'results': {},
+    }
+    configs = cpu_configs(args.threads, args.streams)
+
+    for config_name, config in configs.items():
+        if 'ir' in args.targets:
+            for model in find_bundled_ir(args.precisions or IR_PRECISIONS):
+                key = f"ir/{model['name']}/{model['precision']}/{config_name}"
+                print(f"Benchmarking {key}...")
+                try:
+                    report['results'][key] = benchmark_ir(core, model['path'], config, args)
+                except Exception as e:
+                    report['results'][key] = {'error': str(e)}
+
+        pipeline_args = argparse.Namespace(**{**vars(args), 'concurrency': args.concurrency or 4})
+        for target, runner in (('whisper', run_whisper), ('easyocr', run_easyocr)):
+            if target not in args.targets:
+                continue
+            for precision in (args.precisions or PIPELINE_PRECISIONS):
+                if precision not in PIPELINE_PRECISIONS:
+                    continue
+                key = f"{target}/{precision}/{config_name}"
+                print(f"Benchmarking {key}...")
+                try:
+                    report['results'][key] = runner(core, precision, config, pipeline_args)
+                except Exception as e:
+                    report['results'][key] = {'error': str(e)}
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['diff'] = diff_reports(report, json.load(f))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
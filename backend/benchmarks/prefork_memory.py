@@ -0,0 +1,103 @@
+"""Per-worker memory of the pre-fork server.
+
+Starts prefork_server.py with one worker and then with --workers N, loads
+every model in each worker (MODEL_WARMUP), and reads the RSS and PSS of
+the workers from /proc. RSS counts shared model memory once per worker;
+PSS splits it between them. With the weights the workers run (cached
+OpenVINO IR and compiled blobs, or PyTorch weights in shared memory)
+shared properly, the total PSS of N workers stays well below N times
+the PSS of one worker:
+
+    python -m benchmarks.prefork_memory --workers 4 --output prefork_memory.json
+"""
+import argparse
+import json
+import os
+import queue
+import signal
+import subprocess  # nosec - runs the current interpreter on our own server
+import sys
+import threading
+import time
+
+from process_memory import child_pids, memory_usage
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(workers: int, port: int, models: str, timeout: float):
+    """Start the server, wait until every worker has warmed up and read its memory"""
+    env = dict(os.environ, MODEL_WARMUP=models, CONTENT_PREFETCH_RATE='0')
+    process = subprocess.Popen(
+        [sys.executable, '-u', 'prefork_server.py', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    lines = queue.Queue()
+    threading.Thread(target=lambda: [lines.put(line) for line in process.stdout], daemon=True).start()
+
+    try:
+        warmed = 0
+        deadline = time.time() + timeout
+        while warmed < workers:
+            if process.poll() is not None:
+                raise SystemExit(f"Server exited with status {process.returncode}")
+            try:
+                line = lines.get(timeout=max(0.1, deadline - time.time()))
+            except queue.Empty:
+                raise SystemExit(f"Only {warmed}/{workers} workers warmed up within {timeout} s")
+            print(f"  {line.rstrip()}")
+            if " warmed up:" in line:
+                warmed += 1
+
+        pids = child_pids(process.pid)
+        rows = [dict(pid=pid, **memory_usage(pid)) for pid in pids]
+        return {
+            'workers': rows,
+            'master': dict(pid=process.pid, **memory_usage(process.pid)),
+            'total_rss_mb': round(sum(r.get('rss_mb', 0) for r in rows), 1),
+            'total_pss_mb': round(sum(r.get('pss_mb', 0) for r in rows), 1),
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Worker count to compare against one worker')
+    parser.add_argument('--models', default='all',
+                        help="Models each worker loads before measuring (MODEL_WARMUP), e.g. 'whisper,easyocr'")
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--timeout', type=float, default=900, help='Seconds to wait for the workers to warm up')
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    runs = {}
+    for workers in sorted({1, args.workers}):
+        print(f"Starting {workers} worker(s)...")
+        runs[workers] = measure(workers, args.port, args.models, args.timeout)
+        for row in runs[workers]['workers']:
+            print(f"worker {row['pid']}: PSS {row.get('pss_mb')} MB, RSS {row.get('rss_mb')} MB, "
+                  f"shared {row.get('shared_clean_mb', 0) + row.get('shared_dirty_mb', 0):.1f} MB")
+
+    single = runs[1]['total_pss_mb']
+    report = {
+        'models': args.models,
+        'runs': {str(workers): run for workers, run in runs.items()},
+        'single_worker_pss_mb': single,
+        'total_pss_mb': runs[args.workers]['total_pss_mb'],
+        'unshared_estimate_mb': round(single * args.workers, 1),
+        'pss_per_worker_mb': round(runs[args.workers]['total_pss_mb'] / args.workers, 1),
+    }
+    print(json.dumps({k: v for k, v in report.items() if k != 'runs'}, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Cold-start benchmark for the chatbot service.
+
+Imports the target module in a fresh interpreter three times against an
+isolated model directory (OPENVINO_MODEL_DIR). Models load lazily, so each
+import runs with MODEL_WARMUP set (all models by default) to load them
+before the import returns:
+
+1. cold        - empty cache: convert, quantize and compile everything
+2. ir_cached   - converted IR present, OpenVINO compiled-blob cache wiped
+3. warm        - IR and compiled blobs both cached (a normal restart)
+
+    python -m benchmarks.startup --output startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess  # nosec - runs the current interpreter on our own module
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time, json; start = time.perf_counter(); "
+    "import {module}; "
+    "print('STARTUP_SECONDS=' + json.dumps(time.perf_counter() - start))"
+)
+
+
+def time_import(module: str, model_dir: str, models: str) -> float:
+    env = dict(os.environ, OPENVINO_MODEL_DIR=model_dir, MODEL_WARMUP=models)
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith("STARTUP_SECONDS="):
+            return float(line.split("=", 1)[1])
+    raise RuntimeError(f"Could not parse startup time from output:\n{completed.stdout[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='chatbot_api_optimized', help='Module whose import is timed')
+    parser.add_argument('--models', default='all',
+                        help="Models to load during the import (MODEL_WARMUP), e.g. 'whisper,easyocr'")
+    parser.add_argument('--repeat', type=int, default=3, help='Warm restarts to average')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary model directory')
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix="corementis_models_")
+    try:
+        print(f"Cold start (empty cache in {model_dir})...")
+        cold = time_import(args.module, model_dir, args.models)
+
+        shutil.rmtree(os.path.join(model_dir, "compiled"), ignore_errors=True)
+        print("Restart with cached IR but no compiled blobs...")
+        ir_cached = time_import(args.module, model_dir, args.models)
+
+        warm_runs = []
+        for i in range(args.repeat):
+            print(f"Warm restart {i + 1}/{args.repeat}...")
+            warm_runs.append(time_import(args.module, model_dir, args.models))
+        warm = sum(warm_runs) / len(warm_runs)
+
+        report = {
+            'module': args.module,
+            'models': args.models,
+            'cold_seconds': round(cold, 2),
+            'ir_cached_seconds': round(ir_cached, 2),
+            'warm_seconds': round(warm, 2),
+            'warm_runs': [round(t, 2) for t in warm_runs],
+            'speedup_vs_cold': round(cold / warm, 2) if warm else None,
+        }
+        print(json.dumps(report, indent=2))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if not args.keep:
+            shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Micro-benchmark: regex-based vs. single-pass topic extraction.
+
+Builds a reproducible corpus of chat-like messages (questions, follow-ups,
+pasted OCR text, some non-ASCII) and times the previous implementation of
+ContextManager.extract_key_topics against context_manager.extract_topics.
+Both must return the same topics for every message.
+
+    python -m benchmarks.topic_extraction --messages 20000 --repeat 5
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+
+from context_manager import extract_topics
+
+VOCABULARY = (
+    "photosynthesis chlorophyll equation derivative integral theorem algebra "
+    "geometry probability statistics history empire revolution grammar essay "
+    "chemistry molecule reaction energy velocity momentum gravity planet python "
+    "function variable recursion database queries homework exam lecture chapter"
+).split()
+TECH = ["computer", "vision", "machine", "learning", "neural", "network", "model",
+        "training", "dataset", "deep", "transformer", "opencv", "pytorch"]
+FILLER = ["the", "about", "what", "this", "that", "with", "from", "could", "you",
+          "is", "a", "how", "does", "work", "explain", "please", "me", "it"]
+PUNCTUATION = [".", ",", "?", "!", ":", "'s", ""]
+NON_ASCII = ["café", "naïve", "Ångström", "İstanbul", "über", "résumé"]
+
+
+def legacy_extract_key_topics(text):
+    """ContextManager.extract_key_topics before the single-pass rewrite"""
+    tech_stopwords = {
+        'computer', 'vision', 'machine', 'learning', 'neural', 'network',
+        'algorithm', 'model', 'training', 'dataset', 'feature', 'classification',
+        'detection', 'segmentation', 'recognition', 'opencv', 'tensorflow',
+        'pytorch', 'keras', 'deep', 'convolutional', 'recurrent', 'transformer'
+    }
+    common_stopwords = {
+        'about', 'above', 'after', 'again', 'against', 'all', 'and', 'any',
+        'are', 'because', 'been', 'before', 'being', 'below', 'between', 'both',
+        'but', 'by', 'could', 'did', 'does', 'doing', 'down', 'during', 'each',
+        'few', 'for', 'from', 'further', 'had', 'has', 'have', 'having', 'here',
+        'how', 'into', 'itself', 'just', 'more', 'most', 'other', 'our', 'out',
+        'over', 'own', 'same', 'should', 'some', 'such', 'than', 'that', 'the',
+        'their', 'them', 'then', 'there', 'these', 'they', 'this', 'those',
+        'through', 'under', 'until', 'very', 'was', 'were', 'what', 'when',
+        'where', 'which', 'while', 'who', 'whom', 'why', 'will', 'with', 'you'
+    }
+    capitalized_terms = re.findall(r'\b[A-Z][a-z]{3,}\b', text)
+    all_words = re.findall(r'\b[A-Za-z]{4,}\b', text.lower())
+    filtered_words = [w.lower() for w in all_words
+                      if w.lower() not in common_stopwords
+                      and (w.lower() not in tech_stopwords or w in capitalized_terms)]
+    phrases = re.findall(r'\b[A-Za-z][a-z]+ [A-Za-z][a-z]+\b', text)
+    topics = list(set(filtered_words + [p.lower() for p in phrases]))
+    for term in tech_stopwords:
+        if term in text.lower() and re.search(r'\b' + re.escape(term) + r'\b', text.lower()):
+            topics.append(term)
+    return topics
+
+
+def random_word(rng):
+    roll = rng.random()
+    if roll < 0.45:
+        word = rng.choice(FILLER)
+    elif roll < 0.8:
+        word = rng.choice(VOCABULARY)
+    elif roll < 0.95:
+        word = rng.choice(TECH)
+    elif roll < 0.98:
+        word = rng.choice(NON_ASCII)
+    else:
+        word = f"{rng.choice(VOCABULARY)}{rng.randint(0, 99)}"
+    if rng.random() < 0.15:
+        word = word.capitalize()
+    elif rng.random() < 0.02:
+        word = word.upper()
+    return word + (rng.choice(PUNCTUATION) if rng.random() < 0.2 else "")
+
+
+def build_corpus(num_messages, seed=0):
+    """Mostly short chat messages with occasional long pasted OCR text"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(num_messages):
+        length = rng.randint(200, 600) if rng.random() < 0.05 else rng.randint(3, 40)
+        separators = [" ", " ", " ", "  ", "\n"]
+        corpus.append("".join(random_word(rng) + rng.choice(separators) for _ in range(length)).strip())
+    return corpus
+
+
+def time_extractor(extract, corpus, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in corpus:
+            extract(message)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000, help='Messages in the synthetic corpus')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes over the corpus (median is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages, args.seed)
+    mismatches = sum(sorted(legacy_extract_key_topics(m)) != sorted(extract_topics(m)) for m in corpus)
+
+    legacy_seconds = time_extractor(legacy_extract_key_topics, corpus, args.repeat)
+    single_pass_seconds = time_extractor(extract_topics, corpus, args.repeat)
+
+    report = {
+        'messages': len(corpus),
+        'characters': sum(len(m) for m in corpus),
+        'mismatches': mismatches,
+        'legacy_us_per_message': round(1e6 * legacy_seconds / len(corpus), 2),
+        'single_pass_us_per_message': round(1e6 * single_pass_seconds / len(corpus), 2),
+        'speedup': round(legacy_seconds / single_pass_seconds, 2),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if mismatches:
+        raise SystemExit(f"{mismatches} messages produced different topics")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Upload benchmark: base64 JSON vs. multipart and raw binary bodies.
+
+Builds one request body per size and encoding up front, then times how long
+the server side takes to turn it into file bytes and records the peak Python
+memory allocated while doing so (tracemalloc; the request body itself is
+allocated beforehand and not counted). Modes:
+
+- legacy:    request.json + split_data_url + b64decode, as the endpoints did before
+- base64:    read_upload on the same JSON body (the compatibility path)
+- multipart: read_upload on a multipart/form-data body
+- raw:       read_upload on a raw audio/wav body with ?user_id=...
+
+    python -m benchmarks.upload --sizes-mb 1 5 20 --repeat 5
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+from flask import Flask, request
+from werkzeug.test import EnvironBuilder
+
+from audio_decoding import split_data_url
+from uploads import max_body_bytes, read_upload
+
+app = Flask(__name__)
+
+
+def legacy_upload():
+    """speech_to_text's upload handling before multipart/raw support"""
+    data = request.json
+    mime_type, payload = split_data_url(data.get('audio'))
+    return base64.b64decode(payload)
+
+
+def build_environ(mode, payload):
+    if mode in ('legacy', 'base64'):
+        encoded = 'data:audio/wav;base64,' + base64.b64encode(payload).decode()
+        builder = EnvironBuilder(method='POST', json={'audio': encoded, 'user_id': 'bench'})
+    elif mode == 'multipart':
+        builder = EnvironBuilder(method='POST', data={
+            'audio': (io.BytesIO(payload), 'clip.wav', 'audio/wav'),
+            'user_id': 'bench',
+        })
+    else:
+        builder = EnvironBuilder(method='POST', data=payload, content_type='audio/wav',
+                                 query_string={'user_id': 'bench'})
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    # Buffer the encoded body so every run reads the same bytes
+    environ['wsgi.input'] = io.BytesIO(environ['wsgi.input'].read())
+    return environ
+
+
+def run_once(mode, environ, max_bytes):
+    environ['wsgi.input'].seek(0)
+    with app.request_context(environ):
+        if mode == 'legacy':
+            return len(legacy_upload())
+        return len(read_upload(request, 'audio', max_bytes).data)
+
+
+def measure(mode, environ, max_bytes, repeat):
+    """Median seconds over `repeat` runs and the peak traced memory of one run"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = run_once(mode, environ, max_bytes)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run_once(mode, environ, max_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes-mb', nargs='+', type=float, default=[1, 5, 20], help='Upload sizes to test')
+    parser.add_argument('--modes', nargs='+', default=['legacy', 'base64', 'multipart', 'raw'])
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per size and mode (median is reported)')
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    max_bytes = int(max(args.sizes_mb) * 1024 ** 2)
+    app.config['MAX_CONTENT_LENGTH'] = max_body_bytes(max_bytes)
+
+    rows = []
+    for size_mb in args.sizes_mb:
+        payload = os.urandom(int(size_mb * 1024 ** 2))
+        for mode in args.modes:
+            environ = build_environ(mode, payload)
+            seconds, peak, size = measure(mode, environ, max_bytes, args.repeat)
+            if size != len(payload):
+                raise SystemExit(f"{mode} returned {size} bytes for a {len(payload)}-byte upload")
+            rows.append({
+                'size_mb': size_mb,
+                'mode': mode,
+                'body_mb': round(environ['wsgi.input'].getbuffer().nbytes / 1024 ** 2, 2),
+                'ms': round(1000 * seconds, 2),
+                'peak_mb': round(peak / 1024 ** 2, 2),
+                'peak_per_upload_byte': round(peak / len(payload), 2),
+            })
+            print(f"{size_mb:g} MB {mode}: {rows[-1]['ms']} ms, peak {rows[-1]['peak_mb']} MB "
+                  f"({rows[-1]['peak_per_upload_byte']}x)")
+            del environ
+
+    report = {'repeat': args.repeat, 'results': rows}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Throughput benchmark: batched vs. sequential Whisper transcription.
+
+Generates synthetic clips (tones, chirps and silence) so no audio fixtures
+are needed, transcribes them one at a time with ``model.transcribe`` and then
+through ``TranscriptionWorker`` with concurrent submitters.
+
+    python -m benchmarks.whisper_batching --model tiny --clips 32 --concurrency 8
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import whisper
+from whisper.audio import SAMPLE_RATE
+
+from transcription_worker import TranscriptionWorker
+
+
+def synthetic_clip(seed: int, min_seconds: float = 2.0, max_seconds: float = 10.0) -> np.ndarray:
+    """Build a reproducible float32 clip of tones, a chirp and silence"""
+    rng = np.random.default_rng(seed)
+    duration = rng.uniform(min_seconds, max_seconds)
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+
+    kind = seed % 3
+    if kind == 0:
+        freqs = rng.uniform(150, 900, size=3)
+        audio = sum(np.sin(2 * np.pi * f * t) for f in freqs) / len(freqs)
+    elif kind == 1:
+        f0, f1 = rng.uniform(100, 400), rng.uniform(800, 2000)
+        audio = np.sin(2 * np.pi * (f0 + (f1 - f0) * t / duration / 2) * t)
+    else:
+        audio = np.zeros_like(t)
+        start = len(t) // 3
+        audio[start:2 * start] = np.sin(2 * np.pi * 440 * t[start:2 * start])
+
+    audio = audio + rng.normal(0, 0.01, size=len(t))
+    return (0.3 * audio).astype(np.float32)
+
+
+def run_sequential(model, clips):
+    start = time.perf_counter()
+    for clip in clips:
+        model.transcribe(clip, fp16=False)
+    return time.perf_counter() - start
+
+
+def run_batched(model, clips, concurrency, max_batch_size, max_wait_ms):
+    worker = TranscriptionWorker(model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker.transcribe, clips))
+        elapsed = time.perf_counter() - start
+        return elapsed, worker.get_stats()
+    finally:
+        worker.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='tiny', help='Whisper model size')
+    parser.add_argument('--clips', type=int, default=32, help='Number of synthetic clips')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent submitters for the batched run')
+    parser.add_argument('--max-batch', type=int, default=8)
+    parser.add_argument('--max-wait-ms', type=float, default=50.0)
+    parser.add_argument('--output', help='Optional path for a JSON report')
+    args = parser.parse_args()
+
+    print(f"Loading Whisper {args.model}...")
+    model = whisper.load_model(args.model)
+    clips = [synthetic_clip(i) for i in range(args.clips)]
+    audio_seconds = sum(len(c) for c in clips) / SAMPLE_RATE
+
+    # Warm up both paths so one-off allocations are not timed
+    model.transcribe(clips[0], fp16=False)
+
+    sequential = run_sequential(model, clips)
+    batched, stats = run_batched(model, clips, args.concurrency, args.max_batch, args.max_wait_ms)
+
+    report = {
+        'model': args.model,
+        'clips': args.clips,
+        'audio_seconds': round(audio_seconds, 2),
+        'sequential': {
+            'seconds': round(sequential, 3),
+            'clips_per_second': round(args.clips / sequential, 3),
+        },
+        'batched': {
+            'seconds': round(batched, 3),
+            'clips_per_second': round(args.clips / batched, 3),
+            'concurrency': args.concurrency,
+            'worker': stats,
+        },
+        'speedup': round(sequential / batched, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,41 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, g, Response, stream_with_context
 from flask_cors import CORS
 import json
 import os
-import base64
-import tempfile
 import numpy as np
-import cv2
-from groq import Groq
-import whisper
-import torch
-from PIL import Image
-import io
-import easyocr
 import time
-import openvino as ov
 
-# Import our OpenVINO optimization module
-from openvino_optimization import optimize_whisper_model, optimize_easyocr, measure_inference_time
+# Lazily loaded Whisper/EasyOCR/TTS models
+from model_registry import ModelRegistry, ModelUnavailableError
 # Import context management
 from context_manager import ContextManager
 # Import content scraper module
-from content_scraper import search_content
-# Import text-to-speech module
-try:
-    from text_to_speech import tts_engine
-    tts_available = tts_engine.initialized
-except ImportError:
-    print("Text-to-speech module not available. TTS functionality will be disabled.")
-    tts_available = False
-except Exception as e:
-    print(f"Error initializing text-to-speech module: {e}")
-    tts_available = False
+from content_scraper import search_content_cached, content_cache, content_prefetcher, prefetch_content
+from content_prefetch import PRIORITY_COURSE, PRIORITY_TOPIC_SHIFT, likely_search_topics
+# Import in-memory audio decoding
+from audio_decoding import decode_audio_bytes, decoding_params, AudioDecodingError
+# Per-worker RSS/PSS for the performance endpoint
+from process_memory import worker_memory_report
+# Orientation/downscale/tiling before OCR
+from ocr_preprocessing import OCRPreprocessor
+# Content-hash cache of OCR and transcription results
+from result_cache import ResultCache, content_key
+# Measured latency/throughput/error metrics
+from telemetry import Telemetry, PROMETHEUS_CONTENT_TYPE
+# Sentence-level TTS with a synthesis cache
+from tts_streaming import TTSStreamer
+# Multipart/raw/base64 upload parsing with a size cap
+from uploads import read_upload, max_upload_bytes, max_body_bytes, UploadError
+# System prompts interned as templates and stored by reference
+from prompt_templates import PromptLibrary
+# OpenAI-compatible chat backends with health routing, hedging and circuit breakers
+from llm_backends import LLMBackend, LLMRouter, LLMUnavailableError
+from process_memory import memory_usage
 
 app = Flask(__name__)
+# Audio/image uploads are capped at UPLOAD_MAX_MB; bodies may be larger only by base64 overhead
+MAX_UPLOAD_BYTES = max_upload_bytes()
+app.config['MAX_CONTENT_LENGTH'] = max_body_bytes(MAX_UPLOAD_BYTES)
 # Configure CORS to allow requests from any origin with more specific settings
 CORS(app, resources={
     r"/*": {
@@ -43,68 +46,258 @@ CORS(app, resources={
     }
 })
 
-# Initialize Groq client
-client = None
-try:
-    client = Groq(
+# Rolling latency, throughput and error metrics for endpoints, models and queues
+telemetry = Telemetry(window_seconds=float(os.environ.get("TELEMETRY_WINDOW_SECONDS", 300)))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    if request.method != 'OPTIONS' and 'request_started' in g:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        telemetry.record_request(endpoint, time.perf_counter() - g.pop('request_started'),
+                                 error=response.status_code >= 500)
+    return response
+
+@app.teardown_request
+def record_failed_request(exc):
+    # Only reached with the timer still set when a view raised past after_request
+    if exc is not None and 'request_started' in g:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        telemetry.record_request(endpoint, time.perf_counter() - g.pop('request_started'), error=True)
+
+# Chat model and the reply length requested from it
+LLM_MODEL = "llama3-8b-8192"
+LLM_MAX_COMPLETION_TOKENS = 800
+
+# Chat completions go to Groq unless LLM_BACKENDS lists other OpenAI-compatible
+# endpoints (e.g. a local vLLM or mock_llm_server.py for load tests)
+llm_router = LLMRouter.from_environment([
+    LLMBackend(
+        'groq', 'https://api.groq.com/openai/v1', LLM_MODEL,
         api_key=os.environ.get("GROQ_API_KEY", "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")
     )
-    print("Groq client initialized successfully")
-except Exception as e:
-    print(f"Error initializing Groq client: {e}")
-    print("Continuing without Groq client. Check your API key or network connection.")
-
-# Initialize Whisper model with OpenVINO optimization and quantization
-whisper_model = None
-openvino_core = None
-try:
-    print("Loading Whisper model with OpenVINO optimization...")
-    start_time = time.time()
-    whisper_model, openvino_core = optimize_whisper_model()
-    load_time = time.time() - start_time
-    print(f"Whisper model loaded and optimized in {load_time:.2f} seconds")
-    print(f"Available OpenVINO devices: {openvino_core.available_devices if openvino_core else 'None'}")
-except Exception as e:
-    print(f"Error loading optimized Whisper model: {e}")
-    print("Falling back to standard Whisper model")
+])
+print(f"LLM backends: {', '.join(f'{b.name} ({b.model})' for b in llm_router.backends)}")
+
+def load_whisper_weights():
+    """Load the PyTorch Whisper checkpoint (fork-safe: no inference threads yet)
+
+    Returns None when OpenVINO IR for it is cached: the runtime is then built
+    from the memory-mapped IR alone and never needs the PyTorch weights.
+    """
+    from openvino_optimization import cached_whisper_ir
+    if cached_whisper_ir("tiny") is not None:
+        return None
+    import whisper
+    return whisper.load_model("tiny", device="cpu")
+
+def load_whisper(pytorch_model):
+    """Wrap Whisper (OpenVINO-optimized if possible) in a micro-batching worker"""
+    # Heavy imports stay inside the loaders so text-only nodes never pay for them
+    from openvino_optimization import optimize_whisper_model
+    from transcription_worker import TranscriptionWorker
+
     try:
-        whisper_model = whisper.load_model("tiny")
-        print("Standard Whisper model loaded successfully")
-    except Exception as e2:
-        print(f"Error loading standard Whisper model: {e2}")
-        whisper_model = None
-
-# Initialize EasyOCR with OpenVINO optimization
-ocr_reader = None
-try:
-    print("Initializing EasyOCR with OpenVINO optimization...")
-    start_time = time.time()
-    ocr_reader, _ = optimize_easyocr()
-    load_time = time.time() - start_time
-    print(f"EasyOCR initialized with OpenVINO optimization in {load_time:.2f} seconds")
-except Exception as e:
-    print(f"Error initializing optimized EasyOCR: {e}")
-    print("Falling back to standard EasyOCR")
+        whisper_model, _ = optimize_whisper_model(pytorch_model=pytorch_model)
+    except Exception as e:
+        print(f"Error loading optimized Whisper model: {e}")
+        print("Falling back to standard Whisper model")
+        if pytorch_model is None:
+            import whisper
+            pytorch_model = whisper.load_model("tiny", device="cpu")
+        whisper_model = pytorch_model
+
+    # Route all transcriptions through a single micro-batching worker so
+    # concurrent requests share encoder passes instead of contending for the model
+    return TranscriptionWorker(
+        whisper_model,
+        max_batch_size=int(os.environ.get("WHISPER_MAX_BATCH", 8)),
+        max_wait_ms=float(os.environ.get("WHISPER_MAX_WAIT_MS", 50)),
+        on_queue_wait=lambda seconds: telemetry.record_queue_wait('whisper', seconds)
+    )
+
+def load_easyocr_weights():
+    """Load the EasyOCR reader and its PyTorch detector/recognizer on CPU
+
+    Returns None when OpenVINO IR for both networks is cached, like
+    load_whisper_weights().
+    """
+    from openvino_optimization import cached_easyocr_ir
+    if cached_easyocr_ir(['en']) is not None:
+        return None
+    import easyocr
+    return easyocr.Reader(['en'], gpu=False, quantize=False)
+
+def load_easyocr(weights):
+    """Swap OpenVINO detector/recognizer into a copy of the shared reader if possible"""
+    from openvino_optimization import optimize_easyocr
+
     try:
-        ocr_reader = easyocr.Reader(['en'])
-        print("Standard EasyOCR initialized successfully")
-    except Exception as e2:
-        print(f"Error initializing standard EasyOCR: {e2}")
-        ocr_reader = None
+        # Returns the shared reader itself if the OpenVINO swap fails
+        reader, _ = optimize_easyocr(reader=weights)
+    except Exception as e:
+        print(f"Error initializing optimized EasyOCR: {e}")
+        print("Falling back to standard EasyOCR")
+        if weights is None:
+            import easyocr
+            weights = easyocr.Reader(['en'], gpu=False, quantize=False)
+        reader = weights
+    return reader
+
+def load_tts():
+    """Import the text-to-speech engine"""
+    from text_to_speech import tts_engine
+    if not tts_engine.initialized:
+        raise RuntimeError("Text-to-speech engine failed to initialize")
+    return tts_engine
+
+# Models load on first use; COREMENTIS_CAPABILITIES limits what this node
+# serves and MODEL_IDLE_TIMEOUT unloads models nobody has used for a while
+model_registry = ModelRegistry.from_environment()
+model_registry.register(
+    'whisper', 'speech', load_whisper,
+    weights_loader=load_whisper_weights,
+    warmup=lambda worker: worker.transcribe(np.zeros(16000, dtype=np.float32)),
+    unloader=lambda worker: worker.stop()
+)
+model_registry.register(
+    'easyocr', 'ocr', load_easyocr,
+    weights_loader=load_easyocr_weights,
+    warmup=lambda reader: reader.readtext(np.full((64, 256, 3), 255, dtype=np.uint8))
+)
+model_registry.register('tts', 'tts', load_tts)
+
+telemetry.register_gauge(
+    'corementis_model_loaded', 'Whether a model is resident in this process', 'model',
+    lambda: {name: int(info['loaded']) for name, info in model_registry.status().items()}
+)
+telemetry.register_gauge(
+    'corementis_model_resident_bytes', 'Resident memory added by loading a model (weights included)', 'model',
+    lambda: {name: int((info['resident_mb'] + info['weights_mb']) * 1024 ** 2)
+             for name, info in model_registry.status().items()}
+)
+telemetry.register_gauge(
+    'corementis_content_cache_lookups', 'Content search cache lookups by result', 'result',
+    lambda: {key: value for key, value in content_cache.get_stats().items()
+             if key in ('fresh_hits', 'stale_hits', 'misses', 'coalesced')}
+)
+telemetry.register_gauge(
+    'corementis_process_memory_bytes', 'Memory of this worker process', 'kind',
+    lambda: {key[:-len('_mb')]: int(value * 1024 ** 2) for key, value in memory_usage().items()}
+)
+
+# Large photos are downscaled and tiled before they reach EasyOCR
+ocr_preprocessor = OCRPreprocessor.from_environment()
+
+# Re-sent screenshots and re-recorded clips are answered from cache. Keys
+# include the settings that change the output, and the backend and precision
+# that produced it (see result_backend), so a reconfiguration misses
+ocr_cache = ResultCache.from_environment('ocr')
+speech_cache = ResultCache.from_environment('speech')
+OCR_CACHE_PARAMS = ('easyocr', 'en', ocr_preprocessor.max_side, ocr_preprocessor.tile_size,
+                    ocr_preprocessor.tile_overlap)
+SPEECH_CACHE_PARAMS = ('whisper', 'tiny')
+
+# Replies are synthesized sentence by sentence; recurring sentences come from cache
+tts_streamer = TTSStreamer.from_environment(telemetry)
+
+# MODEL_WARMUP=all (or a comma-separated list of model names) loads models
+# at startup instead of on the first request
+_warmup = os.environ.get("MODEL_WARMUP", "").strip()
+if _warmup:
+    model_registry.warm_up(None if _warmup == 'all' else [n.strip() for n in _warmup.split(',') if n.strip()])
+
+def openvino_devices():
+    """Available OpenVINO devices, without importing OpenVINO before a model needs it"""
+    if not (model_registry.is_loaded('whisper') or model_registry.is_loaded('easyocr')):
+        return []
+    from openvino_optimization import get_core
+    return get_core().available_devices
+
+def model_backend(name):
+    """Describe the inference backend of a model, e.g. 'OpenVINO INT8'"""
+    model = model_registry.peek(name)
+    if model is None:
+        return 'Loads on first use' if model_registry.is_enabled(name) else 'Not available'
+    if name == 'whisper':
+        precision = getattr(model.model, 'precision', None)
+    else:
+        precision = getattr(model, 'openvino_precision', None)
+    return f'OpenVINO {precision}' if precision else 'PyTorch FP32'
+
+# Backend each model last ran on, kept across idle unloads so cache lookups
+# don't need the model resident
+_result_backends = {}
+
+def result_backend(name):
+    """Backend and precision a model's results come from, for result cache keys
+
+    Loads the model if it has not been loaded in this process yet.
+    """
+    if model_registry.peek(name) is None and name not in _result_backends:
+        try:
+            model_registry.get(name)
+        except ModelUnavailableError:
+            # The request fails when it uses the model; nothing is cached
+            return 'unavailable'
+    if model_registry.peek(name) is not None:
+        _result_backends[name] = model_backend(name)
+    return _result_backends.get(name, 'unavailable')
+
+def openvino_config(name):
+    """compile_model() properties a loaded OpenVINO model was compiled with"""
+    model = model_registry.peek(name)
+    if model is None:
+        return None
+    if name == 'whisper':
+        model = model.model
+    return getattr(model, 'openvino_config', None)
 
 # Initialize conversation history and context manager
 conversation_history = {}
-context_manager = ContextManager(max_messages=20, max_tokens=4000)
+context_manager = ContextManager.from_environment(max_messages=20)
+prompt_library = PromptLibrary()
+
+# Context that fits every backend's model alongside the reply
+LLM_CONTEXT_TOKENS = min(context_manager.token_budget(backend.model, LLM_MAX_COMPLETION_TOKENS)
+                         for backend in llm_router.backends)
+
+telemetry.register_gauge(
+    'corementis_context_tokens_sent', 'Context tokens sent to the LLM', 'stat',
+    lambda: {key: value for key, value in context_manager.get_stats().items()
+             if key in ('tokens_sent', 'max_tokens_sent', 'windows_managed')}
+)
+
+def append_message(user_id, message):
+    """Append a message to a user's conversation history and its context index"""
+    context_manager.append_message(user_id, conversation_history[user_id]['messages'], message)
+
+def save_conversation_history(user_id):
+    """Persist a user's conversation history to disk"""
+    try:
+        history_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversation_history')
+        os.makedirs(history_dir, exist_ok=True)
+        history_file = os.path.join(history_dir, f"{user_id}.json")
+        
+        with open(history_file, 'w') as f:
+            json.dump(dict(conversation_history[user_id],
+                           messages=prompt_library.to_stored(conversation_history[user_id]['messages'])), f)
+    except Exception as e:
+        print(f"Error saving conversation history: {e}")
 
 @app.route('/api/chatbot/status', methods=['GET'])
 def get_status():
     """Get the status of the chatbot API and available optimizations"""
     return jsonify({
         'status': 'online',
-        'whisper_model': 'OpenVINO optimized' if whisper_model is not None else 'Not available',
-        'ocr_model': 'OpenVINO optimized' if ocr_reader is not None else 'Not available',
-        'openvino_devices': openvino_core.available_devices if openvino_core else [],
-        'optimization': 'INT8 quantization enabled' if openvino_core else 'No optimization'
+        'capabilities': sorted(model_registry.capabilities),
+        'whisper_model': model_backend('whisper'),
+        'ocr_model': model_backend('easyocr'),
+        'openvino_devices': openvino_devices(),
+        'models': model_registry.status()
     })
 
 @app.route('/api/chatbot/initialize', methods=['POST', 'OPTIONS'])
@@ -124,6 +317,10 @@ def initialize_chatbot():
         user_id = data.get('user_id', 'anonymous')
         course_context = data.get('course_context', 'general topics')
         
+        # Start searching course content now so the student's first search is warm
+        if course_context != 'general topics':
+            prefetch_content([course_context], PRIORITY_COURSE)
+        
         # Check if conversation history exists for this user
         if user_id in conversation_history:
             print(f"Conversation history already exists for user {user_id}")
@@ -138,26 +335,22 @@ def initialize_chatbot():
             if os.path.exists(history_file):
                 try:
                     with open(history_file, 'r') as f:
-                        conversation_history[user_id] = json.load(f)
+                        history = json.load(f)
+                    history['messages'] = prompt_library.from_stored(history['messages'])
+                    conversation_history[user_id] = history
                 except Exception as e:
                     print(f"Error loading conversation history: {e}")
                     # Initialize with system prompt if loading fails
                     conversation_history[user_id] = {
                         "messages": [
-                            {
-                                "role": "system",
-                                "content": f"You are CoreMentis AI, an educational assistant for the CoreMentis platform. You are a general educational assistant that can help with a wide range of subjects based on the student's needs. The current course context is: {course_context}, but you can assist with other topics as requested. Follow these guidelines:\n1. Provide clear, concise, and accurate answers focused on the student's question\n2. Do not assume the student is specifically interested in computer vision or machine learning unless they ask about these topics\n3. Do not add irrelevant connections to technology or other fields unless specifically asked\n4. Keep explanations educational and appropriate for the student's level\n5. If you don't know something, admit it rather than making up information\n6. Maintain context from previous questions in the conversation\n7. Only provide information that is directly relevant to the question asked\n8. When asked about what you teach or what you can help with, explain that you're a general educational assistant that can help with various subjects based on the student's needs"
-                            }
+                            prompt_library.system_message(course_context)
                         ]
                     }
             else:
                 # Initialize with system prompt
                 conversation_history[user_id] = {
                     "messages": [
-                        {
-                            "role": "system",
-                            "content": f"You are CoreMentis AI, an educational assistant for the CoreMentis platform. You are a general educational assistant that can help with a wide range of subjects based on the student's needs. The current course context is: {course_context}, but you can assist with other topics as requested. Follow these guidelines:\n1. Provide clear, concise, and accurate answers focused on the student's question\n2. Do not assume the student is specifically interested in computer vision or machine learning unless they ask about these topics\n3. Do not add irrelevant connections to technology or other fields unless specifically asked\n4. Keep explanations educational and appropriate for the student's level\n5. If you don't know something, admit it rather than making up information\n6. Maintain context from previous questions in the conversation\n7. Only provide information that is directly relevant to the question asked\n8. When asked about what you teach or what you can help with, explain that you're a general educational assistant that can help with various subjects based on the student's needs"
-                        }
+                        prompt_library.system_message(course_context)
                     ]
                 }
         
@@ -185,13 +378,6 @@ def process_message():
         return response
         
     try:
-        # Check if Groq client is initialized
-        if client is None:
-            return jsonify({
-                'success': False,
-                'message': 'Groq API key not configured. Please set the GROQ_API_KEY environment variable.'
-            }), 500
-            
         # Check if session is initialized
         data = request.json
         user_id = data.get('user_id')
@@ -220,66 +406,73 @@ def process_message():
             print(f"Detected potential topic shift in the conversation")
         
         # Add user message to conversation history
-        conversation_history[user_id]['messages'].append({
+        append_message(user_id, {
             "role": "user",
             "content": message
         })
         
         # Manage context window before sending to LLM
         managed_messages = context_manager.manage_context(
-            conversation_history[user_id]['messages']
+            conversation_history[user_id]['messages'],
+            conversation_id=user_id,
+            max_tokens=LLM_CONTEXT_TOKENS
         )
         
-        # Extract key topics for logging
-        topics = context_manager.extract_key_topics(message)
+        # Key topics for logging, already extracted while managing the context
+        context_state = context_manager.conversation_state(user_id, conversation_history[user_id]['messages'])
+        topics = context_state.topics[-1]
         if topics:
             print(f"Detected potential topics: {', '.join(topics)}")
         
-        # Get response from Groq
+        # A new subject is likely to be searched for next
+        if topic_shift and topics:
+            prefetch_content(likely_search_topics(topics), PRIORITY_TOPIC_SHIFT)
+        
+        # Get response from the LLM backends
         try:
             start_time = time.time()
             
             # Use managed messages for the API call
-            chat_completion = client.chat.completions.create(
-                messages=managed_messages,
-                model="llama3-8b-8192",
-                temperature=0.5,
-                max_tokens=800,
-                top_p=1,
-                stream=False
-            )
+            with telemetry.time_model('llm'):
+                completion = llm_router.complete(
+                    prompt_library.outgoing(managed_messages),
+                    temperature=0.5,
+                    max_tokens=LLM_MAX_COMPLETION_TOKENS,
+                    top_p=1
+                )
             end_time = time.time()
             processing_time = end_time - start_time
-            print(f"LLM response generated in {processing_time:.2f} seconds")
+            print(f"LLM response generated by {completion.backend} in {processing_time:.2f} seconds"
+                  f"{' (hedged)' if completion.hedged else ''}")
             
             # Extract assistant's response
-            assistant_response = chat_completion.choices[0].message.content
+            assistant_response = completion.content
             
             # Add assistant response to conversation history
-            conversation_history[user_id]['messages'].append({
+            append_message(user_id, {
                 "role": "assistant",
                 "content": assistant_response
             })
             
             # Save conversation history to file
-            try:
-                history_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversation_history')
-                os.makedirs(history_dir, exist_ok=True)
-                history_file = os.path.join(history_dir, f"{user_id}.json")
-                
-                with open(history_file, 'w') as f:
-                    json.dump(conversation_history[user_id], f)
-            except Exception as e:
-                print(f"Error saving conversation history: {e}")
+            save_conversation_history(user_id)
             
             # Return the response
             return jsonify({
                 'success': True,
                 'message': assistant_response,
-                'processing_time': processing_time
+                'processing_time': processing_time,
+                'context_tokens': context_state.window_tokens,
+                'llm_backend': completion.backend
             })
+        except LLMUnavailableError as e:
+            print(f"No LLM backend available: {e}")
+            return jsonify({
+                'success': False,
+                'message': f'Error getting response: {str(e)}'
+            }), 503
         except Exception as e:
-            print(f"Error getting response from Groq: {e}")
+            print(f"Error getting response from LLM: {e}")
             return jsonify({
                 'success': False,
                 'message': f'Error getting response: {str(e)}'
@@ -303,33 +496,53 @@ def speech_to_text():
         return response
         
     try:
-        # Get the audio data from the request
-        data = request.json
-        audio_data = data.get('audio')
-        user_id = data.get('user_id', 'default_user')
-        
-        if not audio_data:
+        if not model_registry.is_enabled('whisper'):
             return jsonify({
                 'success': False,
-                'message': 'No audio data provided'
-            }), 400
-        
-        # Decode the base64 audio data
-        audio_bytes = base64.b64decode(audio_data.split(',')[1] if ',' in audio_data else audio_data)
+                'message': 'Speech-to-text is not served by this node.'
+            }), 503
+            
+        # Get the audio from a multipart/raw upload or a base64 JSON string
+        try:
+            upload = read_upload(request, 'audio', MAX_UPLOAD_BYTES)
+        except UploadError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), e.status
+        audio_bytes, mime_type = upload.data, upload.mime_type
+        user_id = upload.fields.get('user_id', 'default_user')
         
-        # Save the audio to a temporary file
-        temp_file_path = f"temp_audio_{user_id}_{int(time.time())}.wav"
-        with open(temp_file_path, 'wb') as f:
-            f.write(audio_bytes)
+        # A clip we have already transcribed skips decoding and Whisper entirely
+        start_time = time.time()
+        # Raw PCM bytes mean different audio at a different rate/channels/byte order
+        speech_params = (*SPEECH_CACHE_PARAMS, *decoding_params(audio_bytes, mime_type))
+        cache_key = content_key(audio_bytes, *speech_params, result_backend('whisper'))
+        cached = speech_cache.get(cache_key)
         
-        print(f"Saved audio to {temp_file_path}")
+        if cached is None:
+            # Decode the audio bytes straight into a waveform in memory
+            try:
+                audio = decode_audio_bytes(audio_bytes, mime_type)
+            except AudioDecodingError as e:
+                return jsonify({
+                    'success': False,
+                    'message': f'Error decoding audio: {str(e)}'
+                }), 400
         
         # Use Whisper model to transcribe audio with OpenVINO optimization if possible
-        start_time = time.time()
         try:
-            # For now, we use the PyTorch model but with performance tracking
-            result = whisper_model.transcribe(temp_file_path)
-            transcription = result["text"]
+            if cached is not None:
+                transcription = cached['text']
+            else:
+                # Queue the clip on the batching worker and wait for its result;
+                # use() keeps the model resident until the request is done
+                with model_registry.use('whisper') as transcription_worker, telemetry.time_model('whisper'):
+                    result = transcription_worker.transcribe(audio)
+                    # Keyed on the backend that actually produced the transcript
+                    cache_key = content_key(audio_bytes, *speech_params, result_backend('whisper'))
+                transcription = result["text"]
+                speech_cache.put(cache_key, {'text': transcription})
             
             processing_time = time.time() - start_time
             print(f"Transcription completed in {processing_time:.2f} seconds")
@@ -337,7 +550,7 @@ def speech_to_text():
             # Add a note about the input modality to the conversation context if it exists
             if user_id in conversation_history:
                 # Add a system note about the speech input (won't be shown to the user)
-                conversation_history[user_id]['messages'].append({
+                append_message(user_id, {
                     'role': 'system',
                     'content': f"[The user provided the following input via speech: '{transcription}']"
                 })
@@ -348,7 +561,8 @@ def speech_to_text():
             return jsonify({
                 'success': True,
                 'text': transcription,
-                'processing_time': processing_time
+                'processing_time': processing_time,
+                'cached': cached is not None
             })
             
         except Exception as e:
@@ -357,10 +571,6 @@ def speech_to_text():
                 'success': False,
                 'message': f'Error transcribing audio: {str(e)}'
             }), 500
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
     except Exception as e:
         print(f"Error in speech-to-text: {e}")
         return jsonify({
@@ -380,29 +590,31 @@ def image_to_text():
         return response
         
     try:
-        if ocr_reader is None:
+        if not model_registry.is_enabled('easyocr'):
             return jsonify({
                 'success': False,
-                'message': 'OCR model not loaded. Image-to-text is not available.'
-            }), 500
+                'message': 'Image-to-text is not served by this node.'
+            }), 503
             
-        data = request.json
-        image_data = data.get('image')
-        user_id = data.get('user_id', 'default_user')
-        if not image_data:
+        # Get the image from a multipart/raw upload or a base64 JSON string
+        try:
+            upload = read_upload(request, 'image', MAX_UPLOAD_BYTES)
+        except UploadError as e:
             return jsonify({
                 'success': False,
-                'message': 'No image data provided'
-            }), 400
+                'message': str(e)
+            }), e.status
+        user_id = upload.fields.get('user_id', 'default_user')
             
-        # Process base64 image data
+        # Process the image bytes
         try:
-            if image_data.startswith('data:image/'):
-                image_data = image_data.split(',')[1]
-                
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
-            print(f"Image opened successfully, size: {image.size}")
+            image_bytes = upload.data
+            cache_key = content_key(image_bytes, *OCR_CACHE_PARAMS, result_backend('easyocr'))
+            cached = ocr_cache.get(cache_key)
+            if cached is None:
+                # Decode upright (EXIF orientation applied) as an RGB array
+                image_np = ocr_preprocessor.load_image(image_bytes)
+                print(f"Image opened successfully, size: {image_np.shape[1]}x{image_np.shape[0]}")
         except Exception as e:
             print(f"Error processing image: {e}")
             return jsonify({
@@ -412,17 +624,19 @@ def image_to_text():
             
         # Use EasyOCR with OpenVINO optimization to extract text
         try:
-            print("Starting OCR with OpenVINO-optimized EasyOCR")
             start_time = time.time()
-            
-            # Convert PIL Image to numpy array for EasyOCR
-            image_np = np.array(image)
-            
-            # Perform OCR using our optimized reader
-            results = ocr_reader.readtext(image_np)
-            
-            # Extract text from results
-            extracted_text = ' '.join([text for _, text, _ in results])
+            if cached is not None:
+                extracted_text = cached['text']
+            else:
+                print("Starting OCR with OpenVINO-optimized EasyOCR")
+                # Perform OCR using our optimized reader, downscaled and tiled as needed
+                with model_registry.use('easyocr') as ocr_reader, telemetry.time_model('easyocr'):
+                    results = ocr_preprocessor.readtext(ocr_reader, image_np)
+                    cache_key = content_key(image_bytes, *OCR_CACHE_PARAMS, result_backend('easyocr'))
+                
+                # Extract text from results
+                extracted_text = ' '.join([text for _, text, _ in results])
+                ocr_cache.put(cache_key, {'text': extracted_text})
             
             end_time = time.time()
             processing_time = end_time - start_time
@@ -442,7 +656,7 @@ def image_to_text():
                     context_text = context_text[:197] + '...'
                 
                 # Add a system note about the image input (won't be shown to the user)
-                conversation_history[user_id]['messages'].append({
+                append_message(user_id, {
                     'role': 'system',
                     'content': f"[The user provided an image containing the following text: '{context_text}']"
                 })
@@ -453,7 +667,8 @@ def image_to_text():
             return jsonify({
                 'success': True,
                 'text': extracted_text.strip(),
-                'processing_time': processing_time
+                'processing_time': processing_time,
+                'cached': cached is not None
             })
         except Exception as e:
             print(f"Error extracting text from image: {e}")
@@ -517,12 +732,10 @@ def clear_history():
             }), 404
             
         # Reset conversation history with just the system prompt
+        context_manager.forget(user_id)
         conversation_history[user_id] = {
             "messages": [
-                {
-                    "role": "system",
-                    "content": f"You are CoreMentis AI, an educational assistant for the CoreMentis platform. You are a general educational assistant that can help with a wide range of subjects based on the student's needs. The current course context is: {course_context}, but you can assist with other topics as requested. Follow these guidelines:\n1. Provide clear, concise, and accurate answers focused on the student's question\n2. Do not assume the student is specifically interested in computer vision or machine learning unless they ask about these topics\n3. Do not add irrelevant connections to technology or other fields unless specifically asked\n4. Keep explanations educational and appropriate for the student's level\n5. If you don't know something, admit it rather than making up information\n6. Maintain context from previous questions in the conversation\n7. Only provide information that is directly relevant to the question asked\n8. When asked about what you teach or what you can help with, explain that you're a general educational assistant that can help with various subjects based on the student's needs"
-                }
+                prompt_library.system_message(course_context)
             ]
         }
         
@@ -551,17 +764,49 @@ def clear_history():
 def get_performance():
     """Get performance metrics for the optimized models"""
     try:
+        models = model_registry.status()
+        devices = openvino_devices() or ['CPU']
         metrics = {
             'whisper': {
-                'optimized': whisper_model is not None,
-                'backend': 'OpenVINO INT8' if openvino_core else 'PyTorch FP32',
-                'devices': openvino_core.available_devices if openvino_core else ['CPU']
+                'optimized': model_backend('whisper').startswith('OpenVINO'),
+                'backend': model_backend('whisper'),
+                'devices': devices,
+                'openvino_config': openvino_config('whisper'),
+                'model': models['whisper'],
+                'inference': telemetry.stats('model', 'whisper'),
+                'queue_wait': telemetry.stats('queue', 'whisper')
             },
             'ocr': {
-                'optimized': ocr_reader is not None,
-                'backend': 'OpenVINO INT8' if openvino_core else 'PyTorch FP32',
-                'devices': openvino_core.available_devices if openvino_core else ['CPU']
-            }
+                'optimized': model_backend('easyocr').startswith('OpenVINO'),
+                'backend': model_backend('easyocr'),
+                'devices': devices,
+                'openvino_config': openvino_config('easyocr'),
+                'model': models['easyocr'],
+                'inference': telemetry.stats('model', 'easyocr'),
+                'preprocessing': ocr_preprocessor.get_stats()
+            },
+            'tts': {
+                'model': models['tts'],
+                'inference': telemetry.stats('model', 'tts'),
+                'synthesis': tts_streamer.get_stats()
+            },
+            'llm': {
+                'inference': telemetry.stats('model', 'llm'),
+                'backends': llm_router.get_stats(),
+                'context': context_manager.get_stats(),
+                'prompts': prompt_library.get_stats()
+            },
+            'content_search': dict(content_cache.get_stats(),
+                                   prefetch=content_prefetcher.get_stats() if content_prefetcher else None),
+            'telemetry': telemetry.snapshot()
+        }
+        transcription_worker = model_registry.peek('whisper')
+        if transcription_worker is not None:
+            metrics['whisper']['batching'] = transcription_worker.get_stats()
+        metrics['memory'] = worker_memory_report()
+        metrics['result_cache'] = {
+            'ocr': ocr_cache.get_stats(),
+            'speech': speech_cache.get_stats()
         }
         
         return jsonify({
@@ -575,6 +820,13 @@ def get_performance():
             'message': f'Error retrieving performance metrics: {str(e)}'
         }), 500
 
+@app.route('/api/chatbot/metrics', methods=['GET'])
+def get_metrics():
+    """Serve telemetry in the Prometheus text exposition format"""
+    response = make_response(telemetry.prometheus())
+    response.headers['Content-Type'] = PROMETHEUS_CONTENT_TYPE
+    return response
+
 @app.route('/api/chatbot/context-summary', methods=['GET'])
 def get_context_summary():
     """Get a summary of the current conversation context"""
@@ -587,59 +839,12 @@ def get_context_summary():
                 'message': 'No conversation history found for this user'
             }), 404
         
-        # Get the conversation history
-        messages = conversation_history[user_id]['messages']
-        
-        # Initialize context manager
-        context_manager = ContextManager()
-        
-        # Extract topics from user messages
-        user_messages = [msg['content'] for msg in messages if msg['role'] == 'user']
-        all_topics = []
-        for msg in user_messages:
-            all_topics.extend(context_manager.extract_key_topics(msg))
-        
-        # Count topic frequencies
-        topic_counts = {}
-        for topic in all_topics:
-            if topic in topic_counts:
-                topic_counts[topic] += 1
-            else:
-                topic_counts[topic] = 1
-        
-        # Get the most frequent topics
-        top_topics = sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        
-        # Calculate token usage
-        total_tokens = sum(context_manager.estimate_tokens(msg['content']) for msg in messages)
-        
-        # Determine if context is being truncated
-        is_truncated = len(messages) > context_manager.max_messages
-        
-        # Detect multimodal inputs in the conversation
-        multimodal_inputs = {
-            'speech_inputs': 0,
-            'image_inputs': 0
-        }
-        
-        for msg in messages:
-            if msg['role'] == 'system':
-                content = msg['content']
-                if '[The user provided the following input via speech:' in content:
-                    multimodal_inputs['speech_inputs'] += 1
-                elif '[The user provided an image containing the following text:' in content:
-                    multimodal_inputs['image_inputs'] += 1
+        # Topics, token totals and multimodal counts are indexed as messages are appended
+        context_info = context_manager.context_summary(user_id, conversation_history[user_id]['messages'])
         
         return jsonify({
             'success': True,
-            'context_info': {
-                'message_count': len(messages),
-                'token_estimate': total_tokens,
-                'is_truncated': is_truncated,
-                'top_topics': [topic for topic, _ in top_topics],
-                'system_message': next((msg['content'] for msg in messages if msg['role'] == 'system' and not msg['content'].startswith('[')), None),
-                'multimodal_inputs': multimodal_inputs
-            }
+            'context_info': context_info
         })
     except Exception as e:
         print(f"Error getting context summary: {e}")
@@ -661,7 +866,10 @@ def text_to_speech():
         return response
     
     # Check if TTS is available
-    if not tts_available:
+    try:
+        tts_engine = model_registry.get('tts')
+    except ModelUnavailableError as e:
+        print(f"Text-to-speech unavailable: {e}")
         return jsonify({
             'success': False,
             'message': 'Text-to-speech functionality is not available on this server.'
@@ -678,34 +886,56 @@ def text_to_speech():
                 'message': 'No text provided'
             }), 400
         
-        # Use TTS engine to convert text to speech
+        engine_name = tts_engine.get_status()['model_name'] if hasattr(tts_engine, 'get_status') else 'Unknown'
         start_time = time.time()
-        audio_base64, error = tts_engine.text_to_speech(text)
-        
+
+        def note_audio_response():
+            # Add a note about the output modality to the conversation context if it exists
+            if user_id in conversation_history:
+                # Add a system note about the speech output (won't be shown to the user)
+                append_message(user_id, {
+                    'role': 'system',
+                    'content': f"[The assistant provided an audio response for: '{text[:50]}{'...' if len(text) > 50 else ''}']"
+                })
+
+                # Save the updated conversation history
+                save_conversation_history(user_id)
+
+        if data.get('stream'):
+            # One JSON line per sentence as soon as it is synthesized, then a summary line
+            note_audio_response()
+
+            def generate():
+                chunks = 0
+                for chunk in tts_streamer.stream(tts_engine, text, engine_name):
+                    chunks += 1
+                    yield json.dumps(chunk) + '\n'
+                yield json.dumps({
+                    'done': True,
+                    'chunks': chunks,
+                    'processing_time': time.time() - start_time,
+                    'tts_engine': engine_name
+                }) + '\n'
+
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+        # Whole clip: sentences are synthesized (or taken from cache) and joined
+        audio_base64, error = tts_streamer.synthesize(tts_engine, text, engine_name)
+
         if error or not audio_base64:
             return jsonify({
                 'success': False,
                 'message': error or 'Failed to convert text to speech'
             }), 500
-        
+
         processing_time = time.time() - start_time
-        
-        # Add a note about the output modality to the conversation context if it exists
-        if user_id in conversation_history:
-            # Add a system note about the speech output (won't be shown to the user)
-            conversation_history[user_id]['messages'].append({
-                'role': 'system',
-                'content': f"[The assistant provided an audio response for: '{text[:50]}{'...' if len(text) > 50 else ''}']" 
-            })
-            
-            # Save the updated conversation history
-            save_conversation_history(user_id)
-        
+        note_audio_response()
+
         return jsonify({
             'success': True,
             'audio': audio_base64,
             'processing_time': processing_time,
-            'tts_engine': tts_engine.get_status()['model_name'] if hasattr(tts_engine, 'get_status') else 'Unknown'
+            'tts_engine': engine_name
         })
     except Exception as e:
         print(f"Error in text-to-speech: {e}")
@@ -737,7 +967,7 @@ def search_educational_content():
             
         # Search for content
         start_time = time.time()
-        images, videos = search_content(topic)
+        images, videos, cache_status = search_content_cached(topic)
         processing_time = time.time() - start_time
         
         # Format video data for frontend
@@ -752,7 +982,8 @@ def search_educational_content():
             'success': True,
             'images': images,
             'videos': formatted_videos,
-            'processing_time': processing_time
+            'processing_time': processing_time,
+            'cache': cache_status
         })
     except Exception as e:
         print(f"Error searching for content: {e}")
@@ -763,8 +994,8 @@ def search_educational_content():
 
 if __name__ == '__main__':
     print("Starting CoreMentis Chatbot API with OpenVINO optimization...")
-    print(f"Available OpenVINO devices: {openvino_core.available_devices if openvino_core else 'None'}")
-    print(f"Whisper model: {'Optimized' if whisper_model is not None else 'Not available'}")
-    print(f"EasyOCR model: {'Optimized' if ocr_reader is not None else 'Not available'}")
-    print(f"TTS engine: {tts_engine.get_status()['model_name'] if tts_engine.get_status()['initialized'] else 'Not available'}")
+    print(f"Capabilities: {', '.join(sorted(model_registry.capabilities))}")
+    print(f"Whisper model: {model_backend('whisper')}")
+    print(f"EasyOCR model: {model_backend('easyocr')}")
+    print(f"TTS engine: {'Loaded' if model_registry.is_loaded('tts') else model_backend('tts')}")
     app.run(host='0.0.0.0', port=5001, debug=True)
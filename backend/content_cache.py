@@ -0,0 +1,197 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from result_cache import ResultCache, content_key
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_topic(topic: str) -> str:
+    """Cache key form of a topic: lowercase words without punctuation
+
+    "Photosynthesis!", " photosynthesis " and "PHOTOSYNTHESIS?" share an entry.
+    """
+    return ' '.join(_NON_WORD.sub(' ', topic.lower()).split())
+
+
+class ContentCache:
+    """Topic-keyed cache of content search results with stale-while-revalidate
+
+    Results younger than `ttl` are served as is. Older results, up to
+    `ttl + stale_ttl`, are still served immediately while one background
+    refresh replaces them. Only missing or expired topics make the caller
+    wait for a search, and concurrent requests for the same topic share a
+    single search (single flight). Entries live in a ResultCache, so they
+    get its memory LRU and optional disk tier.
+
+    A partial result (images or videos missing, e.g. a provider missed the
+    search deadline) is only fresh for `partial_ttl`, so the next request
+    after that refreshes it in the background.
+    """
+
+    def __init__(self, fetch: Callable[[str], Tuple[List[str], List[Dict[str, str]]]],
+                 store: ResultCache, ttl: float = 3600.0, stale_ttl: float = 86400.0,
+                 refresh_workers: int = 2, partial_ttl: float = 60.0):
+        """Initialize the cache
+
+        Args:
+            fetch: Searches a topic, returning (images, videos)
+            store: Where entries are kept
+            ttl: Seconds a result is served without refreshing it
+            stale_ttl: Further seconds a result is served while it refreshes
+            refresh_workers: Background refreshes running at once
+            partial_ttl: Seconds a partial result is served without refreshing it
+        """
+        self.fetch = fetch
+        self.store = store
+        self.ttl = ttl
+        self.partial_ttl = partial_ttl
+        self.stale_ttl = stale_ttl
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='content-refresh')
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._refresh_seconds: "deque[float]" = deque(maxlen=500)
+
+    @classmethod
+    def from_environment(cls, fetch) -> "ContentCache":
+        """Build a cache from CONTENT_CACHE_TTL, CONTENT_CACHE_STALE_TTL and CONTENT_CACHE_PARTIAL_TTL
+
+        Entry storage follows the RESULT_CACHE_* settings.
+        """
+        return cls(
+            fetch,
+            ResultCache.from_environment('content'),
+            ttl=float(os.environ.get("CONTENT_CACHE_TTL", 3600)),
+            stale_ttl=float(os.environ.get("CONTENT_CACHE_STALE_TTL", 86400)),
+            partial_ttl=float(os.environ.get("CONTENT_CACHE_PARTIAL_TTL", 60)),
+        )
+
+    def get(self, topic: str) -> Tuple[List[str], List[Dict[str, str]], str]:
+        """Search results for a topic
+
+        Returns:
+            (images, videos, status), status being 'fresh', 'stale', 'miss'
+            or 'coalesced' (waited for another request's search)
+        """
+        key = content_key(normalize_topic(topic).encode(), 'content-search')
+        entry = self.store.get(key)
+        if entry is not None:
+            age = time.time() - entry['fetched_at']
+            if age < self._fresh_seconds(entry):
+                with self._lock:
+                    self.fresh_hits += 1
+                return entry['images'], entry['videos'], 'fresh'
+            if age < self.ttl + self.stale_ttl:
+                with self._lock:
+                    self.stale_hits += 1
+                self.refresh(topic)
+                return entry['images'], entry['videos'], 'stale'
+
+        future, leader = self._single_flight(key)
+        if leader:
+            with self._lock:
+                self.misses += 1
+            self._load(key, topic, future)
+        else:
+            with self._lock:
+                self.coalesced += 1
+        images, videos = future.result()
+        return images, videos, 'miss' if leader else 'coalesced'
+
+    def refresh(self, topic: str) -> bool:
+        """Search a topic in the background unless it is already being searched
+
+        Returns:
+            True if a refresh was started
+        """
+        key = content_key(normalize_topic(topic).encode(), 'content-search')
+        future, leader = self._single_flight(key)
+        if leader:
+            self._refresher.submit(self._load, key, topic, future)
+        return leader
+
+    def prefetch(self, topic: str) -> bool:
+        """Search a topic now unless it is fresh or already being searched
+
+        Unlike get(), this does not count as a lookup in the hit rates.
+
+        Returns:
+            True if this call ran a search
+        """
+        if self.is_fresh(topic):
+            return False
+        key = content_key(normalize_topic(topic).encode(), 'content-search')
+        future, leader = self._single_flight(key)
+        if leader:
+            self._load(key, topic, future)
+        return leader
+
+    def is_fresh(self, topic: str) -> bool:
+        """Whether a topic would be served without refreshing it"""
+        entry = self.store.get(content_key(normalize_topic(topic).encode(), 'content-search'))
+        return entry is not None and time.time() - entry['fetched_at'] < self._fresh_seconds(entry)
+
+    def _fresh_seconds(self, entry: Dict[str, Any]) -> float:
+        return self.partial_ttl if entry.get('partial') else self.ttl
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses + self.coalesced
+            refresh_ms = sorted(1000 * s for s in self._refresh_seconds)
+            return {
+                'fresh_hits': self.fresh_hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_ratio': round((self.fresh_hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'refresh_ms': {
+                    'mean': round(sum(refresh_ms) / len(refresh_ms), 1) if refresh_ms else 0.0,
+                    'p95': round(refresh_ms[int(0.95 * (len(refresh_ms) - 1))], 1) if refresh_ms else 0.0,
+                    'max': round(refresh_ms[-1], 1) if refresh_ms else 0.0,
+                },
+                'in_flight': len(self._inflight),
+                'store': self.store.get_stats(),
+            }
+
+    def _single_flight(self, key: str) -> Tuple[Future, bool]:
+        """The search in progress for a key, or a new one this caller must run"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _load(self, key: str, topic: str, future: Future):
+        start = time.perf_counter()
+        try:
+            images, videos = self.fetch(topic)
+            # An empty result is most likely a failed or timed-out search
+            if images or videos:
+                self.store.put(key, {'images': images, 'videos': videos, 'fetched_at': time.time(),
+                                     'partial': not (images and videos)})
+            future.set_result((images, videos))
+        except Exception as e:
+            print(f"Error searching content for '{topic}': {e}")
+            with self._lock:
+                self.refresh_errors += 1
+            future.set_result(([], []))
+        finally:
+            with self._lock:
+                self.refreshes += 1
+                self._refresh_seconds.append(time.perf_counter() - start)
+                self._inflight.pop(key, None)
@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from content_cache import ContentCache, normalize_topic
+
+# Lower runs first
+PRIORITY_COURSE = 0
+PRIORITY_TOPIC_SHIFT = 1
+
+
+def likely_search_topics(topics: Iterable[str], limit: int = 2) -> List[str]:
+    """Pick the topics most worth prefetching from extracted message topics
+
+    Two-word phrases name a subject more precisely than single words, and
+    longer topics more precisely than shorter ones.
+    """
+    return sorted(set(topics), key=lambda topic: (' ' not in topic, -len(topic), topic))[:limit]
+
+
+class ContentPrefetcher:
+    """Warms the content cache in the background for topics students are likely to search
+
+    Topics wait in a bounded priority queue. When it is full, a new topic
+    replaces the lowest-priority one or is dropped. A single worker thread
+    runs the searches no faster than `rate_per_minute`, so prefetching
+    never competes much with interactive searches for the providers.
+    """
+
+    def __init__(self, cache: ContentCache, max_queue: int = 100, rate_per_minute: float = 30.0):
+        """Initialize the prefetcher
+
+        Args:
+            cache: Content cache to warm
+            max_queue: Topics waiting at most
+            rate_per_minute: Prefetch searches started per minute at most
+        """
+        self.cache = cache
+        self.max_queue = max_queue
+        self.min_interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._queue: List[tuple] = []
+        self._queued: Dict[str, tuple] = {}
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopped = False
+        self._next_start = 0.0
+
+        self.submitted = 0
+        self.dropped = 0
+        self.prefetched = 0
+        self.already_fresh = 0
+        self.errors = 0
+
+    @classmethod
+    def from_environment(cls, cache: ContentCache) -> Optional["ContentPrefetcher"]:
+        """Build a prefetcher from CONTENT_PREFETCH_RATE and CONTENT_PREFETCH_QUEUE
+
+        Returns None when CONTENT_PREFETCH_RATE is 0 (prefetching disabled).
+        """
+        rate = float(os.environ.get("CONTENT_PREFETCH_RATE", 30))
+        if rate <= 0:
+            return None
+        return cls(cache, max_queue=int(os.environ.get("CONTENT_PREFETCH_QUEUE", 100)), rate_per_minute=rate)
+
+    def submit(self, topic: str, priority: int = PRIORITY_TOPIC_SHIFT) -> bool:
+        """Queue a topic for prefetching
+
+        Returns:
+            True if the topic is now queued (or already was, at this priority or better)
+        """
+        key = normalize_topic(topic)
+        if not key:
+            return False
+        with self._condition:
+            self.submitted += 1
+            queued = self._queued.get(key)
+            if queued is not None:
+                if queued[0] <= priority:
+                    return True
+                self._remove(queued)
+            elif len(self._queue) >= self.max_queue:
+                worst = max(self._queue)
+                if worst[0] <= priority:
+                    self.dropped += 1
+                    return False
+                self._remove(worst)
+                self.dropped += 1
+
+            entry = (priority, next(self._order), key, topic)
+            heapq.heappush(self._queue, entry)
+            self._queued[key] = entry
+            self._ensure_worker()
+            self._condition.notify()
+            return True
+
+    def submit_many(self, topics: Iterable[str], priority: int = PRIORITY_TOPIC_SHIFT):
+        for topic in topics:
+            self.submit(topic, priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'queued': len(self._queue),
+                'submitted': self.submitted,
+                'dropped': self.dropped,
+                'prefetched': self.prefetched,
+                'already_fresh': self.already_fresh,
+                'errors': self.errors,
+                'rate_per_minute': round(60.0 / self.min_interval, 1) if self.min_interval else None,
+            }
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def _remove(self, entry: tuple):
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+        del self._queued[entry[2]]
+
+    def _ensure_worker(self):
+        # Started on first use, so a pre-fork master never owns the thread
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="content-prefetch", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                delay = self._next_start - time.monotonic()
+                if delay > 0:
+                    # Higher-priority topics may arrive while waiting for the rate limit
+                    self._condition.wait(delay)
+                    continue
+                entry = heapq.heappop(self._queue)
+                del self._queued[entry[2]]
+                self._next_start = time.monotonic() + self.min_interval
+
+            topic = entry[3]
+            try:
+                searched = self.cache.prefetch(topic)
+            except Exception as e:
+                print(f"Error prefetching content for '{topic}': {e}")
+                searched = None
+            with self._condition:
+                if searched is None:
+                    self.errors += 1
+                elif searched:
+                    self.prefetched += 1
+                else:
+                    self.already_fresh += 1
+                    # Nothing was fetched, so the rate budget is unused
+                    self._next_start = time.monotonic()
@@ -1,37 +1,120 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import os
 import re
 import urllib.parse
 import time
 import json
-from typing import List, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Tuple, Dict, Iterable, Iterator, Optional
 import logging
 
+from content_cache import ContentCache
+from content_prefetch import ContentPrefetcher, PRIORITY_TOPIC_SHIFT
+from html_extract import CHUNK_SIZE, iter_elements
+
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Search providers; overridable e.g. to point the scraper at a local stub server
+DEFAULT_BASE_URLS = {
+    'bing': 'https://www.bing.com',
+    'youtube': 'https://www.youtube.com',
+    'google': 'https://www.google.com',
+}
+
+# Read timeout per provider request, in seconds
+DEFAULT_TIMEOUTS = {
+    'bing': 5.0,
+    'youtube': 5.0,
+    'google': 5.0,
+}
+
 class ContentScraper:
-    def __init__(self):
+    def __init__(self, base_urls: Optional[Dict[str, str]] = None, timeouts: Optional[Dict[str, float]] = None,
+                 deadline: float = 8.0, max_workers: int = 8, pool_size: int = 16):
+        """Initialize the scraper
+        
+        Args:
+            base_urls: Provider base URLs, merged over DEFAULT_BASE_URLS
+            timeouts: Per-provider read timeouts, merged over DEFAULT_TIMEOUTS
+            deadline: Seconds search() waits before returning what has arrived
+            max_workers: Provider requests in flight across all searches
+            pool_size: Keep-alive connections kept per provider host
+        """
+        self.base_urls = {**DEFAULT_BASE_URLS, **(base_urls or {})}
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.deadline = deadline
+        
         self.session = requests.Session()
+        # Reuse TLS connections across searches and across the worker threads
+        adapter = HTTPAdapter(pool_connections=len(self.base_urls), pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
                           '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='content-scraper')
+    
+    @classmethod
+    def from_environment(cls) -> "ContentScraper":
+        """Build a scraper from SCRAPER_DEADLINE, SCRAPER_TIMEOUT and SCRAPER_BASE_URLS (JSON)"""
+        timeout = os.environ.get("SCRAPER_TIMEOUT")
+        base_urls = os.environ.get("SCRAPER_BASE_URLS")
+        return cls(
+            base_urls=json.loads(base_urls) if base_urls else None,
+            timeouts={provider: float(timeout) for provider in DEFAULT_TIMEOUTS} if timeout else None,
+            deadline=float(os.environ.get("SCRAPER_DEADLINE", 8.0)),
+        )
+    
+    def _get(self, provider: str, path: str, stream: bool = False) -> Optional[requests.Response]:
+        """GET a provider page, or None if it did not answer with 200"""
+        timeout = self.timeouts[provider]
+        response = self.session.get(f"{self.base_urls[provider]}{path}", timeout=(min(3.0, timeout), timeout),
+                                    stream=stream)
+        if response.status_code != 200:
+            logger.warning(f"{provider} request failed: {response.status_code}")
+            response.close()
+            return None
+        return response
+    
+    @staticmethod
+    def _chunks(response: requests.Response, record: Optional[List[bytes]] = None) -> Iterator[bytes]:
+        """Stream a response body, optionally keeping the chunks read"""
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if record is not None:
+                record.append(chunk)
+            yield chunk
+    
+    def _stream_bing_page(self, topic: str) -> Optional[requests.Response]:
+        try:
+            return self._get('bing', f"/images/search?q={urllib.parse.quote(topic)}&form=HDRSC2", stream=True)
+        except Exception as e:
+            logger.error(f"Error fetching Bing: {e}")
+            return None
 
     def scrape_bing_images(self, topic: str, limit: int = 5) -> List[str]:
         """Scrape high-quality image URLs from Bing"""
         try:
-            # Try multiple methods to get images
-            images = self._scrape_bing_method1(topic, limit * 2)  # Get more images than needed to filter
-            
-            if not images:
-                logger.info("Method 1 failed, trying method 2")
-                images = self._scrape_bing_method2(topic, limit * 2)
+            # Both Bing methods read the same results page, so it is fetched once.
+            # Method 1 stops downloading once it has enough images; if it finds
+            # none, it has read the whole page, which method 2 then scans.
+            response = self._stream_bing_page(topic)
+            images = []
+            if response is not None:
+                with response:
+                    page = []
+                    images = self._scrape_bing_method1(topic, limit * 2, self._chunks(response, page))  # Get more images than needed to filter
+                
+                if not images:
+                    logger.info("Method 1 failed, trying method 2")
+                    images = self._scrape_bing_method2(topic, limit * 2, page)
                 
             if not images:
-                logger.info("Method 2 failed, trying Google Images")
-                images = self._scrape_bing_method1(topic, limit * 2)
+                logger.info("Bing failed, trying Google Images")
+                images = self._scrape_google_images(topic, limit * 2)
             
             # Filter images to prioritize high-resolution ones
             filtered_images = self._filter_high_resolution_images(images, limit)
@@ -41,19 +124,21 @@ class ContentScraper:
             logger.error(f"Error scraping images: {e}")
             return []
             
-    def _scrape_bing_method1(self, topic: str, limit: int = 5) -> List[str]:
-        """First method to scrape Bing images"""
+    def _scrape_bing_method1(self, topic: str, limit: int = 5, page: Optional[Iterable[bytes]] = None) -> List[str]:
+        """First method to scrape Bing images: metadata of the a.iusc result tiles"""
         try:
-                search_url = f"https://www.bing.com/images/search?q={urllib.parse.quote(topic)}&form=HDRSC2"
-                response = self.session.get(search_url, timeout=10)
-                if response.status_code != 200:
-                    logger.warning(f"Bing request failed: {response.status_code}")
-                    return []
+                response = None
+                if page is None:
+                    response = self._stream_bing_page(topic)
+                    if response is None:
+                        return []
+                    page = self._chunks(response)
 
-                soup = BeautifulSoup(response.content, 'html.parser')
                 images = []
-                for tag in soup.find_all("a", class_="iusc"):
-                    m_json = tag.get("m")
+                for _, attributes in iter_elements(page, tags=('a',)):
+                    if 'iusc' not in attributes.get('class', '').split():
+                        continue
+                    m_json = attributes.get("m")
                     if m_json:
                         match = re.search(r'"murl":"(.*?)"', m_json)
                         if match:
@@ -62,24 +147,27 @@ class ContentScraper:
                                 images.append(url)
                     if len(images) >= limit:
                         break
+                if response is not None:
+                    response.close()
                 return images
         except Exception as e:
                 logger.error(f"Error scraping Bing: {e}")
                 return []
     
-    def _scrape_bing_method2(self, topic: str, limit: int = 5) -> List[str]:
-        """Second method to scrape Bing images"""
+    def _scrape_bing_method2(self, topic: str, limit: int = 5, page: Optional[Iterable[bytes]] = None) -> List[str]:
+        """Second method to scrape Bing images: any img tags"""
         try:
-            search_url = f"https://www.bing.com/images/search?q={urllib.parse.quote(topic)}&form=HDRSC2"
-            response = self.session.get(search_url, timeout=10)
-            if response.status_code != 200:
-                return []
+            response = None
+            if page is None:
+                response = self._stream_bing_page(topic)
+                if response is None:
+                    return []
+                page = self._chunks(response)
 
-            soup = BeautifulSoup(response.content, 'html.parser')
             images = []
             
             # Look for image elements
-            for img in soup.find_all('img'):
+            for _, img in iter_elements(page, tags=('img',)):
                 src = img.get('src', '')
                 data_src = img.get('data-src', '')
                 if src and src.startswith('http') and not src.endswith('.svg'):
@@ -88,6 +176,8 @@ class ContentScraper:
                     images.append(data_src)
                 if len(images) >= limit:
                     break
+            if response is not None:
+                response.close()
             return images
         except Exception as e:
             logger.error(f"Error in method 2: {e}")
@@ -98,55 +188,56 @@ class ContentScraper:
         try:
             # Add high resolution to the search query and use the tbs parameter for large images
             search_query = f"{topic} high resolution"
-            search_url = f"https://www.google.com/search?q={urllib.parse.quote(search_query)}&tbm=isch&tbs=isz:l"
-            self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                            '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
-            response = self.session.get(search_url, timeout=10)
-            if response.status_code != 200:
+            response = self._get('google', f"/search?q={urllib.parse.quote(search_query)}&tbm=isch&tbs=isz:l",
+                                 stream=True)
+            if response is None:
                 return []
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-            images = []
-            
-            # Try to find image URLs in the page
-            for img in soup.find_all('img'):
-                src = img.get('src', '')
-                data_src = img.get('data-src', '')
-                # Prioritize data-src as it often contains the full-size image
-                if data_src and data_src.startswith('http') and not data_src.endswith('.gif'):
-                    images.append(data_src)
-                elif src and src.startswith('http') and not src.endswith('.gif') and not 'thumb' in src.lower():
-                    images.append(src)
-                if len(images) >= limit:
-                    break
-                    
-            # If we still don't have images, try to extract from JSON data in scripts
-            if not images:
-                for script in soup.find_all('script'):
-                    if script.string and 'AF_initDataCallback' in script.string:
-                        image_urls = re.findall(r'"(https://[^"]+\.(jpg|png|jpeg))"', script.string)
-                        for url, _ in image_urls:
-                            if url not in images and not 'thumb' in url.lower() and not 'icon' in url.lower():
-                                images.append(url)
-                            if len(images) >= limit:
-                                break
-                        if len(images) >= limit:
-                            break
-            return images
+            with response:
+                return self._extract_google_images(self._chunks(response), limit)
         except Exception as e:
             logger.error(f"Error in Google method: {e}")
             return []
 
+    def _extract_google_images(self, page: Iterable[bytes], limit: int = 5) -> List[str]:
+        """Image URLs from a Google Images results page"""
+        images = []
+        data_scripts = []
+        # Try to find image URLs in the page, keeping scripts with image data
+        for tag, attributes in iter_elements(page, tags=('img', 'script')):
+            if tag == 'script':
+                if 'AF_initDataCallback' in attributes['text']:
+                    data_scripts.append(attributes['text'])
+                continue
+            src = attributes.get('src', '')
+            data_src = attributes.get('data-src', '')
+            # Prioritize data-src as it often contains the full-size image
+            if data_src and data_src.startswith('http') and not data_src.endswith('.gif'):
+                images.append(data_src)
+            elif src and src.startswith('http') and not src.endswith('.gif') and not 'thumb' in src.lower():
+                images.append(src)
+            if len(images) >= limit:
+                break
+        
+        # If we still don't have images, try to extract from JSON data in scripts
+        if not images:
+            for script in data_scripts:
+                image_urls = re.findall(r'"(https://[^"]+\.(jpg|png|jpeg))"', script)
+                for url, _ in image_urls:
+                    if url not in images and not 'thumb' in url.lower() and not 'icon' in url.lower():
+                        images.append(url)
+                    if len(images) >= limit:
+                        break
+                if len(images) >= limit:
+                    break
+        return images
+
     def scrape_youtube_videos(self, topic: str, limit: int = 3) -> List[Dict[str, str]]:
         """Scrape YouTube video links."""
         try:
             query = f"{topic} educational"
-            search_url = f"https://www.youtube.com/results?search_query={urllib.parse.quote(query)}"
-            response = self.session.get(search_url, timeout=10)
-            if response.status_code != 200:
-                logger.warning(f"YouTube request failed: {response.status_code}")
+            response = self._get('youtube', f"/results?search_query={urllib.parse.quote(query)}")
+            if response is None:
                 return []
 
             pattern = r'"videoId":"(.*?)".*?"title":{"runs":\[{"text":"(.*?)"}\]'
@@ -200,12 +291,30 @@ class ContentScraper:
         sorted_images = [img for img, score in sorted(scored_images, key=lambda x: x[1], reverse=True)]
         return sorted_images[:limit]
         
-    def search(self, topic: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    def search(self, topic: str, deadline: Optional[float] = None) -> Tuple[List[str], List[Dict[str, str]]]:
+        """Search images and videos concurrently
+        
+        Args:
+            topic: Search topic
+            deadline: Seconds to wait for the providers (defaults to self.deadline);
+                a provider that has not answered by then contributes no results
+        """
         if not topic.strip():
             return [], []
         logger.info(f"Searching content for topic: {topic}")
-        images = self.scrape_bing_images(topic)
-        videos = self.scrape_youtube_videos(topic)
+        deadline = self.deadline if deadline is None else deadline
+        
+        images_future = self._executor.submit(self.scrape_bing_images, topic)
+        videos_future = self._executor.submit(self.scrape_youtube_videos, topic)
+        done, pending = wait([images_future, videos_future], timeout=deadline)
+        for future in pending:
+            # Requests already in flight finish in the background within their timeouts
+            future.cancel()
+        if pending:
+            logger.warning(f"Search deadline of {deadline}s passed for topic: {topic}")
+        
+        images = images_future.result() if images_future in done else []
+        videos = videos_future.result() if videos_future in done else []
         
         # Log the results
         logger.info(f"Found {len(images)} images and {len(videos)} videos for topic: {topic}")
@@ -216,22 +325,44 @@ class ContentScraper:
         return images, videos
 
 # Initialize a global instance
-scraper = ContentScraper()
+scraper = ContentScraper.from_environment()
 
-def search_content(topic: str) -> Tuple[List[str], List[Dict[str, str]]]:
-    """Search for images and videos on a given topic"""
+# Results per normalized topic, shared by everyone asking about the same topic
+content_cache = ContentCache.from_environment(scraper.search)
+
+# Warms the cache for topics students are likely to search next (None when disabled)
+content_prefetcher = ContentPrefetcher.from_environment(content_cache)
+
+def shorten_topic(topic: str) -> str:
+    """Use a shorter topic for better search results"""
+    if len(topic) > 100:
+        # Extract key phrases if topic is too long
+        search_topic = ' '.join(topic.split()[:10])
+        logger.info(f"Topic too long, shortened to: {search_topic}")
+        return search_topic
+    return topic
+
+def search_content_cached(topic: str) -> Tuple[List[str], List[Dict[str, str]], str]:
+    """Search for images and videos on a given topic through the content cache
+    
+    Returns:
+        (images, videos, cache status), see ContentCache.get
+    """
     if not topic.strip():
-        return [], []
+        return [], [], 'miss'
     try:
-        # Use a shorter topic for better search results
-        search_topic = topic
-        if len(topic) > 100:
-            # Extract key phrases if topic is too long
-            search_topic = ' '.join(topic.split()[:10])
-            logger.info(f"Topic too long, shortened to: {search_topic}")
-            
-        return scraper.search(search_topic)
+        return content_cache.get(shorten_topic(topic))
     except Exception as e:
         logger.error(f"Error in search_content: {e}")
-        return [], []
-        
+        return [], [], 'miss'
+
+def search_content(topic: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    """Search for images and videos on a given topic"""
+    images, videos, _ = search_content_cached(topic)
+    return images, videos
+
+def prefetch_content(topics: Iterable[str], priority: int = PRIORITY_TOPIC_SHIFT):
+    """Queue topics for background search so later searches hit a warm cache"""
+    if content_prefetcher is None:
+        return
+    content_prefetcher.submit_many((shorten_topic(topic) for topic in topics if topic.strip()), priority)
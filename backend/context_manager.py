@@ -1,68 +1,500 @@
+import functools
+import os
 import re
+import threading
 import time
 from typing import List, Dict, Any, Optional
 
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Context windows of the chat models the backend calls
+MODEL_CONTEXT_WINDOWS = {
+    'llama3-8b-8192': 8192,
+    'llama3-70b-8192': 8192,
+}
+
+# Role and separator tokens a chat template adds around each message
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Room kept for the "Previous conversation summary" message (300 characters)
+SUMMARY_TOKEN_RESERVE = 128
+
+# Technical domain terms; only reported when mentioned as whole words, so
+# topics do not default to them
+TECH_TERMS = frozenset({
+    'computer', 'vision', 'machine', 'learning', 'neural', 'network',
+    'algorithm', 'model', 'training', 'dataset', 'feature', 'classification',
+    'detection', 'segmentation', 'recognition', 'opencv', 'tensorflow',
+    'pytorch', 'keras', 'deep', 'convolutional', 'recurrent', 'transformer'
+})
+
+# Common English stopwords
+COMMON_STOPWORDS = frozenset({
+    'about', 'above', 'after', 'again', 'against', 'all', 'and', 'any',
+    'are', 'because', 'been', 'before', 'being', 'below', 'between', 'both',
+    'but', 'by', 'could', 'did', 'does', 'doing', 'down', 'during', 'each',
+    'few', 'for', 'from', 'further', 'had', 'has', 'have', 'having', 'here',
+    'how', 'into', 'itself', 'just', 'more', 'most', 'other', 'our', 'out',
+    'over', 'own', 'same', 'should', 'some', 'such', 'than', 'that', 'the',
+    'their', 'them', 'then', 'there', 'these', 'they', 'this', 'those',
+    'through', 'under', 'until', 'very', 'was', 'were', 'what', 'when',
+    'where', 'which', 'while', 'who', 'whom', 'why', 'will', 'with', 'you'
+})
+
+# Explicit topic change indicators
+TOPIC_CHANGE_PHRASES = (
+    "let's talk about", "can we discuss", "tell me about", "what is",
+    "explain", "instead", "change topic", "different topic",
+    "another question", "new topic", "switching gears"
+)
+
+# System notes the API adds for non-text inputs, by counter name
+MULTIMODAL_MARKERS = (
+    ('speech_inputs', '[The user provided the following input via speech:'),
+    ('image_inputs', '[The user provided an image containing the following text:'),
+)
+
+# Words and the separator before each one, so phrases need no second scan
+_WORD_RUN = re.compile(r'(\W*)(\w+)')
+
+def extract_topics(text: str) -> List[str]:
+    """Extract potential key topics from text in one scan over its words
+    
+    Topics are lowercased 4+ letter words that are neither stopwords nor
+    technical terms, plus two-word phrases (pairs of words made of a letter
+    and lowercase letters, separated by one space, paired left to right).
+    Technical terms that occur as whole words are appended after them.
+    """
+    words = []
+    phrases = []
+    tech_found = set()
+    ascii_text = text.isascii()
+    
+    # Previous word while it can still start a phrase
+    phrase_start = None
+    for separator, run in _WORD_RUN.findall(text):
+        # A phrase word is a letter followed by lowercase letters
+        if len(run) > 1 and run.isalpha() and run[1:].islower() and (ascii_text or run.isascii()):
+            if phrase_start is not None and separator == ' ':
+                phrases.append(f"{phrase_start} {run}".lower())
+                phrase_start = None
+            else:
+                phrase_start = run
+        else:
+            phrase_start = None
+        
+        if ascii_text and len(run) > 3 and run.isalpha():
+            word = run.lower()
+            if word in TECH_TERMS:
+                tech_found.add(word)
+            elif word not in COMMON_STOPWORDS:
+                words.append(word)
+    
+    if not ascii_text:
+        # Lowercasing can split non-ASCII words, so words come from the lowercased text
+        for _, word in _WORD_RUN.findall(text.lower()):
+            if len(word) > 3 and word.isascii() and word.isalpha():
+                if word in TECH_TERMS:
+                    tech_found.add(word)
+                elif word not in COMMON_STOPWORDS:
+                    words.append(word)
+    
+    topics = list(set(words + phrases))
+    topics.extend(term for term in TECH_TERMS if term in tech_found)
+    return topics
+
+@functools.lru_cache(maxsize=None)
+def _tokenizer(encoding_name: str):
+    """The tiktoken encoding, or None to fall back to estimating"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # The encoding is downloaded on first use, which fails offline
+        print(f"Tokenizer {encoding_name} unavailable, estimating tokens instead: {e}")
+        return None
+
+class TopicSketch:
+    """Bounded topic counter keeping the most frequent topics (Space-Saving)
+
+    Tracks at most `capacity` topics. When full, a new topic replaces the
+    least frequent one and inherits its count, so a topic's count can be
+    overestimated by at most the count it inherited. Counts are exact while
+    there are no more distinct topics than `capacity`.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+
+    def add(self, topic: str):
+        if topic in self._counts:
+            self._counts[topic] += 1
+            return
+        inherited = 0
+        if len(self._counts) >= self.capacity:
+            evicted = min(self._counts, key=self._counts.get)
+            inherited = self._counts.pop(evicted)
+            del self._errors[evicted]
+        self._counts[topic] = inherited + 1
+        self._errors[topic] = inherited
+
+    def top(self, n: int = 5) -> List[tuple]:
+        """The n most frequent topics as (topic, count), most frequent first"""
+        return sorted(self._counts.items(), key=lambda x: x[1], reverse=True)[:n]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+class ConversationContext:
+    """Incremental context state of one conversation
+
+    Conversation histories only grow by appending, so everything derived
+    from a message (token estimate, topics, its line in the summary) is
+    computed once when the message is first seen. Messages evicted from the
+    context window are folded into a running summary, and the rendered
+    summary is reused until more messages are evicted.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages_seen = 0
+        self.last_message = None
+        self.system_index: Optional[int] = None
+        self.tokens: List[int] = []
+        self.total_tokens = 0
+        self.topics: List[Optional[List[str]]] = []
+
+        # Index for the context summary: topics of all user messages,
+        # multimodal inputs and the first real system prompt
+        self.topic_sketch = TopicSketch()
+        self.multimodal_inputs = {name: 0 for name, _ in MULTIMODAL_MARKERS}
+        self.system_message: Optional[str] = None
+
+        # Running summary of the evicted messages
+        self.summarized_upto: Optional[int] = None
+        self.summary_topic_sketch = TopicSketch()
+        self.summary_text = ""
+        self.summary_has_lines = False
+        self.summary: Optional[str] = None
+        self.summary_tokens = 0
+
+        # Tokens of the most recently managed context window
+        self.window_tokens = 0
+
+    def is_prefix_of(self, messages: List[Dict[str, Any]]) -> bool:
+        """Whether the messages seen so far are still the start of `messages`
+
+        A reset or reloaded history replaces the list, which invalidates the state.
+        """
+        if self.messages_seen == 0:
+            return True
+        return (len(messages) >= self.messages_seen
+                and messages[self.messages_seen - 1] is self.last_message)
+
 class ContextManager:
     """Manages conversation context for the chatbot"""
     
-    def __init__(self, max_messages=20, max_tokens=4000):
+    def __init__(self, max_messages=20, max_tokens=4000, encoding_name=None):
         """Initialize the context manager
         
         Args:
             max_messages: Maximum number of messages to keep in context
-            max_tokens: Approximate maximum number of tokens to keep in context
+            max_tokens: Maximum number of tokens sent to the model as context
+            encoding_name: tiktoken encoding used to count tokens (CONTEXT_TOKENIZER,
+                default cl100k_base); without tiktoken, ~4 characters per token
         """
         self.max_messages = max_messages
         self.max_tokens = max_tokens
+        self.encoding_name = encoding_name or os.environ.get("CONTEXT_TOKENIZER", "cl100k_base")
+        self._states: Dict[str, ConversationContext] = {}
+        self._lock = threading.Lock()
+        
+        # Tokens sent per managed context
+        self.windows_managed = 0
+        self.tokens_sent = 0
+        self.max_tokens_sent = 0
+        self.messages_dropped_for_budget = 0
+        self.messages_truncated = 0
+    
+    @classmethod
+    def from_environment(cls, max_messages=20) -> "ContextManager":
+        """Build a context manager with CONTEXT_MAX_TOKENS as its token budget"""
+        return cls(max_messages=max_messages, max_tokens=int(os.environ.get("CONTEXT_MAX_TOKENS", 4000)))
+    
+    def token_budget(self, model: str, completion_tokens: int = 0) -> int:
+        """Context tokens that can be sent to a model
+        
+        Args:
+            model: Chat model name, e.g. 'llama3-8b-8192'
+            completion_tokens: Tokens reserved for the model's reply
+            
+        Returns:
+            max_tokens, lowered if the model's context window is smaller
+        """
+        window = MODEL_CONTEXT_WINDOWS.get(model)
+        if window is None:
+            return self.max_tokens
+        return max(0, min(self.max_tokens, window - completion_tokens))
+    
+    def conversation_state(self, conversation_id: str, messages: List[Dict[str, Any]]) -> ConversationContext:
+        """Bring a conversation's cached state up to date with its messages
+        
+        Only messages appended since the last call are processed.
+        
+        Args:
+            conversation_id: Key of the conversation, e.g. the user ID
+            messages: The conversation's full message list
+            
+        Returns:
+            The conversation's ConversationContext
+        """
+        with self._lock:
+            state = self._states.get(conversation_id)
+            if state is None or not state.is_prefix_of(messages):
+                state = self._states[conversation_id] = ConversationContext()
+        
+        with state.lock:
+            self._sync(state, messages)
+        return state
+    
+    def _sync(self, state: ConversationContext, messages: List[Dict[str, Any]]):
+        """Process the messages appended since the state was last synced"""
+        for index in range(state.messages_seen, len(messages)):
+            msg = messages[index]
+            tokens = self.estimate_tokens(msg['content']) + MESSAGE_TOKEN_OVERHEAD
+            state.tokens.append(tokens)
+            state.total_tokens += tokens
+            
+            topics = None
+            if msg['role'] == 'user':
+                topics = self.extract_key_topics(msg['content'])
+                for topic in topics:
+                    state.topic_sketch.add(topic)
+            state.topics.append(topics)
+            
+            if msg['role'] == 'system':
+                if state.system_index is None:
+                    state.system_index = index
+                if state.system_message is None and not msg['content'].startswith('['):
+                    state.system_message = msg['content']
+                for name, marker in MULTIMODAL_MARKERS:
+                    if marker in msg['content']:
+                        state.multimodal_inputs[name] += 1
+                        break
+        
+        if len(messages) > state.messages_seen:
+            state.messages_seen = len(messages)
+            state.last_message = messages[-1]
+    
+    def append_message(self, conversation_id: str, messages: List[Dict[str, Any]], message: Dict[str, Any]):
+        """Append a message to a conversation and index it right away
+        
+        Args:
+            conversation_id: Key of the conversation, e.g. the user ID
+            messages: The conversation's full message list, appended to in place
+            message: Message dictionary with 'role' and 'content' keys
+        """
+        state = self.conversation_state(conversation_id, messages)
+        with state.lock:
+            messages.append(message)
+            self._sync(state, messages)
+    
+    def context_summary(self, conversation_id: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Summary of a conversation's context from its index
+        
+        Messages added through append_message() are already indexed, so this
+        does not depend on the length of the conversation.
+        
+        Returns:
+            Message count, token estimate, truncation flag, top topics,
+            system prompt and multimodal input counts
+        """
+        state = self.conversation_state(conversation_id, messages)
+        with state.lock:
+            return {
+                'message_count': state.messages_seen,
+                'token_estimate': state.total_tokens,
+                'is_truncated': state.messages_seen > self.max_messages or state.summarized_upto is not None,
+                'top_topics': [topic for topic, _ in state.topic_sketch.top(5)],
+                'system_message': state.system_message,
+                'multimodal_inputs': dict(state.multimodal_inputs)
+            }
     
-    def manage_context(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def forget(self, conversation_id: str):
+        """Drop the cached state of a conversation"""
+        with self._lock:
+            self._states.pop(conversation_id, None)
+    
+    def manage_context(self, messages: List[Dict[str, Any]], conversation_id: Optional[str] = None,
+                       max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
         """Manage the conversation context to prevent it from growing too large
         
+        Keeps the system message and the most recent messages that fit both
+        max_messages and the token budget; older messages are replaced by a
+        summary. If the newest message alone exceeds the budget, it is cut.
+        
         Args:
             messages: List of message dictionaries with 'role' and 'content' keys
+            conversation_id: Key for cached per-conversation state; when given,
+                only messages added since the previous call are processed
+            max_tokens: Token budget for this call (defaults to self.max_tokens)
             
         Returns:
             Managed list of messages
         """
-        # If we're under the max messages, return as is
-        if len(messages) <= self.max_messages:
-            return messages
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        if conversation_id is None:
+            state = ConversationContext()
+            self._sync(state, messages)
+            return self._manage_incremental(state, messages, budget)
         
-        # Extract system message if present
-        system_message = None
-        for msg in messages:
-            if msg['role'] == 'system':
-                system_message = msg
-                break
+        state = self.conversation_state(conversation_id, messages)
+        with state.lock:
+            return self._manage_incremental(state, messages, budget)
+    
+    def _manage_incremental(self, state: ConversationContext, messages: List[Dict[str, Any]],
+                            budget: int) -> List[Dict[str, Any]]:
+        """manage_context() using a conversation's cached state
+        
+        Token counts come from the state, and only messages evicted since the
+        previous call are added to the running summary, so the cost depends on
+        the window size rather than the length of the history.
+        """
+        # Messages appended by another request since the sync are left for the next call
+        count = state.messages_seen
+        if count == 0:
+            return []
         
-        # Start with system message if it exists
         result = []
-        if system_message:
-            result.append(system_message)
-        
-        # Calculate how many recent messages we can include
-        # We always want to include the most recent exchanges
-        recent_count = min(self.max_messages - len(result), len(messages))
-        recent_messages = messages[-recent_count:]
-        
-        # If we have older messages that will be excluded, create a summary
-        older_messages = []
-        if len(messages) > recent_count + len(result):
-            # Determine where to start (after system message if present)
-            start_idx = 1 if system_message else 0
-            older_messages = messages[start_idx:-recent_count]
-            
-            if older_messages:
-                summary = self.summarize_conversation(older_messages)
+        system_tokens = 0
+        if state.system_index is not None:
+            result.append(messages[state.system_index])
+            system_tokens = state.tokens[state.system_index]
+        start_idx = 1 if state.system_index is not None else 0
+        
+        # Oldest message the count limit allows; evicted messages stay evicted
+        keep_from = max(start_idx, count - (self.max_messages - len(result)), state.summarized_upto or start_idx)
+        available = budget - system_tokens
+        if keep_from > start_idx:
+            available -= SUMMARY_TOKEN_RESERVE
+        
+        # Add messages newest first while they fit the budget
+        window_start, used = self._fit(state, keep_from, count, available)
+        if window_start > start_idx and keep_from == start_idx:
+            # Evicting for the budget means a summary has to fit too
+            available -= SUMMARY_TOKEN_RESERVE
+            window_start, used = self._fit(state, keep_from, count, available)
+        
+        newest = messages[count - 1]
+        truncated = None
+        if window_start == count:
+            # Even the newest message alone is over budget
+            truncated = dict(newest, content=self.truncate_to_tokens(
+                newest['content'], max(0, available - MESSAGE_TOKEN_OVERHEAD)))
+            used = self.estimate_tokens(truncated['content']) + MESSAGE_TOKEN_OVERHEAD
+            window_start = count - 1
+        dropped_for_budget = window_start - keep_from
+        
+        if window_start == start_idx and truncated is None and state.system_index in (None, 0):
+            # Nothing evicted or cut: the history is sent as is
+            result = messages[:count]
+        else:
+            if window_start > start_idx:
+                if state.summarized_upto is None:
+                    state.summarized_upto = start_idx
+                if window_start > state.summarized_upto or state.summary is None:
+                    for index in range(state.summarized_upto, window_start):
+                        self._fold_into_summary(state, messages[index], state.topics[index])
+                    state.summarized_upto = window_start
+                    state.summary = f"Previous conversation summary: {self._render_summary(state)}"
+                    state.summary_tokens = self.estimate_tokens(state.summary) + MESSAGE_TOKEN_OVERHEAD
                 result.append({
                     "role": "system",
-                    "content": f"Previous conversation summary: {summary}"
+                    "content": state.summary
                 })
+                used += state.summary_tokens
+            if truncated is not None:
+                result.extend(messages[window_start:count - 1])
+                result.append(truncated)
+            else:
+                result.extend(messages[window_start:count])
         
-        # Add the recent messages
-        result.extend(recent_messages)
+        state.window_tokens = system_tokens + used
+        self._record_window(state.window_tokens, dropped_for_budget, truncated is not None)
         return result
     
+    @staticmethod
+    def _fit(state: ConversationContext, first: int, end: int, available: int):
+        """Start of the longest suffix of messages[first:end] within `available` tokens
+        
+        Returns:
+            (start index, tokens used)
+        """
+        used = 0
+        start = end
+        while start > first and used + state.tokens[start - 1] <= available:
+            start -= 1
+            used += state.tokens[start]
+        return start, used
+    
+    def _record_window(self, tokens: int, dropped_for_budget: int, truncated: bool):
+        with self._lock:
+            self.windows_managed += 1
+            self.tokens_sent += tokens
+            self.max_tokens_sent = max(self.max_tokens_sent, tokens)
+            self.messages_dropped_for_budget += dropped_for_budget
+            self.messages_truncated += truncated
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Tokens sent to the model per managed context"""
+        with self._lock:
+            return {
+                'tokenizer': self.encoding_name if _tokenizer(self.encoding_name) else 'estimate',
+                'max_tokens': self.max_tokens,
+                'windows_managed': self.windows_managed,
+                'tokens_sent': self.tokens_sent,
+                'mean_tokens_sent': round(self.tokens_sent / self.windows_managed, 1) if self.windows_managed else 0.0,
+                'max_tokens_sent': self.max_tokens_sent,
+                'messages_dropped_for_budget': self.messages_dropped_for_budget,
+                'messages_truncated': self.messages_truncated,
+            }
+    
+    def _fold_into_summary(self, state: ConversationContext, msg: Dict[str, Any],
+                           topics: Optional[List[str]], max_summary_length=300):
+        """Add one evicted message to a running summary"""
+        for topic in topics or ():
+            state.summary_topic_sketch.add(topic)
+        
+        # Past the summary length only the topics can still change
+        if msg['role'] == 'system' or len(state.summary_text) > max_summary_length:
+            return
+        msg_content = msg['content']
+        if len(msg_content) > 100:
+            msg_content = msg_content[:97] + '...'
+        line = f"{msg['role']}: {msg_content}"
+        state.summary_text = f"{state.summary_text}\n{line}" if state.summary_has_lines else line
+        state.summary_has_lines = True
+    
+    def _render_summary(self, state: ConversationContext, max_summary_length=300) -> str:
+        """summarize_conversation() output from a running summary"""
+        main_topics = state.summary_topic_sketch.top(5)
+        main_topics_str = ", ".join([topic for topic, _ in main_topics]) if main_topics else "general topics"
+        summary_intro = f"Previous conversation about {main_topics_str}. "
+        
+        message_summary = state.summary_text
+        if len(summary_intro) + len(message_summary) > max_summary_length:
+            available_length = max_summary_length - len(summary_intro) - 3  # Account for "..."
+            message_summary = message_summary[:available_length] + "..."
+        
+        return summary_intro + message_summary
+    
     def summarize_conversation(self, messages: List[Dict[str, Any]], max_summary_length=300) -> str:
         """Create a summary of conversation messages
         
@@ -124,64 +556,40 @@ class ContextManager:
         Returns:
             List of potential topic keywords
         """
-        # Define technical domain stopwords to prevent defaulting to these topics
-        tech_stopwords = {
-            'computer', 'vision', 'machine', 'learning', 'neural', 'network',
-            'algorithm', 'model', 'training', 'dataset', 'feature', 'classification',
-            'detection', 'segmentation', 'recognition', 'opencv', 'tensorflow',
-            'pytorch', 'keras', 'deep', 'convolutional', 'recurrent', 'transformer'
-        }
-        
-        # Common English stopwords
-        common_stopwords = {
-            'about', 'above', 'after', 'again', 'against', 'all', 'and', 'any',
-            'are', 'because', 'been', 'before', 'being', 'below', 'between', 'both',
-            'but', 'by', 'could', 'did', 'does', 'doing', 'down', 'during', 'each',
-            'few', 'for', 'from', 'further', 'had', 'has', 'have', 'having', 'here',
-            'how', 'into', 'itself', 'just', 'more', 'most', 'other', 'our', 'out',
-            'over', 'own', 'same', 'should', 'some', 'such', 'than', 'that', 'the',
-            'their', 'them', 'then', 'there', 'these', 'they', 'this', 'those',
-            'through', 'under', 'until', 'very', 'was', 'were', 'what', 'when',
-            'where', 'which', 'while', 'who', 'whom', 'why', 'will', 'with', 'you'
-        }
-        
-        # Extract potential noun phrases and meaningful words
-        # Look for capitalized terms which are often proper nouns/topics
-        capitalized_terms = re.findall(r'\b[A-Z][a-z]{3,}\b', text)
-        
-        # Find all words with 4+ characters
-        all_words = re.findall(r'\b[A-Za-z]{4,}\b', text.lower())
-        
-        # Filter out stopwords and technical terms unless they appear in capitalized form
-        filtered_words = [w.lower() for w in all_words 
-                         if w.lower() not in common_stopwords 
-                         and (w.lower() not in tech_stopwords or w in capitalized_terms)]
-        
-        # Look for multi-word phrases that might be topics
-        phrases = re.findall(r'\b[A-Za-z][a-z]+ [A-Za-z][a-z]+\b', text)
-        
-        # Combine single words and phrases, remove duplicates
-        topics = list(set(filtered_words + [p.lower() for p in phrases]))
-        
-        # Only include technical terms if they're explicitly mentioned in the original text case
-        for term in tech_stopwords:
-            if term in text.lower() and re.search(r'\b' + re.escape(term) + r'\b', text.lower()):
-                topics.append(term)
-                
-        return topics
+        return extract_topics(text)
     
     def estimate_tokens(self, text: str) -> int:
-        """Estimate the number of tokens in a text
+        """Count the tokens in a text
+        
+        Uses the configured tiktoken encoding when available. Llama 3 uses a
+        tiktoken-style BPE, so cl100k_base counts stay within a few percent.
         
         Args:
-            text: Text to estimate tokens for
+            text: Text to count tokens for
             
         Returns:
-            Estimated token count
+            Token count
         """
+        tokenizer = _tokenizer(self.encoding_name)
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, disallowed_special=()))
         # Simple estimation: ~4 characters per token on average
         return len(text) // 4
     
+    def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """Cut a text to at most `max_tokens` tokens, marking the cut"""
+        marker = " [...truncated]"
+        tokenizer = _tokenizer(self.encoding_name)
+        if tokenizer is not None:
+            tokens = tokenizer.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            keep = max(0, max_tokens - len(tokenizer.encode(marker)))
+            return tokenizer.decode(tokens[:keep]) + marker
+        if len(text) // 4 <= max_tokens:
+            return text
+        return text[:max(0, 4 * max_tokens - len(marker))] + marker
+    
     def track_topic_shift(self, messages: List[Dict[str, Any]], new_message: str) -> bool:
         """Detect if there's a significant topic shift in the conversation
         
@@ -196,14 +604,9 @@ class ContextManager:
             return False
             
         # Check for explicit topic change indicators in the new message
-        topic_change_phrases = [
-            "let's talk about", "can we discuss", "tell me about", "what is", 
-            "explain", "instead", "change topic", "different topic", 
-            "another question", "new topic", "switching gears"
-        ]
-        
-        for phrase in topic_change_phrases:
-            if phrase in new_message.lower():
+        new_message_lower = new_message.lower()
+        for phrase in TOPIC_CHANGE_PHRASES:
+            if phrase in new_message_lower:
                 return True
         
         # Get topics from the last few messages (only user and assistant messages)
@@ -218,7 +621,7 @@ class ContextManager:
         new_topics = set(self.extract_key_topics(new_message))
         
         # If the new message is very short, it might be a follow-up question
-        if len(new_message.split()) < 6 and any(w in new_message.lower() for w in ["this", "it", "that", "these", "those"]):
+        if len(new_message.split()) < 6 and any(w in new_message_lower for w in ["this", "it", "that", "these", "those"]):
             return False  # Likely a follow-up question referring to previous context
         
         # If there's little overlap between topics, it might be a topic shift
@@ -0,0 +1,273 @@
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+import torch
+import openvino as ov
+from PIL import Image, ImageDraw, ImageFont
+import easyocr
+from easyocr.config import BASE_PATH
+from easyocr.imgproc import normalizeMeanVariance, resize_aspect_ratio
+from easyocr.utils import CTCLabelConverter
+
+try:
+    import nncf
+    NNCF_AVAILABLE = True
+except ImportError:
+    NNCF_AVAILABLE = False
+
+# EasyOCR's recognizer input height and default detector canvas size
+RECOGNIZER_HEIGHT = 64
+DETECTOR_CANVAS_SIZE = 2560
+
+CALIBRATION_WORDS = [
+    "gradient", "descent", "matrix", "vector", "equation", "photosynthesis",
+    "mitochondria", "theorem", "integral", "derivative", "algorithm", "Newton",
+    "Pythagoras", "velocity", "acceleration", "E=mc^2", "H2O", "x + y = 10",
+    "Chapter 3", "Homework #4", "Due: Friday", "42", "3.14159", "CoreMentis",
+]
+
+
+def easyocr_ir_paths(model_dir: str, languages: List[str], precision: str) -> Dict[str, str]:
+    """File paths of the detector and recognizer IR for a language set"""
+    return {
+        'detection': os.path.join(model_dir, f"easyocr_detection_{precision}.xml"),
+        'recognition': os.path.join(model_dir, f"easyocr_recognition_{'_'.join(languages)}_{precision}.xml"),
+    }
+
+
+class _RecognizerExport(torch.nn.Module):
+    """EasyOCR recognizers take an unused `text` argument; drop it for tracing"""
+
+    def __init__(self, recognizer):
+        super().__init__()
+        self.recognizer = recognizer
+
+    def forward(self, image):
+        return self.recognizer(image, None)
+
+
+class OpenVINODetector(torch.nn.Module):
+    """Stands in for the CRAFT module inside easyocr.Reader
+
+    easyocr.detection.test_net calls `y, feature = net(x)` and only uses `y`.
+    """
+
+    def __init__(self, compiled_model: ov.CompiledModel):
+        super().__init__()
+        self.compiled_model = compiled_model
+
+    def forward(self, x):
+        # A request per call keeps concurrent readtext() calls independent
+        request = self.compiled_model.create_infer_request()
+        request.infer([x.cpu().float().numpy()])
+        return torch.from_numpy(np.copy(request.get_output_tensor(0).data)), None
+
+
+class OpenVINORecognizer(torch.nn.Module):
+    """Stands in for the CRNN module inside easyocr.Reader
+
+    easyocr.recognition.recognizer_predict calls `model.eval()` and then
+    `preds = model(image, text_for_pred)`.
+    """
+
+    def __init__(self, compiled_model: ov.CompiledModel):
+        super().__init__()
+        self.compiled_model = compiled_model
+
+    def forward(self, image, text=None):
+        request = self.compiled_model.create_infer_request()
+        request.infer([image.cpu().float().numpy()])
+        return torch.from_numpy(np.copy(request.get_output_tensor(0).data))
+
+
+def _load_font(size: int):
+    for name in ("DejaVuSans.ttf", "Arial.ttf", "arial.ttf", "LiberationSans-Regular.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def generate_text_images(num_images: int = 16, seed: int = 0,
+                         size=(960, 720)) -> List[np.ndarray]:
+    """Render synthetic whiteboard/screenshot-like RGB images containing known text
+
+    Returns:
+        List of HxWx3 uint8 arrays with lines drawn from CALIBRATION_WORDS
+    """
+    rng = random.Random(seed)
+    images = []
+    for _ in range(num_images):
+        background = tuple(rng.randint(200, 255) for _ in range(3))
+        image = Image.new("RGB", size, background)
+        draw = ImageDraw.Draw(image)
+
+        y = rng.randint(10, 60)
+        while y < size[1] - 60:
+            font = _load_font(rng.randint(22, 48))
+            line = " ".join(rng.sample(CALIBRATION_WORDS, rng.randint(1, 4)))
+            color = tuple(rng.randint(0, 80) for _ in range(3))
+            draw.text((rng.randint(10, 120), y), line, fill=color, font=font)
+            y += rng.randint(60, 110)
+
+        images.append(np.array(image))
+    return images
+
+
+def generate_word_crops(num_crops: int = 64, seed: int = 0) -> List[np.ndarray]:
+    """Render single-word grayscale crops shaped like the recognizer's input batches"""
+    rng = random.Random(seed)
+    crops = []
+    for _ in range(num_crops):
+        font = _load_font(rng.randint(28, 56))
+        word = rng.choice(CALIBRATION_WORDS)
+        left, top, right, bottom = font.getbbox(word)
+        image = Image.new("L", (right - left + 16, bottom - top + 12), rng.randint(200, 255))
+        ImageDraw.Draw(image).text((8 - left, 6 - top), word, fill=rng.randint(0, 80), font=font)
+        crops.append(np.array(image))
+    return crops
+
+
+def _detector_input(image: np.ndarray) -> np.ndarray:
+    """Preprocess an RGB image exactly as easyocr.detection.test_net does"""
+    resized, _, _ = resize_aspect_ratio(image, DETECTOR_CANVAS_SIZE, interpolation=cv2.INTER_LINEAR, mag_ratio=1.0)
+    return np.transpose(normalizeMeanVariance(resized), (2, 0, 1))[np.newaxis].astype(np.float32)
+
+
+def _recognizer_input(crop: np.ndarray) -> np.ndarray:
+    """Resize to the recognizer height and normalize to [-1, 1] like AlignCollate"""
+    h, w = crop.shape[:2]
+    width = max(RECOGNIZER_HEIGHT, int(np.ceil(RECOGNIZER_HEIGHT * w / h)))
+    resized = cv2.resize(crop, (width, RECOGNIZER_HEIGHT), interpolation=cv2.INTER_CUBIC)
+    normalized = (resized.astype(np.float32) / 255.0 - 0.5) / 0.5
+    return normalized[np.newaxis, np.newaxis]
+
+
+def export_easyocr_to_openvino(reader, model_dir: str, languages: List[str], precision: str = "INT8") -> Dict[str, str]:
+    """Convert the CRAFT detector and CRNN recognizer of a Reader to OpenVINO IR
+
+    The reader must have been created with quantize=False: EasyOCR's own
+    dynamic torch quantization produces modules that cannot be traced.
+
+    Args:
+        reader: easyocr.Reader created on CPU with quantize=False
+        model_dir: Directory to write IR files to
+        languages: Reader language list, used in the recognizer file name
+        precision: 'FP32', 'FP16' or 'INT8'
+
+    Returns:
+        Mapping of 'detection'/'recognition' to the written IR .xml paths
+    """
+    precision = precision.upper()
+    if precision == "INT8" and not NNCF_AVAILABLE:
+        print("NNCF is not installed; exporting FP16 IR instead of INT8.")
+        precision = "FP16"
+    paths = easyocr_ir_paths(model_dir, languages, precision)
+    os.makedirs(model_dir, exist_ok=True)
+
+    print(f"Converting EasyOCR models to OpenVINO IR ({precision})...")
+    start_time = time.time()
+    detector = reader.detector.eval()
+    recognizer = _RecognizerExport(reader.recognizer.eval()).eval()
+    with torch.no_grad():
+        detection_ir = ov.convert_model(detector, example_input=torch.zeros(1, 3, 640, 640))
+        recognition_ir = ov.convert_model(recognizer, example_input=torch.zeros(1, 1, RECOGNIZER_HEIGHT, 256))
+    print(f"Conversion finished in {time.time() - start_time:.2f} seconds")
+
+    if precision == "INT8":
+        print("Quantizing EasyOCR detector and recognizer to INT8...")
+        start_time = time.time()
+        detection_samples = [_detector_input(img) for img in generate_text_images(num_images=12)]
+        recognition_samples = [_recognizer_input(crop) for crop in generate_word_crops(num_crops=96)]
+        detection_ir = nncf.quantize(
+            detection_ir, nncf.Dataset(detection_samples), subset_size=len(detection_samples)
+        )
+        recognition_ir = nncf.quantize(
+            recognition_ir, nncf.Dataset(recognition_samples), subset_size=len(recognition_samples)
+        )
+        print(f"Quantization finished in {time.time() - start_time:.2f} seconds")
+
+    compress = precision != "FP32"
+    ov.save_model(detection_ir, paths['detection'], compress_to_fp16=compress)
+    ov.save_model(recognition_ir, paths['recognition'], compress_to_fp16=compress)
+    print(f"Saved EasyOCR IR to {paths['detection']} and {paths['recognition']}")
+    return paths
+
+
+def weightless_reader(languages: List[str]):
+    """An easyocr.Reader without its PyTorch detector and recognizer
+
+    For readers whose models come from cached IR: only the character set
+    and CTC label converter are set up, which is all readtext() needs
+    besides the two networks `load_openvino_easyocr` swaps in.
+    """
+    reader = easyocr.Reader(languages, gpu=False, detector=False, recognizer=False, verbose=False)
+    dict_list = {lang: os.path.join(BASE_PATH, 'dict', f"{lang}.txt") for lang in languages}
+    reader.converter = CTCLabelConverter(reader.character, {}, dict_list)
+    return reader
+
+
+def load_openvino_easyocr(core: ov.Core, reader, paths: Dict[str, str], precision: str, device: str = "CPU",
+                          config: Optional[Dict[str, Any]] = None):
+    """Swap a Reader's PyTorch detector/recognizer for compiled OpenVINO models
+
+    The Reader keeps its own pre/post-processing, so readtext() returns the
+    same [(box, text, confidence), ...] format as before. `config` holds
+    compile_model() properties, e.g. a deployment profile.
+    """
+    config = config or {}
+    # Compiling from the path lets OpenVINO import a cached blob without reading the IR
+    reader.detector = OpenVINODetector(core.compile_model(paths['detection'], device, config))
+    reader.recognizer = OpenVINORecognizer(core.compile_model(paths['recognition'], device, config))
+    reader.openvino_precision = precision
+    reader.openvino_config = dict(config)
+    return reader
+
+
+def compare_with_pytorch(ov_reader, torch_reader, images: Optional[List[np.ndarray]] = None) -> Dict[str, object]:
+    """Run readtext with both readers and report text parity
+
+    Returns:
+        Dict with per-image texts, exact-match rate and timings
+    """
+    images = images if images is not None else generate_text_images(num_images=6, seed=1234)
+    rows = []
+    torch_time = ov_time = 0.0
+    for image in images:
+        start = time.perf_counter()
+        reference = ' '.join(text for _, text, _ in torch_reader.readtext(image))
+        torch_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        candidate = ' '.join(text for _, text, _ in ov_reader.readtext(image))
+        ov_time += time.perf_counter() - start
+
+        rows.append({'pytorch': reference, 'openvino': candidate, 'match': reference == candidate})
+
+    return {
+        'precision': getattr(ov_reader, 'openvino_precision', None),
+        'images': rows,
+        'match_rate': sum(r['match'] for r in rows) / len(rows) if rows else 1.0,
+        'pytorch_seconds': round(torch_time, 3),
+        'openvino_seconds': round(ov_time, 3),
+    }
+
+
+if __name__ == "__main__":
+    # Parity check: python easyocr_openvino.py
+    from openvino_optimization import optimize_easyocr
+
+    ov_reader, _ = optimize_easyocr()
+    if not isinstance(ov_reader.detector, OpenVINODetector):
+        raise SystemExit("OpenVINO export failed; nothing to compare.")
+
+    report = compare_with_pytorch(ov_reader, easyocr.Reader(['en'], gpu=False))
+    for row in report['images']:
+        print(f"{'OK  ' if row['match'] else 'DIFF'} pytorch={row['pytorch']!r}\n     openvino={row['openvino']!r}")
+    print(f"Exact-match rate: {report['match_rate']:.0%} "
+          f"(PyTorch {report['pytorch_seconds']}s, OpenVINO {report['openvino_seconds']}s)")
@@ -0,0 +1,100 @@
+import codecs
+import html
+import re
+from typing import Dict, Iterable, Iterator, Tuple, Union
+
+# Where an element of interest may start
+_START = re.compile(r'<(?:!--|(script|style|a|img)\b)', re.I)
+
+# Complete elements, matched at a start position. Attribute values may
+# contain '>', and script/style bodies are raw text, as in an HTML parser.
+_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_RAW_TEXT = {
+    'script': re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.S | re.I),
+    'style': re.compile(r'<style\b[^>]*>(.*?)</style\s*>', re.S | re.I),
+}
+_TAG = re.compile(r'<(\w+)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+_ATTRIBUTE = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+))?')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_attributes(text: str) -> Dict[str, str]:
+    """Attributes of a start tag, names lowercased and values unescaped"""
+    attributes = {}
+    for name, value in _ATTRIBUTE.findall(text):
+        if value[:1] in ('"', "'"):
+            value = value[1:-1]
+        name = name.lower()
+        # The first occurrence wins, as in browsers
+        if name not in attributes:
+            attributes[name] = html.unescape(value)
+    return attributes
+
+
+def iter_elements(page: Union[bytes, str, Iterable[bytes]], tags=('a', 'img'),
+                  encoding: str = 'utf-8') -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Stream the start tags of interest out of an HTML page
+
+    Reads the page chunk by chunk and only keeps the unscanned remainder in
+    memory, so a consumer that stops early (e.g. after `limit` results) also
+    stops downloading. Comments are skipped and script/style bodies are not
+    searched for tags.
+
+    Args:
+        page: The whole page, or an iterable of byte chunks (e.g. iter_content)
+        tags: Tag names to yield; include 'script' to get script bodies
+        encoding: Encoding of byte input
+
+    Yields:
+        (tag, attributes) tuples; for scripts, attributes holds {'text': body}
+    """
+    if isinstance(page, (bytes, str)):
+        page = [page]
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    wanted = {tag.lower() for tag in tags}
+
+    buffer = ''
+    pos = 0
+    chunks = iter(page)
+    eof = False
+    while True:
+        start = _START.search(buffer, pos)
+        if start is None:
+            # Keep a possible partial "<scr" at the end for the next chunk
+            pos = max(pos, len(buffer) - 8)
+        else:
+            element = start.group(1)
+            element = element.lower() if element else None
+            if element is None:
+                match = _COMMENT.match(buffer, start.start())
+            elif element in _RAW_TEXT:
+                match = _RAW_TEXT[element].match(buffer, start.start())
+            else:
+                match = _TAG.match(buffer, start.start())
+
+            if match is not None:
+                pos = match.end()
+                if element in wanted:
+                    if element in _RAW_TEXT:
+                        yield element, {'text': match.group(1)}
+                    else:
+                        yield element, parse_attributes(match.group(2))
+                continue
+            if eof:
+                # Malformed or truncated: move past this '<'
+                pos = start.start() + 1
+                continue
+            pos = start.start()
+
+        if eof:
+            return
+        # Drop what has been scanned, then read more
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer += decoder.decode(b'', final=True)
+        else:
+            buffer += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
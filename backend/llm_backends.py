@@ -0,0 +1,394 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuses that say nothing about the backend's health (bad request, auth...)
+_CLIENT_ERRORS = range(400, 500)
+_RETRYABLE_CLIENT_ERRORS = {408, 409, 429}
+
+# Weight of the newest sample in the latency averages
+EWMA_ALPHA = 0.2
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when no backend could complete a request"""
+
+
+class LLMResult(NamedTuple):
+    content: str
+    backend: str
+    model: str
+    seconds: float
+    first_token_seconds: float
+    # Backends started for this request, including hedges and retries
+    attempts: int
+    hedged: bool
+
+
+class CircuitBreaker:
+    """Stops sending requests to a backend after consecutive failures
+
+    After `failure_threshold` failures in a row the circuit opens and the
+    backend is skipped. Once `reset_timeout` seconds have passed, one trial
+    request is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def trial_due(self) -> bool:
+        """Whether the next allowed request would be the half-open trial"""
+        with self._lock:
+            if self.state == 'open':
+                return time.monotonic() - self.opened_at >= self.reset_timeout
+            return self.state == 'half_open' and not self._trial_running
+
+    def allow(self) -> bool:
+        """Whether a request may go to the backend now (claims the trial when half-open)"""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_running = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_running = False
+
+    def release(self):
+        """End a request that says nothing about health (e.g. a rejected prompt)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class LLMBackend:
+    """One OpenAI-compatible chat completion endpoint (Groq, vLLM, a mock server...)"""
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: Optional[str] = None,
+                 timeout: float = 30.0, connect_timeout: float = 5.0,
+                 breaker: Optional[CircuitBreaker] = None, pool_size: int = 32):
+        """Initialize the backend
+
+        Args:
+            name: Name used in stats and logs
+            base_url: API root, e.g. https://api.groq.com/openai/v1
+            model: Model requested from this endpoint
+            api_key: Bearer token, if the endpoint needs one
+            timeout: Seconds to wait for each streamed chunk
+            connect_timeout: Seconds to wait for a connection
+            breaker: Circuit breaker; a default one when omitted
+            pool_size: Connections kept open to the endpoint
+        """
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = (connect_timeout, timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        self.session.mount(self.base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.hedges_won = 0
+        self.latency_ewma: Optional[float] = None
+        self.first_token_ewma: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def stream_completion(self, messages: List[Dict[str, Any]], **params) -> Iterator[str]:
+        """Content deltas of a streamed chat completion
+
+        Raises:
+            requests.RequestException: On connection errors, timeouts and error statuses
+        """
+        payload = dict(params, model=self.model, messages=messages, stream=True)
+        with self.session.post(f"{self.base_url}/chat/completions", json=payload,
+                               timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    return
+                choices = json.loads(data).get('choices') or [{}]
+                content = (choices[0].get('delta') or {}).get('content')
+                if content:
+                    yield content
+
+    def record_success(self, seconds: float, first_token_seconds: float):
+        self.breaker.record_success()
+        with self._lock:
+            self.successes += 1
+            self.latency_ewma = _ewma(self.latency_ewma, seconds)
+            self.first_token_ewma = _ewma(self.first_token_ewma, first_token_seconds)
+
+    def record_first_token(self, first_token_seconds: float):
+        """A response that started in time but lost a hedge still shows the backend is healthy"""
+        self.breaker.record_success()
+        with self._lock:
+            self.first_token_ewma = _ewma(self.first_token_ewma, first_token_seconds)
+
+    def record_failure(self, error: Exception):
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if status not in _CLIENT_ERRORS or status in _RETRYABLE_CLIENT_ERRORS:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'model': self.model,
+                'circuit': self.breaker.state,
+                'circuit_opened': self.breaker.times_opened,
+                'requests': self.requests,
+                'successes': self.successes,
+                'failures': self.failures,
+                'hedges_won': self.hedges_won,
+                'latency_ms': round(1000 * self.latency_ewma, 1) if self.latency_ewma is not None else None,
+                'first_token_ms': round(1000 * self.first_token_ewma, 1) if self.first_token_ewma is not None else None,
+                'last_error': self.last_error,
+            }
+
+
+def _ewma(average: Optional[float], sample: float) -> float:
+    return sample if average is None else (1 - EWMA_ALPHA) * average + EWMA_ALPHA * sample
+
+
+class _Race:
+    """Shared state of the attempts for one request: the first to stream a token wins"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.winner: Optional[LLMBackend] = None
+        self.finished = False
+
+
+class LLMRouter:
+    """Sends chat completions to the healthiest of several backends
+
+    Backends with a closed circuit are tried fastest first (average time to
+    first token); one whose circuit is half-open gets its single trial
+    request first, with the others as hedges. If the chosen backend has not
+    streamed a token within `hedge_after` seconds, the request is also sent
+    to the next backend, and whichever streams first is used while the other
+    is closed. Failures move on to the next backend right away.
+    """
+
+    def __init__(self, backends: List[LLMBackend], hedge_after: Optional[float] = 2.0,
+                 max_workers: int = 64):
+        """Initialize the router
+
+        Args:
+            backends: Backends in order of preference
+            hedge_after: Seconds without a first token before hedging; None disables hedging
+            max_workers: Backend requests in flight at most, hedges included
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.hedge_after = hedge_after
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.retried = 0
+        self.unavailable = 0
+
+    @classmethod
+    def from_environment(cls, default_backends: List[LLMBackend]) -> "LLMRouter":
+        """Build a router from LLM_BACKENDS, LLM_HEDGE_AFTER_MS and LLM_BREAKER_*
+
+        LLM_BACKENDS is a JSON list of {"name", "base_url", "model"} objects,
+        optionally with "api_key" or "api_key_env" and "timeout". Without it
+        the given default backends are used.
+        """
+        failures = int(os.environ.get("LLM_BREAKER_FAILURES", 3))
+        reset = float(os.environ.get("LLM_BREAKER_RESET_SECONDS", 30))
+        configured = os.environ.get("LLM_BACKENDS")
+        if configured:
+            backends = [
+                LLMBackend(
+                    spec['name'], spec['base_url'], spec['model'],
+                    api_key=spec.get('api_key') or os.environ.get(spec.get('api_key_env', ''), None),
+                    timeout=float(spec.get('timeout', 30)),
+                    breaker=CircuitBreaker(failures, reset),
+                )
+                for spec in json.loads(configured)
+            ]
+        else:
+            backends = default_backends
+            for backend in backends:
+                backend.breaker = CircuitBreaker(failures, reset)
+        hedge_ms = float(os.environ.get("LLM_HEDGE_AFTER_MS", 2000))
+        return cls(backends, hedge_after=hedge_ms / 1000 if hedge_ms > 0 else None)
+
+    @property
+    def model(self) -> str:
+        """Model of the preferred backend"""
+        return self.backends[0].model
+
+    def complete(self, messages: List[Dict[str, Any]], **params) -> LLMResult:
+        """Run a chat completion on the best available backend
+
+        Args:
+            messages: Chat messages as sent to the API
+            **params: Completion parameters such as temperature and max_tokens
+
+        Raises:
+            LLMUnavailableError: If every backend failed or has an open circuit
+        """
+        with self._lock:
+            self.requests += 1
+        started = time.perf_counter()
+        race = _Race()
+        candidates = self._ranked()
+        running = {}
+        errors = []
+        attempts = 0
+        hedge_at = None
+
+        def launch():
+            nonlocal attempts, hedge_at
+            while candidates:
+                backend = candidates.pop(0)
+                if backend.breaker.allow():
+                    attempts += 1
+                    with backend._lock:
+                        backend.requests += 1
+                    running[self._pool.submit(self._attempt, backend, messages, params, race)] = backend
+                    hedge_at = time.perf_counter() + self.hedge_after if self.hedge_after is not None else None
+                    return True
+            return False
+
+        try:
+            launch()
+            first_backend = next(iter(running.values()), None)
+            while running:
+                timeout = None
+                if hedge_at is not None and candidates and race.winner is None:
+                    timeout = max(0.0, hedge_at - time.perf_counter())
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # No first token in time: race the next backend
+                    if launch():
+                        with self._lock:
+                            self.hedged += 1
+                    continue
+
+                failed = False
+                for future in done:
+                    backend = running.pop(future)
+                    outcome = future.result()
+                    if isinstance(outcome, LLMResult):
+                        if backend is not first_backend:
+                            with backend._lock:
+                                backend.hedges_won += 1
+                        return outcome._replace(seconds=time.perf_counter() - started,
+                                                attempts=attempts, hedged=attempts > 1)
+                    if isinstance(outcome, Exception):
+                        failed = True
+                        errors.append(f"{backend.name}: {outcome}")
+                        with race.lock:
+                            if race.winner is backend:
+                                # Failed mid-stream; the others were closed, so start over
+                                race.winner = None
+                if failed and race.winner is None and launch():
+                    with self._lock:
+                        self.retried += 1
+        finally:
+            with race.lock:
+                race.finished = True
+
+        with self._lock:
+            self.unavailable += 1
+        if not errors:
+            raise LLMUnavailableError("No LLM backend available (all circuits open)")
+        raise LLMUnavailableError(f"All LLM backends failed: {'; '.join(errors)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'retried': self.retried,
+                'unavailable': self.unavailable,
+                'hedge_after_ms': round(1000 * self.hedge_after) if self.hedge_after is not None else None,
+            }
+        stats['backends'] = {backend.name: backend.get_stats() for backend in self.backends}
+        return stats
+
+    def _ranked(self) -> List[LLMBackend]:
+        def rank(backend):
+            if backend.breaker.trial_due:
+                return (0, 0.0)
+            # Unmeasured backends count as fast so they get measured
+            return (1 if backend.breaker.state == 'closed' else 2, backend.first_token_ewma or 0.0)
+        # sorted() is stable, so ties keep the configured preference
+        return sorted(self.backends, key=rank)
+
+    def _attempt(self, backend: LLMBackend, messages, params, race: _Race):
+        """Stream one backend's completion; returns an LLMResult, an exception, or None if it lost"""
+        started = time.perf_counter()
+        tokens = None
+        try:
+            tokens = backend.stream_completion(messages, **params)
+            first = next(tokens, '')
+            first_token_seconds = time.perf_counter() - started
+            with race.lock:
+                lost = race.finished or race.winner is not None
+                if not lost:
+                    race.winner = backend
+            if lost:
+                backend.record_first_token(first_token_seconds)
+                return None
+            content = first + ''.join(tokens)
+            seconds = time.perf_counter() - started
+            backend.record_success(seconds, first_token_seconds)
+            return LLMResult(content, backend.name, backend.model, seconds, first_token_seconds, 1, False)
+        except Exception as e:
+            backend.record_failure(e)
+            return e
+        finally:
+            if tokens is not None:
+                # Closes the HTTP response of a losing or failed stream
+                tokens.close()
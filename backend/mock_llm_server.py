@@ -0,0 +1,217 @@
+"""Mock OpenAI-compatible chat completion server for offline load tests.
+
+Answers POST /v1/chat/completions (streamed or not) with filler tokens after
+a configurable time to first token and per-token delay, and can fail a
+share of requests with 503 to exercise retries and circuit breakers.
+
+    python mock_llm_server.py --port 8090 --first-token-ms 300 --token-ms 15 --tokens 120
+
+Point the API at it with
+LLM_BACKENDS='[{"name": "mock", "base_url": "http://127.0.0.1:8090/v1", "model": "mock-llm"}]'.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER_WORDS = (
+    "photosynthesis", "converts", "light", "energy", "into", "chemical", "energy", "stored",
+    "in", "glucose", "the", "process", "happens", "inside", "chloroplasts", "of", "plant", "cells",
+)
+
+
+class MockLLMServer:
+    """Local chat completion server with OpenAI-style JSON and SSE responses
+
+    Delays are jittered by up to +/- `jitter` (a fraction) so concurrent
+    load does not arrive in lockstep. Requests may lower the token count
+    with max_tokens.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, first_token_ms: float = 200.0,
+                 token_ms: float = 20.0, tokens: int = 100, jitter: float = 0.2,
+                 error_rate: float = 0.0, model: str = 'mock-llm', seed=None):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.tokens = tokens
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.model = model
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.streamed = 0
+        self.errors = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _delay(self, ms: float) -> float:
+        with self._lock:
+            factor = 1.0 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, ms * factor / 1000)
+
+    def _fails(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _completion_tokens(self, body) -> list:
+        count = min(self.tokens, int(body.get('max_tokens') or self.tokens))
+        return [FILLER_WORDS[i % len(FILLER_WORDS)] + ' ' for i in range(count)]
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so load tests do not measure connection setup
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path in ('/health', '/v1/health'):
+                    self._send_json(200, {'status': 'ok'})
+                elif self.path in ('/models', '/v1/models'):
+                    self._send_json(200, {'object': 'list', 'data': [{'id': mock.model, 'object': 'model'}]})
+                else:
+                    self._send_json(404, {'error': {'message': 'Not found'}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self._send_json(400, {'error': {'message': 'Invalid JSON'}})
+                    return
+                if self.path not in ('/chat/completions', '/v1/chat/completions'):
+                    self._send_json(404, {'error': {'message': 'Not found'}})
+                    return
+
+                with mock._lock:
+                    mock.requests += 1
+                if mock._fails():
+                    with mock._lock:
+                        mock.errors += 1
+                    time.sleep(mock._delay(mock.first_token_ms))
+                    self._send_json(503, {'error': {'message': 'Mock upstream overloaded'}})
+                    return
+
+                tokens = mock._completion_tokens(body)
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                time.sleep(mock._delay(mock.first_token_ms))
+                if body.get('stream'):
+                    with mock._lock:
+                        mock.streamed += 1
+                    self._stream(completion_id, tokens)
+                else:
+                    time.sleep(sum(mock._delay(mock.token_ms) for _ in tokens[1:]))
+                    self._send_json(200, {
+                        'id': completion_id,
+                        'object': 'chat.completion',
+                        'created': int(time.time()),
+                        'model': mock.model,
+                        'choices': [{'index': 0, 'finish_reason': 'stop',
+                                     'message': {'role': 'assistant', 'content': ''.join(tokens)}}],
+                        'usage': {'prompt_tokens': 0, 'completion_tokens': len(tokens),
+                                  'total_tokens': len(tokens)},
+                    })
+
+            def _stream(self, completion_id, tokens):
+                try:
+                    self._write_stream(completion_id, tokens)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client hung up, e.g. a hedged request whose other copy won
+                    self.close_connection = True
+
+            def _write_stream(self, completion_id, tokens):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for index, token in enumerate(tokens):
+                    if index:
+                        time.sleep(mock._delay(mock.token_ms))
+                    self._write_event({
+                        'id': completion_id,
+                        'object': 'chat.completion.chunk',
+                        'created': int(time.time()),
+                        'model': mock.model,
+                        'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}],
+                    })
+                self._write_event({
+                    'id': completion_id,
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': mock.model,
+                    'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+                })
+                self._write_chunk(b'data: [DONE]\n\n')
+                self._write_chunk(b'')
+
+            def _write_event(self, payload):
+                self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def get_stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'streamed': self.streamed, 'errors': self.errors}
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--first-token-ms', type=float, default=200.0, help='Delay before the first token')
+    parser.add_argument('--token-ms', type=float, default=20.0, help='Delay between tokens')
+    parser.add_argument('--tokens', type=int, default=100, help='Tokens per completion (capped by max_tokens)')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Random +/- fraction applied to each delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--model', default='mock-llm')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.first_token_ms, args.token_ms, args.tokens,
+                           args.jitter, args.error_rate, args.model, args.seed)
+    print(f"Mock LLM serving {args.model} at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import openvino as ov
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks so large checkpoints don't load into RAM"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """On-disk cache of converted/quantized OpenVINO IR
+
+    Entries live in `<root>/<name>/<source hash>_<precision>_<device>/` next to
+    a manifest recording the files and the OpenVINO version that produced
+    them. A changed checkpoint, precision, target device or OpenVINO release
+    therefore maps to a different (or invalid) entry and triggers a fresh
+    conversion instead of loading stale IR.
+
+    Compiled blobs are handled separately by OpenVINO itself through the
+    Core's CACHE_DIR property (see `compiled_cache_dir`).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.compiled_cache_dir = os.path.join(root, "compiled")
+        os.makedirs(self.compiled_cache_dir, exist_ok=True)
+        self._hash_index_path = os.path.join(root, "source_hashes.json")
+        self._lock = threading.Lock()
+
+    def source_hash(self, paths: Iterable[str]) -> str:
+        """Combined hash of model source files
+
+        Hashing a multi-hundred-MB checkpoint on every start would eat the
+        time we are trying to save, so digests are memoized by path, size and
+        modification time.
+        """
+        with self._lock:
+            index = self._read_json(self._hash_index_path) or {}
+            combined = hashlib.sha256()
+            changed = False
+            for path in sorted(paths):
+                stat = os.stat(path)
+                stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+                cached = index.get(path)
+                if cached is None or cached.get('stamp') != stamp:
+                    cached = {'stamp': stamp, 'sha256': file_sha256(path)}
+                    index[path] = cached
+                    changed = True
+                combined.update(cached['sha256'].encode())
+            if changed:
+                self._write_json(self._hash_index_path, index)
+        return combined.hexdigest()
+
+    def entry_dir(self, name: str, source_hash: str, precision: str, device: str) -> str:
+        return os.path.join(self.root, name, f"{source_hash[:16]}_{precision}_{device}")
+
+    def lookup(self, name: str, source_hash: str, precision: str, device: str) -> Optional[Dict[str, str]]:
+        """Return the cached file mapping for a key, or None on a miss"""
+        entry = self.entry_dir(name, source_hash, precision, device)
+        manifest = self._read_json(os.path.join(entry, MANIFEST_NAME))
+        if not manifest or manifest.get('openvino_version') != ov.get_version():
+            return None
+        files = {part: os.path.join(entry, filename) for part, filename in manifest['files'].items()}
+        for path in files.values():
+            if not os.path.exists(path) or not os.path.exists(path[:-len('.xml')] + '.bin'):
+                return None
+        return files
+
+    def metadata(self, name: str, source_hash: str, precision: str, device: str) -> Dict[str, Any]:
+        """Extra data stored with an entry, e.g. model dimensions; empty if there is none"""
+        entry = self.entry_dir(name, source_hash, precision, device)
+        manifest = self._read_json(os.path.join(entry, MANIFEST_NAME)) or {}
+        return manifest.get('metadata') or {}
+
+    def store(self, name: str, source_hash: str, precision: str, device: str, files: Dict[str, str],
+              metadata: Optional[Dict[str, Any]] = None):
+        """Record IR files written into `entry_dir(...)` as a valid cache entry
+
+        `metadata` holds whatever else is needed to run the IR without the
+        source checkpoint, e.g. Whisper's model dimensions.
+        """
+        entry = self.entry_dir(name, source_hash, precision, device)
+        manifest = {
+            'name': name,
+            'source_hash': source_hash,
+            'precision': precision,
+            'device': device,
+            'openvino_version': ov.get_version(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'files': {part: os.path.relpath(path, entry) for part, path in files.items()},
+            'metadata': metadata or {},
+        }
+        # The manifest is written last, so an interrupted conversion never
+        # leaves an entry that looks valid
+        self._write_json(os.path.join(entry, MANIFEST_NAME), manifest)
+
+    def invalidate(self, name: str):
+        shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    @staticmethod
+    def _read_json(path: str):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path: str, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
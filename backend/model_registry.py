@@ -0,0 +1,315 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Every capability a chatbot node can serve
+ALL_CAPABILITIES = ('chat', 'speech', 'ocr', 'tts', 'search')
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a model is not served by this node or failed to load"""
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class _ModelEntry:
+    def __init__(self, name: str, capability: str, loader: Callable[..., Any],
+                 warmup: Optional[Callable[[Any], None]], unloader: Optional[Callable[[Any], None]],
+                 weights_loader: Optional[Callable[[], Any]]):
+        self.name = name
+        self.capability = capability
+        self.loader = loader
+        self.warmup = warmup
+        self.unloader = unloader
+        self.weights_loader = weights_loader
+        self.lock = threading.Lock()
+        self.instance = None
+        self.weights = None
+        self.weights_bytes = 0
+        # Loaded ahead by load_weights() to be shared across fork()
+        self.weights_shared = False
+        self.error: Optional[str] = None
+        self.load_seconds = 0.0
+        self.resident_bytes = 0
+        self.loaded_at: Optional[float] = None
+        self.last_used: Optional[float] = None
+        self.active_users = 0
+        self.uses = 0
+        self.loads = 0
+
+
+class ModelRegistry:
+    """Loads models on first use and unloads them again when idle
+
+    Each model is registered with a loader callable and the capability it
+    provides. A node only serves the capabilities it was configured with, so
+    a text-only worker never imports Whisper, EasyOCR or the TTS engine.
+
+    Models may be split into two stages: a `weights_loader` producing plain
+    weights that are safe to share across fork(), and a `loader` that builds
+    the runtime (compiled models, worker threads) from them. A pre-fork
+    server loads the weights once in the parent; each worker builds its own
+    runtime on first use and the weights stay resident. Weights loaded on
+    first use instead (no pre-fork parent) are dropped as soon as the
+    runtime is built, so unloading an idle model frees all of its memory.
+    A weights_loader may return None when the runtime needs no weights of
+    its own, e.g. when it is built from memory-mapped OpenVINO IR.
+    """
+
+    def __init__(self, capabilities: Optional[Iterable[str]] = None, idle_timeout: float = 0):
+        """Initialize the registry
+
+        Args:
+            capabilities: Capabilities this node serves; all when None
+            idle_timeout: Seconds without use before a model is unloaded;
+                0 keeps models resident forever
+        """
+        self.capabilities = set(capabilities) if capabilities is not None else set(ALL_CAPABILITIES)
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._stop_event = threading.Event()
+        self._reaper = None
+        self._start_reaper()
+
+    @classmethod
+    def from_environment(cls) -> "ModelRegistry":
+        """Build a registry from COREMENTIS_CAPABILITIES and MODEL_IDLE_TIMEOUT"""
+        capabilities = os.environ.get("COREMENTIS_CAPABILITIES", "")
+        selected = [c.strip() for c in capabilities.split(",") if c.strip()] or None
+        unknown = set(selected or []) - set(ALL_CAPABILITIES)
+        if unknown:
+            print(f"Ignoring unknown capabilities: {', '.join(sorted(unknown))}")
+            selected = [c for c in selected if c in ALL_CAPABILITIES]
+        return cls(selected, idle_timeout=float(os.environ.get("MODEL_IDLE_TIMEOUT", 0)))
+
+    def register(self, name: str, capability: str, loader: Callable[..., Any],
+                 warmup: Optional[Callable[[Any], None]] = None,
+                 unloader: Optional[Callable[[Any], None]] = None,
+                 weights_loader: Optional[Callable[[], Any]] = None):
+        """Register a lazily loaded model
+
+        Args:
+            name: Model name used with get()/use()
+            capability: Capability the model provides, e.g. 'speech'
+            loader: Callable returning the loaded model; receives the result
+                of weights_loader when one is given
+            warmup: Optional callable run on the model right after loading
+            unloader: Optional callable releasing resources held by the model
+            weights_loader: Optional callable returning fork-safe weights
+        """
+        self._entries[name] = _ModelEntry(name, capability, loader, warmup, unloader, weights_loader)
+
+    def load_weights(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Load only the shareable weights stage of enabled models
+
+        Returns:
+            Mapping of model name to its loaded weights (None for models
+            whose runtime needs none)
+        """
+        loaded = {}
+        for name in (names if names is not None else list(self._entries)):
+            if not self.is_enabled(name):
+                continue
+            entry = self._entries[name]
+            if entry.weights_loader is None:
+                continue
+            with entry.lock:
+                self._load_weights(entry)
+                entry.weights_shared = True
+            loaded[name] = entry.weights
+        return loaded
+
+    def after_fork(self):
+        """Reset threading state in a freshly forked worker process
+
+        Locks may have been held by threads that do not exist in the child,
+        and the reaper thread did not survive the fork. Weights are kept;
+        they are what the fork is meant to share.
+        """
+        for entry in self._entries.values():
+            entry.lock = threading.Lock()
+            entry.active_users = 0
+        self._stop_event = threading.Event()
+        self._start_reaper()
+
+    def serves(self, capability: str) -> bool:
+        return capability in self.capabilities
+
+    def is_enabled(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and self.serves(entry.capability)
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.instance is not None
+
+    def peek(self, name: str):
+        """Return the model if it is already resident, without loading it"""
+        entry = self._entries.get(name)
+        return entry.instance if entry is not None else None
+
+    def get(self, name: str):
+        """Return the model, loading it on first use"""
+        entry = self._entry(name)
+        entry.last_used = time.time()
+        entry.uses += 1
+        if entry.instance is None:
+            self._load(entry)
+        return entry.instance
+
+    @contextmanager
+    def use(self, name: str):
+        """Context manager that keeps a model from being unloaded while in use"""
+        entry = self._entry(name)
+        with entry.lock:
+            entry.active_users += 1
+        try:
+            yield self.get(name)
+        finally:
+            with entry.lock:
+                entry.active_users -= 1
+                entry.last_used = time.time()
+
+    def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Load models ahead of the first request; all enabled ones when names is None"""
+        for name in (names if names is not None else list(self._entries)):
+            if not self.is_enabled(name):
+                continue
+            try:
+                self.get(name)
+            except ModelUnavailableError as e:
+                print(f"Warm-up of {name} failed: {e}")
+
+    def unload(self, name: str) -> bool:
+        """Drop a resident model; returns False if it is in use or not loaded"""
+        entry = self._entries.get(name)
+        if entry is None:
+            return False
+        with entry.lock:
+            if entry.instance is None or entry.active_users > 0:
+                return False
+            instance, entry.instance = entry.instance, None
+            entry.loaded_at = None
+        if entry.unloader is not None:
+            try:
+                entry.unloader(instance)
+            except Exception as e:
+                print(f"Error unloading {name}: {e}")
+        del instance
+        print(f"Unloaded idle model {name}")
+        return True
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load state, load time and resident memory"""
+        now = time.time()
+        return {
+            name: {
+                'capability': entry.capability,
+                'enabled': self.serves(entry.capability),
+                'loaded': entry.instance is not None,
+                'error': entry.error,
+                'load_seconds': round(entry.load_seconds, 3),
+                'resident_mb': round(entry.resident_bytes / 1024 ** 2, 1),
+                'weights_loaded': entry.weights is not None,
+                'weights_mb': round(entry.weights_bytes / 1024 ** 2, 1),
+                'idle_seconds': round(now - entry.last_used, 1) if entry.last_used else None,
+                'uses': entry.uses,
+                'loads': entry.loads,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _start_reaper(self):
+        if self.idle_timeout > 0:
+            self._reaper = threading.Thread(target=self._reap_idle_models, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def _entry(self, name: str) -> _ModelEntry:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise ModelUnavailableError(f"Unknown model: {name}")
+        if not self.serves(entry.capability):
+            raise ModelUnavailableError(f"This node does not serve the '{entry.capability}' capability")
+        return entry
+
+    def _load(self, entry: _ModelEntry):
+        with entry.lock:
+            if entry.instance is not None:
+                return
+            print(f"Loading model {entry.name} on first use...")
+            start_time = time.time()
+            rss_before = current_rss_bytes()
+            try:
+                if entry.weights_loader is not None:
+                    self._load_weights(entry)
+                if entry.weights_shared:
+                    # Shared weights are accounted separately in weights_bytes
+                    rss_before = current_rss_bytes()
+                if entry.weights_loader is not None:
+                    instance = entry.loader(entry.weights)
+                else:
+                    instance = entry.loader()
+                if instance is None:
+                    raise ModelUnavailableError(f"{entry.name} loader returned nothing")
+                if entry.warmup is not None:
+                    entry.warmup(instance)
+            except Exception as e:
+                entry.error = str(e)
+                raise ModelUnavailableError(f"Failed to load {entry.name}: {e}") from e
+            finally:
+                if not entry.weights_shared:
+                    # The runtime keeps what it still needs of the weights, e.g.
+                    # the PyTorch model itself when OpenVINO is unavailable
+                    entry.weights = None
+                    entry.weights_bytes = 0
+
+            entry.instance = instance
+            entry.error = None
+            entry.load_seconds = time.time() - start_time
+            entry.resident_bytes = max(0, current_rss_bytes() - rss_before)
+            entry.loaded_at = time.time()
+            entry.last_used = entry.loaded_at
+            entry.loads += 1
+            print(f"Model {entry.name} loaded in {entry.load_seconds:.2f} seconds "
+                  f"(+{entry.resident_bytes / 1024 ** 2:.1f} MB resident)")
+
+    def _load_weights(self, entry: _ModelEntry):
+        """Load an entry's weights stage; the caller holds entry.lock"""
+        if entry.weights is not None:
+            return
+        rss_before = current_rss_bytes()
+        try:
+            entry.weights = entry.weights_loader()
+        except Exception as e:
+            entry.error = str(e)
+            raise ModelUnavailableError(f"Failed to load {entry.name} weights: {e}") from e
+        entry.weights_bytes = max(0, current_rss_bytes() - rss_before)
+
+    def _reap_idle_models(self):
+        interval = max(1.0, min(60.0, self.idle_timeout / 4))
+        while not self._stop_event.wait(interval):
+            now = time.time()
+            for name, entry in list(self._entries.items()):
+                if (entry.instance is not None and entry.active_users == 0
+                        and entry.last_used is not None and now - entry.last_used > self.idle_timeout):
+                    self.unload(name)
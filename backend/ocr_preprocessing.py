@@ -0,0 +1,261 @@
+import io
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+# EasyOCR's detector never looks at more than 2560 px on the long side
+DEFAULT_MAX_SIDE = 2560
+# Only images the detector would shrink are tiled, i.e. when OCR_MAX_SIDE is
+# raised above the detector canvas (or 0) to keep small print legible
+DEFAULT_TILE_SIZE = 2560
+DEFAULT_TILE_OVERLAP = 128
+
+# (box, text, confidence) as returned by easyocr.Reader.readtext
+OCRResult = Tuple[List[List[int]], str, float]
+
+
+def tile_spans(length: int, tile_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """(start, stop) of evenly spread, overlapping tiles covering [0, length)
+
+    Neighbouring tiles overlap by at least `overlap`. A last tile that would
+    add less than half a tile of new pixels (mostly overlap) is not emitted;
+    the remaining tiles are widened to cover its part instead.
+    """
+    if length <= tile_size:
+        return [(0, length)]
+    step = tile_size - overlap
+    count = math.ceil((length - overlap) / step)
+    if length - ((count - 1) * step + overlap) < tile_size / 2:
+        count -= 1
+    if count == 1:
+        return [(0, length)]
+    width = max(tile_size, math.ceil((length + (count - 1) * overlap) / count))
+    starts = [round(i * (length - width) / (count - 1)) for i in range(count)]
+    return [(start, start + width) for start in starts]
+
+
+def _rect(box) -> Tuple[float, float, float, float]:
+    xs = [p[0] for p in box]
+    ys = [p[1] for p in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def _join_text(left: str, right: str, min_overlap: int = 3) -> str:
+    """Join two reads of a line cut at a tile seam, keeping the part both read once"""
+    for size in range(min(len(left), len(right)), min_overlap - 1, -1):
+        if left[-size:].lower() == right[:size].lower():
+            return left + right[size:]
+    return f"{left} {right}"
+
+
+def _merge_pair(left: OCRResult, right: OCRResult, overlap_threshold: float):
+    """Merge two detections of the same line, or None if they are separate text
+
+    `left` starts at or left of `right`.
+    """
+    a, b = _rect(left[0]), _rect(right[0])
+    line_height = min(a[3] - a[1], b[3] - b[1])
+    overlap_x = min(a[2], b[2]) - max(a[0], b[0])
+    overlap_y = min(a[3], b[3]) - max(a[1], b[1])
+    if line_height <= 0 or overlap_y / line_height <= overlap_threshold or overlap_x <= line_height / 2:
+        return None
+
+    left_text, right_text = _normalize(left[1]), _normalize(right[1])
+    if right_text in left_text:
+        return left
+    if left_text in right_text:
+        return right
+
+    union = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+    if union[2] - union[0] <= max(a[2] - a[0], b[2] - b[0]) + line_height / 2:
+        # One box (nearly) contains the other: the same text read twice,
+        # once cut at a tile edge; keep the larger read
+        return max(left, right, key=lambda r: (len(r[1]), r[2]))
+
+    box = [[union[0], union[1]], [union[2], union[1]], [union[2], union[3]], [union[0], union[3]]]
+    return box, _join_text(left[1], right[1]), min(left[2], right[2])
+
+
+def merge_results(results: Sequence[OCRResult], overlap_threshold: float = 0.5) -> List[OCRResult]:
+    """Merge detections from overlapping tiles
+
+    A word inside an overlap is usually found by both tiles, one of them
+    possibly cut at the tile edge, and a line crossing a seam is read in two
+    overlapping parts. Overlapping boxes on the same line are merged: a read
+    whose text the other contains is dropped, otherwise the texts are joined
+    (once for the part both tiles read) under the union of the boxes.
+    """
+    merged: List[OCRResult] = []
+    for result in sorted(results, key=lambda r: _rect(r[0])[0]):
+        for index, kept in enumerate(merged):
+            combined = _merge_pair(kept, result, overlap_threshold)
+            if combined is not None:
+                merged[index] = combined
+                break
+        else:
+            merged.append(result)
+    return merged
+
+
+def reading_order(results: Sequence[OCRResult]) -> List[OCRResult]:
+    """Sort results into lines top to bottom, each line left to right"""
+    if not results:
+        return []
+    rects = [_rect(r[0]) for r in results]
+    heights = sorted(r[3] - r[1] for r in rects)
+    tolerance = max(1.0, heights[len(heights) // 2] / 2)
+
+    lines: List[List[int]] = []
+    line_centers: List[float] = []
+    for index in sorted(range(len(results)), key=lambda i: (rects[i][1] + rects[i][3]) / 2):
+        center = (rects[index][1] + rects[index][3]) / 2
+        if lines and abs(center - line_centers[-1]) <= tolerance:
+            lines[-1].append(index)
+        else:
+            lines.append([index])
+            line_centers.append(center)
+
+    return [results[i] for line in lines for i in sorted(line, key=lambda i: rects[i][0])]
+
+
+class OCRPreprocessor:
+    """Normalize, downscale and tile uploaded images before EasyOCR
+
+    Phone photos arrive as 12 MP JPEGs, often rotated via EXIF. Detection
+    cost grows with pixel count and recognition crops are cut from the full
+    image, so images are downscaled to what the detector actually uses.
+    When downscaling is relaxed (max_side above the tile size or 0), images
+    larger than one tile are split into overlapping tiles that run in
+    parallel, and their boxes are merged and mapped back to the original
+    coordinates.
+    """
+
+    def __init__(self, max_side: int = DEFAULT_MAX_SIDE, tile_size: int = DEFAULT_TILE_SIZE,
+                 tile_overlap: int = DEFAULT_TILE_OVERLAP, max_workers: int = 4):
+        """Initialize the preprocessor
+
+        Args:
+            max_side: Long side images are downscaled to (0 disables downscaling)
+            tile_size: Tile edge length; larger images are tiled (0 disables tiling)
+            tile_overlap: Overlap between neighbouring tiles, in pixels
+            max_workers: Tiles recognized in parallel
+        """
+        self.max_side = max_side
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-tile")
+
+        self._stats_lock = threading.Lock()
+        self.images = 0
+        self.downscaled = 0
+        self.tiled = 0
+        self.tiles = 0
+        self.preprocess_seconds = 0.0
+        self.ocr_seconds = 0.0
+
+    @classmethod
+    def from_environment(cls) -> "OCRPreprocessor":
+        """Build a preprocessor from OCR_MAX_SIDE, OCR_TILE_SIZE, OCR_TILE_OVERLAP and OCR_TILE_WORKERS"""
+        return cls(
+            max_side=int(os.environ.get("OCR_MAX_SIDE", DEFAULT_MAX_SIDE)),
+            tile_size=int(os.environ.get("OCR_TILE_SIZE", DEFAULT_TILE_SIZE)),
+            tile_overlap=int(os.environ.get("OCR_TILE_OVERLAP", DEFAULT_TILE_OVERLAP)),
+            max_workers=int(os.environ.get("OCR_TILE_WORKERS", min(4, os.cpu_count() or 1))),
+        )
+
+    def load_image(self, data: bytes) -> np.ndarray:
+        """Decode an upload to an upright RGB array, applying EXIF orientation"""
+        with Image.open(io.BytesIO(data)) as image:
+            if self.max_side and max(image.size) > self.max_side:
+                # JPEG draft mode decodes huge photos at a reduced scale
+                # directly; it never goes below the requested size
+                ratio = self.max_side / max(image.size)
+                image.draft('RGB', (int(image.size[0] * ratio), int(image.size[1] * ratio)))
+            image = ImageOps.exif_transpose(image)
+            return np.array(image.convert('RGB'))
+
+    def downscale(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Shrink the long side to max_side; returns the image and the scale applied"""
+        h, w = image.shape[:2]
+        if not self.max_side or max(h, w) <= self.max_side:
+            return image, 1.0
+        scale = self.max_side / max(h, w)
+        resized = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                             interpolation=cv2.INTER_AREA)
+        return resized, scale
+
+    def split(self, image: np.ndarray) -> List[Tuple[int, int, np.ndarray]]:
+        """Overlapping (x, y, tile) crops; a single crop if the image fits one tile"""
+        h, w = image.shape[:2]
+        if not self.tile_size or max(h, w) <= self.tile_size:
+            return [(0, 0, image)]
+        return [
+            (x0, y0, image[y0:y1, x0:x1])
+            for y0, y1 in tile_spans(h, self.tile_size, self.tile_overlap)
+            for x0, x1 in tile_spans(w, self.tile_size, self.tile_overlap)
+        ]
+
+    def readtext(self, reader, image: np.ndarray, **kwargs) -> List[OCRResult]:
+        """Run reader.readtext on the preprocessed image
+
+        Returns:
+            [(box, text, confidence), ...] in the input image's coordinates
+        """
+        start = time.perf_counter()
+        prepared, scale = self.downscale(image)
+        tiles = self.split(prepared)
+        preprocess_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if len(tiles) == 1:
+            results = reader.readtext(prepared, **kwargs)
+        else:
+            # Tiles may be slightly wider than tile_size; don't let the detector shrink them
+            kwargs.setdefault('canvas_size', max(max(tile.shape[:2]) for _, _, tile in tiles))
+            futures = [(x, y, self._pool.submit(reader.readtext, tile, **kwargs)) for x, y, tile in tiles]
+            results = []
+            for x, y, future in futures:
+                results.extend(
+                    ([[p[0] + x, p[1] + y] for p in box], text, confidence)
+                    for box, text, confidence in future.result()
+                )
+            results = reading_order(merge_results(results))
+        ocr_seconds = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.images += 1
+            self.downscaled += scale < 1.0
+            self.tiled += len(tiles) > 1
+            self.tiles += len(tiles)
+            self.preprocess_seconds += preprocess_seconds
+            self.ocr_seconds += ocr_seconds
+
+        return [
+            ([[int(round(p[0] / scale)), int(round(p[1] / scale))] for p in box], text, confidence)
+            for box, text, confidence in results
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'max_side': self.max_side,
+                'tile_size': self.tile_size,
+                'images': self.images,
+                'downscaled': self.downscaled,
+                'tiled': self.tiled,
+                'avg_tiles': round(self.tiles / self.images, 2) if self.images else 0.0,
+                'avg_preprocess_ms': round(1000 * self.preprocess_seconds / self.images, 2) if self.images else 0.0,
+                'avg_ocr_ms': round(1000 * self.ocr_seconds / self.images, 2) if self.images else 0.0,
+            }
@@ -0,0 +1,260 @@
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import openvino as ov
+
+from process_memory import THREADS_ENV, WORKERS_ENV
+
+# Named CPU deployment profiles applied to compile_model()
+#
+# latency     one stream using all cores, pinned: lowest time per request
+# throughput  as many streams as the hint picks, pinned: most requests per second
+# balanced    two streams, unpinned: decent latency with some parallelism,
+#             and safe to share a host with other processes
+DEPLOYMENT_PROFILES: Dict[str, Dict[str, Any]] = {
+    'latency': {
+        "PERFORMANCE_HINT": "LATENCY",
+        "NUM_STREAMS": "1",
+        "ENABLE_CPU_PINNING": True,
+    },
+    'throughput': {
+        "PERFORMANCE_HINT": "THROUGHPUT",
+        "ENABLE_CPU_PINNING": True,
+    },
+    'balanced': {
+        "PERFORMANCE_HINT": "THROUGHPUT",
+        "NUM_STREAMS": "2",
+        "ENABLE_CPU_PINNING": False,
+    },
+}
+
+DEFAULT_PROFILE = "latency"
+
+# Properties other devices (GPU, NPU) also understand
+PORTABLE_PROPERTIES = ("PERFORMANCE_HINT", "NUM_STREAMS")
+
+
+def _load_profile_file() -> Dict[str, Any]:
+    """Read OPENVINO_PROFILES_FILE, e.g.
+
+        {"default": "balanced",
+         "models": {"whisper": "throughput", "easyocr": {"NUM_STREAMS": "4"}},
+         "profiles": {"two-threads": {"INFERENCE_NUM_THREADS": 2}}}
+    """
+    path = os.environ.get("OPENVINO_PROFILES_FILE")
+    if not path:
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring OpenVINO profile file {path}: {e}")
+        return {}
+
+
+def profile_name(model_name: str) -> str:
+    """Configured profile of a model
+
+    OPENVINO_PROFILE_<MODEL> wins over the profile file's "models" entry,
+    which wins over OPENVINO_PROFILE and the file's "default".
+    """
+    settings = _load_profile_file()
+    env_override = os.environ.get(f"OPENVINO_PROFILE_{model_name.upper()}")
+    if env_override:
+        return env_override
+    configured = settings.get('models', {}).get(model_name)
+    if isinstance(configured, str):
+        return configured
+    if isinstance(configured, dict):
+        return f"custom:{model_name}"
+    return os.environ.get("OPENVINO_PROFILE") or settings.get('default') or DEFAULT_PROFILE
+
+
+def resolve_profile(model_name: str, device: str = "CPU") -> Dict[str, Any]:
+    """compile_model() properties of a model's configured profile on a device"""
+    settings = _load_profile_file()
+    name = profile_name(model_name)
+
+    if name.startswith("custom:"):
+        config = dict(settings['models'][model_name])
+    else:
+        profiles = {**DEPLOYMENT_PROFILES, **settings.get('profiles', {})}
+        if name not in profiles:
+            print(f"Unknown OpenVINO profile '{name}' for {model_name}; using '{DEFAULT_PROFILE}'")
+            name = DEFAULT_PROFILE
+        config = dict(profiles[name])
+
+    if device != "CPU":
+        config = {k: v for k, v in config.items() if k in PORTABLE_PROPERTIES}
+    return config
+
+
+def autotune_enabled() -> bool:
+    return os.environ.get("OPENVINO_AUTOTUNE", "").lower() in ("1", "true", "yes")
+
+
+def worker_budget() -> Optional[Tuple[int, int]]:
+    """(workers, inference threads per worker) when serving under prefork_server, else None"""
+    try:
+        workers, threads = int(os.environ[WORKERS_ENV]), int(os.environ[THREADS_ENV])
+    except (KeyError, ValueError):
+        return None
+    return max(1, workers), max(1, threads)
+
+
+def host_fingerprint(core: ov.Core, device: str) -> str:
+    """Identifies hardware and runtime a tuned configuration is valid for"""
+    try:
+        device_name = core.get_property(device, "FULL_DEVICE_NAME")
+    except Exception:
+        device_name = device
+    return f"{device_name}|{os.cpu_count()}|{ov.get_version()}"
+
+
+class ProfileTuner:
+    """Sweeps compile configurations on this host and persists the best one
+
+    Tuning runs the real model end to end (e.g. a transcription) with each
+    candidate configuration, because stream/thread trade-offs depend on the
+    whole pipeline rather than on one graph. Results are stored per model,
+    precision and host fingerprint in a JSON file next to the model cache.
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._read().get(key)
+        return dict(entry['config']) if entry else None
+
+    def candidates(self, device: str = "CPU",
+                   budget: Optional[Tuple[int, int]] = None) -> Dict[str, Dict[str, Any]]:
+        """The named profiles plus a few explicit stream and thread counts
+
+        With a pre-fork `budget` (workers, threads per worker) every
+        candidate runs unpinned on the worker's share of the cores, since
+        pinned workers would fight over the same ones and any other thread
+        count would override the per-worker split.
+        """
+        if budget is not None:
+            _, threads = budget
+            candidates = {
+                name: dict(config, ENABLE_CPU_PINNING=False, INFERENCE_NUM_THREADS=threads)
+                for name, config in DEPLOYMENT_PROFILES.items()
+            }
+            for streams in (2, 4, 8):
+                config = {
+                    "PERFORMANCE_HINT": "THROUGHPUT",
+                    "NUM_STREAMS": str(streams),
+                    "ENABLE_CPU_PINNING": False,
+                    "INFERENCE_NUM_THREADS": threads,
+                }
+                if streams < threads and config not in candidates.values():
+                    candidates[f"streams={streams}"] = config
+            return self._portable(candidates) if device != "CPU" else candidates
+
+        candidates = {name: dict(config) for name, config in DEPLOYMENT_PROFILES.items()}
+        cores = os.cpu_count() or 1
+        for streams in (2, 4, 8):
+            if streams < cores:
+                candidates[f"streams={streams}"] = {
+                    "PERFORMANCE_HINT": "THROUGHPUT",
+                    "NUM_STREAMS": str(streams),
+                    "ENABLE_CPU_PINNING": True,
+                }
+        # One stream on part of the cores: with SMT, one thread per physical
+        # core is often faster than all logical ones
+        for threads in sorted({cores // 2, cores // 4} - {0}, reverse=True):
+            candidates[f"latency,threads={threads}"] = dict(DEPLOYMENT_PROFILES['latency'],
+                                                           INFERENCE_NUM_THREADS=threads)
+        return self._portable(candidates) if device != "CPU" else candidates
+
+    @staticmethod
+    def _portable(candidates: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Candidates reduced to properties other devices understand, without duplicates"""
+        portable = {}
+        for name, config in candidates.items():
+            config = {k: v for k, v in config.items() if k in PORTABLE_PROPERTIES}
+            if config not in portable.values():
+                portable[name] = config
+        return portable
+
+    def tune(self, key: str, build: Callable[[Dict[str, Any]], Any], run: Callable[[Any], Any],
+             objective: str = "latency", device: str = "CPU", runs: int = 5,
+             concurrency: int = 4, budget: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """Measure every candidate and persist the best configuration
+
+        Args:
+            key: Storage key (model, precision and host fingerprint)
+            build: Compiles the model with the given properties
+            run: One end-to-end inference on the built model
+            objective: 'latency' (lowest median sequential time) or
+                'throughput' (most calls per second at `concurrency`)
+            device: OpenVINO device the model is compiled for
+            budget: (workers, threads per worker) under prefork_server
+
+        Returns:
+            The chosen compile_model() properties
+        """
+        results = []
+        for name, config in self.candidates(device, budget).items():
+            try:
+                model = build(config)
+                run(model)  # warm-up
+                if objective == "throughput":
+                    calls = max(runs, concurrency * 2)
+                    start = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                        list(pool.map(lambda _: run(model), range(calls)))
+                    score = calls / (time.perf_counter() - start)
+                else:
+                    times = []
+                    for _ in range(runs):
+                        start = time.perf_counter()
+                        run(model)
+                        times.append(time.perf_counter() - start)
+                    score = -statistics.median(times)
+                del model
+            except Exception as e:
+                print(f"Autotune candidate {name} failed: {e}")
+                continue
+            measured = f"{score:.2f} calls/s" if objective == "throughput" else f"{-1000 * score:.1f} ms"
+            print(f"Autotune {key} {name}: {measured}")
+            results.append({'candidate': name, 'config': config, 'score': score})
+
+        if not results:
+            raise RuntimeError(f"No configuration could be measured for {key}")
+
+        best = max(results, key=lambda r: r['score'])
+        with self._lock:
+            store = self._read()
+            store[key] = {
+                'config': best['config'],
+                'candidate': best['candidate'],
+                'objective': objective,
+                'tuned_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }
+            self._write(store)
+        print(f"Autotune {key}: selected {best['candidate']}")
+        return dict(best['config'])
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.store_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, store: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+        tmp_path = f"{self.store_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(store, f, indent=2)
+        os.replace(tmp_path, self.store_path)
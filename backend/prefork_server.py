@@ -0,0 +1,193 @@
+"""Pre-fork server for the chatbot API
+
+The parent process loads the weights of every model this node serves,
+moves them into shared memory and freezes the garbage collector, then
+forks worker processes that all accept connections on one listening
+socket. Each worker runs inference on its own interpreter (no shared GIL)
+while the weights stay in memory once.
+
+OpenVINO models are converted to IR in a separate process before the
+fork. Compiled models and inference threads are not fork-safe, so every
+worker compiles on first use from the cached IR and compiled blobs. The
+parent then loads no PyTorch weights for those models at all: what the
+workers run are memory-mapped files, shared through the page cache.
+Each worker logs its PSS (its share of those pages) after warm-up.
+
+    python prefork_server.py --workers 4 --port 5001
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from process_memory import MASTER_PID_ENV, THREADS_ENV, WORKERS_ENV, memory_usage
+
+
+def _prepare_openvino_models(whisper_enabled: bool, easyocr_enabled: bool):
+    """Populate the IR cache so workers never convert or quantize concurrently"""
+    from openvino_optimization import optimize_easyocr, optimize_whisper_model
+    if whisper_enabled:
+        optimize_whisper_model()
+    if easyocr_enabled:
+        optimize_easyocr()
+
+
+def share_weights(weights) -> int:
+    """Move the PyTorch modules of a model (or of an object holding them) into shared memory
+
+    Tensor storage is never written after loading, so copy-on-write alone
+    would keep it shared; shared memory also survives anything that touches
+    the pages, e.g. in-place ops or a stray `.to()`.
+
+    Returns:
+        Number of modules moved
+    """
+    import torch
+    if isinstance(weights, torch.nn.Module):
+        modules = [weights]
+    else:
+        modules = [value for value in vars(weights).values() if isinstance(value, torch.nn.Module)]
+    for module in modules:
+        module.share_memory()
+    return len(modules)
+
+
+def _limit_threads(threads: int, openvino_enabled: bool):
+    """Split the cores between workers instead of every worker using all of them"""
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(threads)
+    if openvino_enabled:
+        from openvino_optimization import get_core
+        get_core().set_property("CPU", {"INFERENCE_NUM_THREADS": threads})
+
+
+def _run_worker(server, registry, warmup: str, threads: int):
+    # The parent relays Ctrl-C as SIGTERM; don't handle it twice
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    registry.after_fork()
+    _limit_threads(threads, registry.is_enabled('whisper') or registry.is_enabled('easyocr'))
+    if warmup:
+        registry.warm_up(None if warmup == 'all' else [n.strip() for n in warmup.split(',') if n.strip()])
+        usage = memory_usage()
+        print(f"Worker {os.getpid()} warmed up: PSS {usage.get('pss_mb', '?')} MB, "
+              f"RSS {usage.get('rss_mb', '?')} MB, shared {usage.get('shared_clean_mb', '?')} MB")
+
+    print(f"Worker {os.getpid()} serving on {server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def _spawn_worker(server, registry, warmup: str, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        _run_worker(server, registry, warmup, threads)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get("FLASK_PORT", 5001)))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes to fork')
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help='Inference threads per worker (default: cores / workers)')
+    parser.add_argument('--no-prepare', action='store_true', help='Skip converting OpenVINO IR before forking')
+    parser.add_argument('--no-shared-memory', action='store_true',
+                        help='Rely on copy-on-write only instead of moving weights to shared memory')
+    args = parser.parse_args()
+
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Warm-up runs inference, which must happen in the workers after the fork
+    warmup = os.environ.pop("MODEL_WARMUP", "").strip()
+
+    # Workers pinned to the same cores would fight over them; unpinned
+    # two-stream compiles share the host well unless a profile is chosen
+    os.environ.setdefault("OPENVINO_PROFILE", "balanced")
+    # Autotuning (also in the preparation process) sweeps one worker's share
+    os.environ[WORKERS_ENV] = str(args.workers)
+    os.environ[THREADS_ENV] = str(threads)
+
+    # Importing the app loads no models; the registry decides what this node serves
+    from werkzeug.serving import make_server
+    import chatbot_api_optimized as api
+    registry = api.model_registry
+
+    whisper_enabled = registry.is_enabled('whisper')
+    easyocr_enabled = registry.is_enabled('easyocr')
+    if (whisper_enabled or easyocr_enabled) and not args.no_prepare:
+        print("Preparing OpenVINO models in a separate process...")
+        # spawn, not fork: conversion starts threads this process must not inherit
+        converter = multiprocessing.get_context('spawn').Process(
+            target=_prepare_openvino_models, args=(whisper_enabled, easyocr_enabled)
+        )
+        converter.start()
+        converter.join()
+        if converter.exitcode != 0:
+            print(f"OpenVINO preparation exited with code {converter.exitcode}; workers will fall back as needed")
+
+    start_time = time.time()
+    weights = registry.load_weights()
+    for name in [name for name, model_weights in weights.items() if model_weights is None]:
+        print(f"Skipped PyTorch weights for {name}: workers run its cached OpenVINO IR")
+        del weights[name]
+    if not args.no_shared_memory:
+        for name, model_weights in weights.items():
+            print(f"Moved {share_weights(model_weights)} {name} module(s) to shared memory")
+    print(f"Loaded shared weights for {', '.join(weights) or 'no models'} in {time.time() - start_time:.2f} seconds")
+
+    # Objects that exist now are never collected in the workers, so the
+    # collector doesn't write to (and un-share) their pages
+    gc.collect()
+    gc.freeze()
+
+    server = make_server(args.host, args.port, api.app, threaded=True)
+    # Workers that lose the race for a connection must not block in accept()
+    server.socket.setblocking(False)
+    os.environ[MASTER_PID_ENV] = str(os.getpid())
+
+    workers = set()
+    for _ in range(args.workers):
+        workers.add(_spawn_worker(server, registry, warmup, threads))
+    print(f"Started {args.workers} workers ({threads} inference threads each) on {args.host}:{args.port}")
+
+    shutting_down = False
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Supervise: replace workers that crash until asked to stop
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not shutting_down:
+            print(f"Worker {pid} exited with status {status}; starting a replacement")
+            workers.add(_spawn_worker(server, registry, warmup, threads))
+
+    server.server_close()
+    print("All workers stopped")
+
+
+if __name__ == '__main__':
+    main()
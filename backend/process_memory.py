@@ -0,0 +1,80 @@
+import os
+from typing import Dict, List, Optional
+
+# Set by prefork_server.py in the parent before it forks workers
+MASTER_PID_ENV = "COREMENTIS_PREFORK_MASTER"
+# Worker count and inference threads per worker, set alongside it
+WORKERS_ENV = "COREMENTIS_PREFORK_WORKERS"
+THREADS_ENV = "COREMENTIS_PREFORK_THREADS"
+
+SMAPS_FIELDS = {
+    'Rss': 'rss_mb',
+    'Pss': 'pss_mb',
+    'Shared_Clean': 'shared_clean_mb',
+    'Shared_Dirty': 'shared_dirty_mb',
+    'Private_Clean': 'private_clean_mb',
+    'Private_Dirty': 'private_dirty_mb',
+    'Swap': 'swap_mb',
+}
+
+
+def memory_usage(pid: Optional[int] = None) -> Dict[str, float]:
+    """RSS/PSS breakdown of a process in MB
+
+    PSS splits every shared page between the processes mapping it, so the
+    PSS of all pre-fork workers adds up to their real combined footprint,
+    whereas their RSS counts shared model weights once per worker.
+    """
+    proc = f"/proc/{pid if pid is not None else 'self'}"
+    usage = {}
+    try:
+        with open(f"{proc}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in SMAPS_FIELDS:
+                    usage[SMAPS_FIELDS[key]] = round(int(value.split()[0]) / 1024, 1)
+    except (OSError, ValueError):
+        # Kernels before 4.14 have no smaps_rollup; RSS is still available
+        try:
+            with open(f"{proc}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+            usage['rss_mb'] = round(resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2, 1)
+        except (OSError, ValueError):
+            pass
+    return usage
+
+
+def child_pids(parent_pid: int) -> List[int]:
+    """PIDs of the direct children of a process"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after its closing ')'
+        fields = stat[stat.rfind(')') + 2:].split()
+        if len(fields) > 1 and int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def worker_memory_report() -> Dict[str, object]:
+    """Per-worker memory of this server, covering all pre-fork siblings if any"""
+    master_pid = os.environ.get(MASTER_PID_ENV)
+    if not master_pid:
+        return {'mode': 'single', 'workers': [dict(pid=os.getpid(), **memory_usage())]}
+
+    master_pid = int(master_pid)
+    workers = [dict(pid=pid, **memory_usage(pid)) for pid in child_pids(master_pid)]
+    return {
+        'mode': 'prefork',
+        'master': dict(pid=master_pid, **memory_usage(master_pid)),
+        'current_pid': os.getpid(),
+        'workers': workers,
+        'total_rss_mb': round(sum(w.get('rss_mb', 0) for w in workers), 1),
+        'total_pss_mb': round(sum(w.get('pss_mb', 0) for w in workers), 1),
+    }
@@ -0,0 +1,135 @@
+import functools
+import re
+import threading
+from typing import Any, Dict, List
+
+# System prompts by id. Static instructions come first and the per-course
+# part last, so every conversation sends the same leading bytes and
+# provider-side prompt caching can reuse them across users and courses.
+PROMPT_TEMPLATES = {
+    'tutor-v1': (
+        "You are CoreMentis AI, an educational assistant for the CoreMentis platform. "
+        "You are a general educational assistant that can help with a wide range of subjects "
+        "based on the student's needs. Follow these guidelines:\n"
+        "1. Provide clear, concise, and accurate answers focused on the student's question\n"
+        "2. Do not assume the student is specifically interested in computer vision or machine "
+        "learning unless they ask about these topics\n"
+        "3. Do not add irrelevant connections to technology or other fields unless specifically asked\n"
+        "4. Keep explanations educational and appropriate for the student's level\n"
+        "5. If you don't know something, admit it rather than making up information\n"
+        "6. Maintain context from previous questions in the conversation\n"
+        "7. Only provide information that is directly relevant to the question asked\n"
+        "8. When asked about what you teach or what you can help with, explain that you're a "
+        "general educational assistant that can help with various subjects based on the student's needs\n"
+        "The current course context is: {course_context}, but you can assist with other topics as requested."
+    ),
+}
+
+DEFAULT_PROMPT_ID = 'tutor-v1'
+
+# The inline system prompt histories were saved with before templates
+_LEGACY_PROMPT = re.compile(
+    r"You are CoreMentis AI, an educational assistant for the CoreMentis platform\. .*?"
+    r"The current course context is: (.*?), but you can assist with other topics as requested\. "
+    r"Follow these guidelines:\n", re.S)
+
+# Keys the chat completion API accepts on a message
+_API_MESSAGE_KEYS = ('role', 'content', 'name')
+
+
+@functools.lru_cache(maxsize=256)
+def render_prompt(prompt_id: str, course_context: str) -> str:
+    """A system prompt for a course, built once and shared by every conversation using it"""
+    return PROMPT_TEMPLATES[prompt_id].format(course_context=course_context)
+
+
+class PromptLibrary:
+    """Interned system prompts, stored by reference and sent as a stable prefix
+
+    In memory a conversation's system message keeps its rendered content (the
+    context manager counts its tokens), but all conversations of a course
+    share one string. Saved histories keep only {'role', 'prompt_id',
+    'course_context'} and get the content back when loaded. Messages sent to
+    the model are reduced to the keys the API accepts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histories_saved = 0
+        self.stored_bytes_saved = 0
+        self.legacy_prompts_converted = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self.prefix_bytes_sent = 0
+
+    def system_message(self, course_context: str, prompt_id: str = DEFAULT_PROMPT_ID) -> Dict[str, Any]:
+        """The system message that starts a conversation about a course"""
+        return {
+            'role': 'system',
+            'content': render_prompt(prompt_id, course_context),
+            'prompt_id': prompt_id,
+            'course_context': course_context,
+        }
+
+    def to_stored(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Messages as saved to disk: template system prompts without their content"""
+        stored = []
+        saved = 0
+        for msg in messages:
+            if 'prompt_id' in msg:
+                stored.append({key: value for key, value in msg.items() if key != 'content'})
+                saved += len(msg['content'].encode('utf-8'))
+            else:
+                stored.append(msg)
+        with self._lock:
+            self.histories_saved += 1
+            self.stored_bytes_saved += saved
+        return stored
+
+    def from_stored(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Messages loaded from disk, with template content restored
+
+        Histories saved with the old inline system prompt are converted to
+        the template for the same course.
+        """
+        loaded = []
+        for msg in messages:
+            if 'prompt_id' in msg and msg['prompt_id'] in PROMPT_TEMPLATES:
+                msg = self.system_message(msg.get('course_context', 'general topics'), msg['prompt_id'])
+            elif msg.get('role') == 'system' and 'prompt_id' not in msg:
+                match = _LEGACY_PROMPT.match(msg.get('content', ''))
+                if match:
+                    msg = self.system_message(match.group(1))
+                    with self._lock:
+                        self.legacy_prompts_converted += 1
+            loaded.append(msg)
+        return loaded
+
+    def outgoing(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Messages for the chat completion API, without template bookkeeping keys"""
+        sent = [{key: msg[key] for key in _API_MESSAGE_KEYS if key in msg} for msg in messages]
+        prefix = messages[0]['content'] if messages and 'prompt_id' in messages[0] else ''
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sum(len(msg['content'].encode('utf-8')) for msg in sent)
+            self.prefix_bytes_sent += len(prefix.encode('utf-8'))
+        return sent
+
+    def get_stats(self) -> Dict[str, Any]:
+        cache = render_prompt.cache_info()
+        with self._lock:
+            return {
+                'templates': len(PROMPT_TEMPLATES),
+                'prompts_materialized': cache.currsize,
+                'prompt_lookups': cache.hits + cache.misses,
+                'histories_saved': self.histories_saved,
+                'stored_bytes_saved': self.stored_bytes_saved,
+                'legacy_prompts_converted': self.legacy_prompts_converted,
+                'requests': self.requests,
+                'bytes_sent': self.bytes_sent,
+                # System prompt bytes leading each request, identical for every
+                # conversation of a course and so cacheable by the provider
+                'shared_prefix_bytes_sent': self.prefix_bytes_sent,
+                'shared_prefix_ratio': round(self.prefix_bytes_sent / self.bytes_sent, 4) if self.bytes_sent else 0.0,
+            }
+
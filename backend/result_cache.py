@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def content_key(data: bytes, *params) -> str:
+    """SHA-256 of an upload plus the settings that affect its result
+
+    Including e.g. the model name and preprocessing parameters keeps a
+    configuration change from serving results computed under the old one.
+    """
+    digest = hashlib.sha256(data)
+    for param in params:
+        digest.update(b'\0' + str(param).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed cache of model outputs with byte-size limits
+
+    Results live in an in-memory LRU and, when `disk_dir` is set, in an
+    on-disk tier of JSON files that survives restarts and is shared by all
+    workers of a pre-fork server. Disk hits are promoted back into memory.
+    Values must be JSON-serializable.
+    """
+
+    def __init__(self, name: str, max_bytes: int = 64 * 1024 ** 2,
+                 disk_dir: Optional[str] = None, disk_max_bytes: int = 512 * 1024 ** 2):
+        """Initialize the cache
+
+        Args:
+            name: Cache name, also the subdirectory of the disk tier
+            max_bytes: Memory tier limit (serialized size of the values)
+            disk_dir: Root directory of the disk tier; None disables it
+            disk_max_bytes: Disk tier limit
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    @classmethod
+    def from_environment(cls, name: str) -> "ResultCache":
+        """Build a cache from RESULT_CACHE_MAX_MB, RESULT_CACHE_DIR and RESULT_CACHE_DISK_MAX_MB"""
+        return cls(
+            name,
+            max_bytes=int(float(os.environ.get("RESULT_CACHE_MAX_MB", 64)) * 1024 ** 2),
+            disk_dir=os.environ.get("RESULT_CACHE_DIR") or None,
+            disk_max_bytes=int(float(os.environ.get("RESULT_CACHE_DISK_MAX_MB", 512)) * 1024 ** 2),
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._memory_put(key, value, len(json.dumps(value)))
+        return value
+
+    def put(self, key: str, value: Any):
+        """Cache a value in memory and, if enabled, on disk"""
+        serialized = json.dumps(value)
+        self._memory_put(key, value, len(serialized))
+        if self.disk_dir:
+            self._disk_put(key, serialized)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'memory_mb': round(self._bytes / 1024 ** 2, 3),
+                'disk_mb': round(self._disk_bytes / 1024 ** 2, 3) if self.disk_dir else None,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _memory_put(self, key: str, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r') as f:
+                value = json.load(f)
+            # mtime doubles as the disk tier's LRU clock
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, serialized: str):
+        path = self._disk_path(key)
+        size = len(serialized)
+        if size > self.disk_max_bytes:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existed = os.path.exists(path)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(serialized)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing {self.name} result cache entry: {e}")
+            return
+        with self._lock:
+            if not existed:
+                self._disk_bytes += size
+            over_limit = self._disk_bytes > self.disk_max_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for filename in files:
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """Delete least recently used files until the disk tier is 10% under its limit"""
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        with self._lock:
+            # Other workers share the directory, so resync with what is on disk
+            self._disk_bytes = total
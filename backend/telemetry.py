@@ -0,0 +1,230 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Prometheus histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencySeries:
+    """Latency samples of one endpoint/model/queue
+
+    Keeps cumulative histogram buckets for Prometheus, which computes rates
+    itself, plus per-second counters over a rolling window for the JSON
+    view's count, errors, mean and throughput. Percentiles come from the
+    raw samples retained in the window, at most max_samples of them (the
+    most recent); 'sampled' in the snapshot says how many they cover.
+    """
+
+    def __init__(self, window_seconds: float, max_samples: int, buckets=DEFAULT_BUCKETS):
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.created_at = time.time()
+        self._samples: "deque[Tuple[float, float, bool]]" = deque(maxlen=max_samples)
+        # [second, count, errors, total_seconds] for every second with calls in the window
+        self._seconds: "deque[List[Any]]" = deque()
+
+    def record(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.errors += error
+        self.total_seconds += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        now = time.time()
+        self._samples.append((now, seconds, error))
+        second = int(now)
+        if self._seconds and self._seconds[-1][0] == second:
+            bucket = self._seconds[-1]
+            bucket[1] += 1
+            bucket[2] += error
+            bucket[3] += seconds
+        else:
+            self._seconds.append([second, 1, int(error), seconds])
+            self._expire(now)
+
+    def _expire(self, now: float):
+        cutoff = int(now - self.window_seconds)
+        while self._seconds and self._seconds[0][0] < cutoff:
+            self._seconds.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        self._expire(now)
+        count = sum(bucket[1] for bucket in self._seconds)
+        errors = sum(bucket[2] for bucket in self._seconds)
+        total_seconds = sum(bucket[3] for bucket in self._seconds)
+        cutoff = now - self.window_seconds
+        durations = sorted(s for t, s, _ in self._samples if t >= cutoff)
+        # A series younger than the window only had that long to collect samples
+        span = max(1.0, min(self.window_seconds, now - self.created_at))
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'window': {
+                'seconds': self.window_seconds,
+                'count': count,
+                'errors': errors,
+                'error_rate': round(errors / count, 4) if count else 0.0,
+                'throughput_per_second': round(count / span, 3),
+                # Calls the percentiles are computed from (capped at max_samples)
+                'sampled': len(durations),
+                'latency_ms': {
+                    'mean': round(1000 * total_seconds / count, 2) if count else 0.0,
+                    'p50': round(1000 * _percentile(durations, 0.50), 2),
+                    'p95': round(1000 * _percentile(durations, 0.95), 2),
+                    'p99': round(1000 * _percentile(durations, 0.99), 2),
+                    'max': round(1000 * durations[-1], 2) if durations else 0.0,
+                },
+            },
+        }
+
+
+class Telemetry:
+    """Latency, throughput and error metrics for the chatbot service
+
+    Three families of series are tracked: HTTP endpoints, model calls
+    (Whisper, EasyOCR, TTS, Groq, ...) and queue waits. Gauges such as model
+    memory are read from callbacks when a snapshot is taken, so they are
+    always current and cost nothing between scrapes.
+    """
+
+    FAMILIES = {
+        'endpoint': ('corementis_request_duration_seconds', 'HTTP request latency by endpoint'),
+        'model': ('corementis_model_duration_seconds', 'Model call latency by model'),
+        'queue': ('corementis_queue_wait_seconds', 'Time spent waiting in a queue'),
+    }
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 5000):
+        """Initialize telemetry
+
+        Args:
+            window_seconds: Rolling window for percentiles and throughput
+            max_samples: Raw samples kept per series for percentiles; window
+                counts and throughput are exact regardless
+        """
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self.started_at = time.time()
+        self._series: Dict[str, Dict[str, LatencySeries]] = {family: {} for family in self.FAMILIES}
+        self._gauges: List[Tuple[str, str, str, Callable[[], Dict[str, float]]]] = []
+        self._lock = threading.Lock()
+
+    def record(self, family: str, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            series = self._series[family].get(name)
+            if series is None:
+                series = self._series[family][name] = LatencySeries(self.window_seconds, self.max_samples)
+            series.record(seconds, error)
+
+    def record_request(self, endpoint: str, seconds: float, error: bool = False):
+        self.record('endpoint', endpoint, seconds, error)
+
+    def record_model(self, model: str, seconds: float, error: bool = False):
+        self.record('model', model, seconds, error)
+
+    def record_queue_wait(self, queue: str, seconds: float):
+        self.record('queue', queue, seconds)
+
+    @contextmanager
+    def time_model(self, model: str):
+        """Time a model call; an exception counts as an error and is re-raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record_model(model, time.perf_counter() - start, error=True)
+            raise
+        self.record_model(model, time.perf_counter() - start)
+
+    def register_gauge(self, name: str, help_text: str, label: str, callback: Callable[[], Dict[str, float]]):
+        """Expose values read at snapshot time, e.g. model memory
+
+        Args:
+            name: Prometheus metric name
+            help_text: Metric description
+            label: Label name for the keys returned by callback
+            callback: Returns a mapping of label value to gauge value
+        """
+        self._gauges.append((name, help_text, label, callback))
+
+    def stats(self, family: str, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            series = self._series[family].get(name)
+            return series.snapshot() if series is not None else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All series and gauges as a JSON-serializable dict"""
+        with self._lock:
+            families = {
+                f"{family}s": {name: series.snapshot() for name, series in sorted(named.items())}
+                for family, named in self._series.items()
+            }
+        families['gauges'] = {name: self._read_gauge(callback) for name, _, _, callback in self._gauges}
+        families['uptime_seconds'] = round(time.time() - self.started_at, 1)
+        return families
+
+    def prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for family, (metric, help_text) in self.FAMILIES.items():
+                named = self._series[family]
+                if not named:
+                    continue
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for name, series in sorted(named.items()):
+                    label = f'{family}="{_escape(name)}"'
+                    cumulative = 0
+                    for bound, count in zip(series.buckets, series.bucket_counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {series.count}')
+                    lines.append(f'{metric}_sum{{{label}}} {series.total_seconds:.6f}')
+                    lines.append(f'{metric}_count{{{label}}} {series.count}')
+
+                errors_metric = metric.replace('_duration_seconds', '_errors_total')
+                if errors_metric != metric:
+                    lines.append(f"# HELP {errors_metric} Failed calls by {family}")
+                    lines.append(f"# TYPE {errors_metric} counter")
+                    for name, series in sorted(named.items()):
+                        lines.append(f'{errors_metric}{{{family}="{_escape(name)}"}} {series.errors}')
+
+        for name, help_text, label, callback in self._gauges:
+            values = self._read_gauge(callback)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(values.items()):
+                lines.append(f'{name}{{{label}="{_escape(str(key))}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _read_gauge(callback) -> Dict[str, float]:
+        try:
+            return callback()
+        except Exception as e:
+            print(f"Error reading gauge: {e}")
+            return {}
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
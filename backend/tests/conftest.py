@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level modules, as the server runs them
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def openvino_optimization(tmp_path_factory):
+    """openvino_optimization with its IR and compiled-blob cache in a temporary directory
+
+    Skips when OpenVINO, Whisper, EasyOCR or the other conversion
+    dependencies are not installed.
+    """
+    os.environ["OPENVINO_MODEL_DIR"] = str(tmp_path_factory.mktemp("openvino_models"))
+    return pytest.importorskip("openvino_optimization")
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from benchmarks.content_search import StubSearchServer  # noqa: E402
+from content_scraper import ContentScraper  # noqa: E402
+
+TOPIC = "photosynthesis"
+
+
+def test_search_fetches_providers_concurrently():
+    delays = {'bing': 0.5, 'youtube': 0.5}
+    with StubSearchServer(delays=delays) as stub:
+        scraper = ContentScraper(base_urls=stub.base_urls, deadline=10.0)
+        sequential = (scraper.scrape_bing_images(TOPIC), scraper.scrape_youtube_videos(TOPIC))
+
+        start = time.perf_counter()
+        images, videos = scraper.search(TOPIC)
+        elapsed = time.perf_counter() - start
+
+    assert images and videos
+    assert (images, videos) == sequential
+    # Sequential fetching would take the sum of both delays
+    assert elapsed < 0.9
+
+
+def test_search_returns_what_arrived_by_the_deadline():
+    with StubSearchServer(delays={'bing': 0.1, 'youtube': 3.0}) as stub:
+        scraper = ContentScraper(base_urls=stub.base_urls, deadline=0.8)
+        start = time.perf_counter()
+        images, videos = scraper.search(TOPIC)
+        elapsed = time.perf_counter() - start
+
+    assert images
+    assert videos == []
+    assert elapsed < 1.5
+
+
+def test_failing_provider_does_not_fail_the_search():
+    with StubSearchServer(statuses={'youtube': 503}) as stub:
+        scraper = ContentScraper(base_urls=stub.base_urls, deadline=5.0)
+        images, videos = scraper.search(TOPIC)
+
+    assert images
+    assert videos == []
+
+
+def test_concurrent_searches_share_the_scraper():
+    with StubSearchServer(delays={'bing': 0.2, 'youtube': 0.2}) as stub:
+        scraper = ContentScraper(base_urls=stub.base_urls, deadline=10.0, max_workers=8)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: scraper.search(TOPIC), range(4)))
+
+    assert all(images and videos for images, videos in results)
+    assert all(result == results[0] for result in results)
+    assert stub.requests['youtube'] == 4
+
+
+def test_blank_topic_sends_no_requests():
+    with StubSearchServer() as stub:
+        scraper = ContentScraper(base_urls=stub.base_urls)
+        assert scraper.search("   ") == ([], [])
+    assert sum(stub.requests.values()) == 0
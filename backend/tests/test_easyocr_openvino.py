@@ -0,0 +1,52 @@
+import pytest
+
+easyocr = pytest.importorskip("easyocr")
+pytest.importorskip("openvino")
+
+
+def _texts(reader, image):
+    return [text for _, text, _ in reader.readtext(image)]
+
+
+@pytest.fixture(scope="module")
+def reference_reader():
+    return easyocr.Reader(['en'], gpu=False, quantize=False)
+
+
+def test_fp16_ir_reads_like_pytorch(openvino_optimization, reference_reader):
+    from easyocr_openvino import OpenVINODetector, OpenVINORecognizer, compare_with_pytorch
+
+    ov_reader, _ = openvino_optimization.optimize_easyocr(precision="FP16", reader=reference_reader)
+    assert isinstance(ov_reader.detector, OpenVINODetector)
+    assert isinstance(ov_reader.recognizer, OpenVINORecognizer)
+    # The swap happens on a copy; the given reader keeps its PyTorch modules
+    assert not isinstance(reference_reader.detector, OpenVINODetector)
+
+    report = compare_with_pytorch(ov_reader, reference_reader)
+    assert report['match_rate'] >= 0.8, report['images']
+
+
+def test_cached_ir_needs_no_pytorch_reader(openvino_optimization, reference_reader):
+    from easyocr_openvino import OpenVINORecognizer, generate_text_images
+
+    ov_reader, _ = openvino_optimization.optimize_easyocr(precision="FP16", reader=reference_reader, config={})
+    assert openvino_optimization.cached_easyocr_ir(['en'], "FP16") is not None
+
+    weightless, _ = openvino_optimization.optimize_easyocr(precision="FP16", config={})
+    assert isinstance(weightless.recognizer, OpenVINORecognizer)
+    for image in generate_text_images(num_images=2, seed=99):
+        assert _texts(weightless, image) == _texts(ov_reader, image)
+
+
+def test_int8_ir_keeps_readtext_format(openvino_optimization):
+    pytest.importorskip("nncf")
+    from easyocr_openvino import generate_text_images
+
+    ov_reader, _ = openvino_optimization.optimize_easyocr(precision="INT8")
+    assert ov_reader.openvino_precision == "INT8"
+    results = ov_reader.readtext(generate_text_images(num_images=1, seed=5)[0])
+    assert results
+    for box, text, confidence in results:
+        assert len(box) == 4
+        assert isinstance(text, str)
+        assert 0.0 <= confidence <= 1.0
@@ -0,0 +1,42 @@
+import pytest
+
+whisper = pytest.importorskip("whisper")
+pytest.importorskip("openvino")
+
+
+@pytest.fixture(scope="module")
+def reference_model():
+    return whisper.load_model("tiny", device="cpu")
+
+
+def test_fp16_ir_transcribes_like_pytorch(openvino_optimization, reference_model):
+    from whisper_openvino import OpenVINOWhisper, compare_with_pytorch, generate_calibration_audio
+
+    model, _ = openvino_optimization.optimize_whisper_model("tiny", precision="FP16",
+                                                            pytorch_model=reference_model)
+    assert isinstance(model, OpenVINOWhisper)
+
+    report = compare_with_pytorch(model, reference_model, generate_calibration_audio(num_clips=3, seed=1234))
+    assert report['match_rate'] == 1.0, report['clips']
+
+
+def test_int8_ir_is_cached_and_loads_without_pytorch(openvino_optimization, reference_model):
+    pytest.importorskip("nncf")
+    from whisper_openvino import OpenVINOWhisper, generate_calibration_audio
+
+    model, _ = openvino_optimization.optimize_whisper_model("tiny", precision="INT8",
+                                                            pytorch_model=reference_model)
+    assert isinstance(model, OpenVINOWhisper)
+    assert model.precision == "INT8"
+
+    cached = openvino_optimization.cached_whisper_ir("tiny", "INT8")
+    assert cached is not None
+    _, spec = cached
+    assert spec.dims == reference_model.dims
+    assert spec.is_multilingual == reference_model.is_multilingual
+
+    # Built from the cached IR and spec alone
+    reloaded, _ = openvino_optimization.optimize_whisper_model("tiny", precision="INT8", config={})
+    assert isinstance(reloaded, OpenVINOWhisper)
+    clip = generate_calibration_audio(num_clips=1, seed=7)[0]
+    assert reloaded.transcribe(clip, temperature=0.0)["text"] == model.transcribe(clip, temperature=0.0)["text"]
@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES
+
+# Thresholds mirrored from whisper.transcribe so batched results are judged
+# the same way as the sequential path
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+# How long transcribe() waits for a result unless told otherwise
+DEFAULT_TIMEOUT_SECONDS = 120.0
+
+
+class WorkerStoppedError(RuntimeError):
+    """Raised for clips submitted to, or still queued in, a stopped worker"""
+
+
+class _TranscriptionJob:
+    """A single queued clip waiting for a batch slot"""
+
+    def __init__(self, audio: np.ndarray, mel: Optional[torch.Tensor]):
+        self.audio = audio
+        self.mel = mel
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class TranscriptionWorker:
+    """Queues speech-to-text requests and decodes them in micro-batches
+
+    Clips of up to 30 seconds are padded to Whisper's fixed input window, so
+    they all share one padded length and can be stacked into a single encoder
+    pass. Longer clips need Whisper's sliding-window transcription and are
+    processed one at a time by the same worker thread, which is also the only
+    thread that ever touches the model.
+    """
+
+    def __init__(self, model, max_batch_size: int = 8, max_wait_ms: float = 50.0,
+                 on_queue_wait: Optional[Callable[[float], None]] = None):
+        """Initialize the worker and start its background thread
+
+        Args:
+            model: Loaded Whisper model (PyTorch or OpenVINO-backed)
+            max_batch_size: Maximum number of clips decoded together
+            max_wait_ms: How long the first clip in a batch waits for company
+            on_queue_wait: Optional callback receiving each clip's queue wait in seconds
+        """
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.on_queue_wait = on_queue_wait
+
+        self._queue: "queue.Queue[_TranscriptionJob]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'batched_clips': 0,
+            'long_clips': 0,
+            'fallbacks': 0,
+            'errors': 0,
+            'total_queue_wait': 0.0,
+        }
+
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio: Union[str, np.ndarray]) -> Future:
+        """Queue a clip for transcription
+
+        Args:
+            audio: Path to an audio file or a float32 waveform sampled at 16 kHz
+
+        Returns:
+            Future resolving to a dict with a 'text' key, like model.transcribe
+        """
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        audio = np.asarray(audio, dtype=np.float32)
+
+        # Compute the log-mel spectrogram in the caller's thread so feature
+        # extraction for concurrent requests overlaps with model inference
+        mel = None
+        if audio.shape[-1] <= N_SAMPLES:
+            mel = whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(audio), self._n_mels()
+            )
+
+        job = _TranscriptionJob(audio, mel)
+        if self._stop_event.is_set():
+            job.future.set_exception(WorkerStoppedError("Transcription worker is stopped"))
+            return job.future
+        self._queue.put(job)
+        if self._stop_event.is_set():
+            # stop() may have drained the queue just before this put
+            self._fail_pending()
+        return job.future
+
+    def transcribe(self, audio: Union[str, np.ndarray],
+                   timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """Queue a clip and block until its transcription is ready
+
+        Raises:
+            concurrent.futures.TimeoutError: If no result arrives within `timeout` seconds
+            WorkerStoppedError: If the worker is stopped before the clip is decoded
+        """
+        return self.submit(audio).result(timeout=timeout)
+
+    def stop(self):
+        """Stop the background thread once the current batch completes
+
+        Clips still waiting in the queue fail with WorkerStoppedError instead
+        of leaving their callers blocked.
+        """
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if not job.future.done():
+                job.future.set_exception(WorkerStoppedError("Transcription worker stopped before decoding this clip"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return batching counters for the performance endpoint"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats['batches']
+        stats['avg_batch_size'] = round(stats['batched_clips'] / batches, 2) if batches else 0
+        stats['avg_queue_wait_ms'] = round(1000 * stats.pop('total_queue_wait') / stats['requests'], 2) if stats['requests'] else 0
+        stats['queue_depth'] = self._queue.qsize()
+        stats['max_batch_size'] = self.max_batch_size
+        stats['max_wait_ms'] = self.max_wait * 1000
+        return stats
+
+    def _n_mels(self) -> int:
+        dims = getattr(self.model, 'dims', None)
+        return dims.n_mels if dims is not None else 80
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch: List[_TranscriptionJob]):
+        started = time.perf_counter()
+        waits = [started - job.enqueued_at for job in batch]
+        with self._stats_lock:
+            self._stats['requests'] += len(batch)
+            self._stats['total_queue_wait'] += sum(waits)
+        if self.on_queue_wait is not None:
+            for wait in waits:
+                self.on_queue_wait(wait)
+
+        short_jobs = [job for job in batch if job.mel is not None]
+        single_jobs = [job for job in batch if job.mel is None]
+        with self._stats_lock:
+            self._stats['long_clips'] += len(single_jobs)
+
+        if short_jobs:
+            try:
+                self._decode_batch(short_jobs)
+            except Exception as e:
+                print(f"Error in batched transcription, retrying clips individually: {e}")
+                single_jobs.extend(job for job in short_jobs if not job.future.done())
+
+        for job in single_jobs:
+            self._transcribe_single(job)
+
+    def _decode_batch(self, jobs: List[_TranscriptionJob]):
+        device = getattr(self.model, 'device', torch.device('cpu'))
+        mel = torch.stack([job.mel for job in jobs]).to(device)
+        options = whisper.DecodingOptions(
+            fp16=device.type != 'cpu',
+            without_timestamps=True,
+        )
+
+        with torch.no_grad():
+            results = self.model.decode(mel, options)
+
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['batched_clips'] += len(jobs)
+
+        for job, result in zip(jobs, results):
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                job.future.set_result({'text': '', 'language': result.language})
+            elif result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+                # Greedy decoding degenerated; let transcribe() retry with
+                # its temperature fallback schedule
+                with self._stats_lock:
+                    self._stats['fallbacks'] += 1
+                self._transcribe_single(job)
+            else:
+                job.future.set_result({'text': result.text, 'language': result.language})
+
+    def _transcribe_single(self, job: _TranscriptionJob):
+        try:
+            with torch.no_grad():
+                result = self.model.transcribe(job.audio)
+            job.future.set_result(result)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['errors'] += 1
+            job.future.set_exception(e)
+
@@ -0,0 +1,230 @@
+import base64
+import io
+import os
+import re
+import threading
+import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from result_cache import ResultCache, content_key
+
+# A sentence ends at . ! or ? (plus closing quotes/brackets) followed by whitespace
+_SENTENCE_END = re.compile(r'(?<=[.!?])["\'\)\]]*\s+')
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Cache key form of a sentence: whitespace collapsed, case kept (it affects pronunciation)"""
+    return ' '.join(sentence.split())
+
+
+def split_sentences(text: str, min_chars: int = 20, max_chars: int = 300) -> List[str]:
+    """Split text into chunks of whole sentences for synthesis
+
+    Fragments shorter than `min_chars` ("Yes.", "1.") are joined to the next
+    sentence, since very short clips sound clipped and cost a synthesis call
+    each. Sentences longer than `max_chars` are split at clause boundaries,
+    or at spaces if there are none.
+    """
+    chunks = []
+    pending = ''
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = normalize_sentence(sentence)
+        if not sentence:
+            continue
+        sentence = f"{pending} {sentence}" if pending else sentence
+        if len(sentence) < min_chars:
+            pending = sentence
+            continue
+        pending = ''
+        chunks.extend(_split_long(sentence, max_chars))
+    if pending:
+        if chunks and len(chunks[-1]) + len(pending) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    if len(sentence) <= max_chars:
+        return [sentence]
+    parts, current = [], ''
+    pieces = _CLAUSE_END.split(sentence)
+    if len(pieces) == 1:
+        pieces = sentence.split(' ')
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            parts.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        parts.append(current)
+    # A single piece may still be too long (e.g. a URL); cut it
+    return [part[i:i + max_chars] for part in parts for i in range(0, len(part), max_chars)]
+
+
+def merge_wav(clips: List[bytes]) -> Optional[bytes]:
+    """Concatenate WAV clips with identical formats, or None if they differ"""
+    params, frames = None, []
+    for clip in clips:
+        with wave.open(io.BytesIO(clip), 'rb') as reader:
+            clip_params = reader.getparams()[:3]  # channels, sample width, rate
+            if params is None:
+                params = clip_params
+            elif clip_params != params:
+                return None
+            frames.append(reader.readframes(reader.getnframes()))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(params[0])
+        writer.setsampwidth(params[1])
+        writer.setframerate(params[2])
+        writer.writeframes(b''.join(frames))
+    return buffer.getvalue()
+
+
+class TTSStreamer:
+    """Sentence-level text-to-speech with a synthesis cache and a bounded worker pool
+
+    Replies are split into sentences that are synthesized in order on a
+    shared pool and can be sent to the client one by one, so playback
+    starts after the first sentence instead of the whole reply. Synthesized
+    sentences are cached by normalized text and voice, so recurring phrases
+    ("Great question!") cost nothing after the first time.
+
+    The bundled engines (Coqui TTS, pyttsx3) are not safe to call from
+    several threads at once, so the pool has one worker by default; it
+    still bounds how much synthesis all requests together can queue.
+    """
+
+    def __init__(self, cache: ResultCache, max_workers: int = 1, max_pending: int = 64,
+                 telemetry=None):
+        """Initialize the streamer
+
+        Args:
+            cache: Where synthesized sentences are kept (base64 audio)
+            max_workers: Sentences synthesized at once
+            max_pending: Sentences queued across all requests before callers wait
+            telemetry: Optional Telemetry; each synthesis is recorded as model 'tts'
+        """
+        self.cache = cache
+        self.telemetry = telemetry
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+
+        self.sentences = 0
+        self.cache_hits = 0
+        self.synthesized = 0
+        self.errors = 0
+        self.first_chunk_seconds: List[float] = []
+
+    @classmethod
+    def from_environment(cls, telemetry=None) -> "TTSStreamer":
+        """Build a streamer from TTS_WORKERS and TTS_MAX_PENDING; the cache follows RESULT_CACHE_*"""
+        return cls(
+            ResultCache.from_environment('tts'),
+            max_workers=int(os.environ.get("TTS_WORKERS", 1)),
+            max_pending=int(os.environ.get("TTS_MAX_PENDING", 64)),
+            telemetry=telemetry,
+        )
+
+    def stream(self, engine, text: str, voice: str) -> Iterator[Dict[str, Any]]:
+        """Synthesize text sentence by sentence, yielding each chunk in order once ready
+
+        Yields:
+            {'index', 'text', 'audio' (base64), 'cached', 'error'} per sentence
+        """
+        started = time.perf_counter()
+        sentences = split_sentences(text)
+        # Queue everything up front so later sentences synthesize while earlier ones are sent
+        futures = [self._submit(engine, sentence, voice) for sentence in sentences]
+        for index, (sentence, future) in enumerate(zip(sentences, futures)):
+            audio, error, cached = future.result()
+            if index == 0:
+                with self._lock:
+                    self.first_chunk_seconds = (self.first_chunk_seconds + [time.perf_counter() - started])[-500:]
+            yield {'index': index, 'text': sentence, 'audio': audio, 'cached': cached, 'error': error}
+
+    def synthesize(self, engine, text: str, voice: str) -> Tuple[Optional[str], Optional[str]]:
+        """Synthesize text as one clip, reusing cached sentences
+
+        Returns:
+            (audio_base64, error), like the engine's text_to_speech()
+        """
+        chunks = list(self.stream(engine, text, voice))
+        failed = next((chunk['error'] for chunk in chunks if chunk['error'] or not chunk['audio']), None)
+        if not chunks or failed is not None:
+            return None, failed or 'Failed to convert text to speech'
+        if len(chunks) == 1:
+            return chunks[0]['audio'], None
+        try:
+            merged = merge_wav([base64.b64decode(chunk['audio']) for chunk in chunks])
+        except (wave.Error, EOFError):
+            merged = None
+        if merged is None:
+            # Not WAV or mixed formats: synthesize the whole text in one go
+            started = time.perf_counter()
+            audio, error = engine.text_to_speech(text)
+            if self.telemetry is not None:
+                self.telemetry.record_model('tts', time.perf_counter() - started, error=bool(error or not audio))
+            return audio, error
+        return base64.b64encode(merged).decode('utf-8'), None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            first = sorted(self.first_chunk_seconds)
+            return {
+                'sentences': self.sentences,
+                'cache_hits': self.cache_hits,
+                'synthesized': self.synthesized,
+                'errors': self.errors,
+                'hit_ratio': round(self.cache_hits / self.sentences, 4) if self.sentences else 0.0,
+                'first_chunk_ms_p50': round(1000 * first[len(first) // 2], 1) if first else 0.0,
+                'cache': self.cache.get_stats(),
+            }
+
+    def _submit(self, engine, sentence: str, voice: str) -> Future:
+        key = content_key(normalize_sentence(sentence).encode(), 'tts', voice)
+        with self._lock:
+            self.sentences += 1
+        audio = self.cache.get(key)
+        if audio is not None:
+            with self._lock:
+                self.cache_hits += 1
+            future = Future()
+            future.set_result((audio, None, True))
+            return future
+
+        self._slots.acquire()
+        try:
+            return self._pool.submit(self._synthesize, engine, key, sentence)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _synthesize(self, engine, key: str, sentence: str) -> Tuple[Optional[str], Optional[str], bool]:
+        started = time.perf_counter()
+        try:
+            audio, error = engine.text_to_speech(sentence)
+        except Exception as e:
+            audio, error = None, str(e)
+        finally:
+            self._slots.release()
+        failed = bool(error or not audio)
+        if self.telemetry is not None:
+            # The engine reports failures through its return value, not exceptions
+            self.telemetry.record_model('tts', time.perf_counter() - started, error=failed)
+        with self._lock:
+            if failed:
+                self.errors += 1
+            else:
+                self.synthesized += 1
+        if not failed:
+            self.cache.put(key, audio)
+        return audio, error or (None if audio else 'Failed to convert text to speech'), False
@@ -0,0 +1,114 @@
+import base64
+import binascii
+import os
+from typing import Dict, NamedTuple, Optional
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from audio_decoding import split_data_url
+
+# Uploads are read in pieces of this size, so a body never sits in memory twice
+READ_CHUNK_SIZE = 64 * 1024
+
+# Content types that say nothing about the format of a raw body
+UNTYPED_BODY_TYPES = {'', 'application/octet-stream', 'application/x-www-form-urlencoded'}
+
+
+class UploadError(ValueError):
+    """Raised when an upload is missing, malformed or too large"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class Upload(NamedTuple):
+    data: bytes
+    # MIME type of the file itself (with parameters such as rate=16000), if known
+    mime_type: Optional[str]
+    # The other request fields, e.g. user_id
+    fields: Dict[str, str]
+    # 'multipart', 'raw' or 'base64'
+    source: str
+
+
+def max_upload_bytes() -> int:
+    """Largest accepted upload, from UPLOAD_MAX_MB"""
+    return int(float(os.environ.get("UPLOAD_MAX_MB", 25)) * 1024 ** 2)
+
+
+def max_body_bytes(max_bytes: int) -> int:
+    """Largest request body that can carry an upload of `max_bytes`, even as base64 JSON"""
+    return max_bytes * 4 // 3 + 1024 ** 2
+
+
+def read_upload(request, field: str, max_bytes: int) -> Upload:
+    """Read a file upload from a Flask request in any of the accepted encodings
+
+    - multipart/form-data: the file in part `field`, other parts as fields
+    - application/json: the legacy base64 (or data URL) string in `field`
+    - any other content type: the body is the file; fields come from the
+      query string (e.g. ?user_id=...)
+
+    Binary bodies are read in chunks straight into one buffer and rejected
+    as soon as they pass `max_bytes`, instead of being parsed as JSON, copied
+    and base64-decoded.
+
+    Raises:
+        UploadError: With status 400 for a missing or invalid file, 413 for one too large
+    """
+    if request.content_length is not None and request.content_length > max_body_bytes(max_bytes):
+        raise _too_large(max_bytes)
+
+    if request.mimetype == 'multipart/form-data':
+        try:
+            upload = request.files.get(field)
+        except RequestEntityTooLarge:
+            raise _too_large(max_bytes)
+        if upload is None:
+            raise UploadError(f'No {field} file provided')
+        data = _read_capped(upload.stream, max_bytes)
+        fields = request.form.to_dict()
+        source = 'multipart'
+        mime_type = upload.content_type or None
+    elif request.is_json:
+        # Compatibility path for clients that still send base64 in JSON
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict) or not payload.get(field):
+            raise UploadError(f'No {field} data provided')
+        mime_type, encoded = split_data_url(payload[field])
+        if len(encoded) // 4 * 3 > max_bytes:
+            raise _too_large(max_bytes)
+        try:
+            data = base64.b64decode(encoded)
+        except (binascii.Error, ValueError) as e:
+            raise UploadError(f'Invalid base64 {field} data: {e}')
+        fields = {key: value for key, value in payload.items() if key != field and isinstance(value, str)}
+        source = 'base64'
+    else:
+        data = _read_capped(request.stream, max_bytes)
+        fields = request.args.to_dict()
+        source = 'raw'
+        mime_type = request.headers.get('Content-Type') or None
+        if request.mimetype in UNTYPED_BODY_TYPES:
+            # e.g. curl --data-binary without -H 'Content-Type: ...'; let the decoder sniff
+            mime_type = None
+
+    if not data:
+        raise UploadError(f'No {field} data provided')
+    return Upload(data, mime_type, fields, source)
+
+
+def _read_capped(stream, max_bytes: int) -> bytearray:
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return buffer
+        if len(buffer) + len(chunk) > max_bytes:
+            raise _too_large(max_bytes)
+        buffer += chunk
+
+
+def _too_large(max_bytes: int) -> UploadError:
+    return UploadError(f'Upload exceeds the {max_bytes / 1024 ** 2:g} MB limit', status=413)
@@ -0,0 +1,517 @@
+import os
+import time
+from dataclasses import asdict, replace
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+import openvino as ov
+import whisper
+from whisper.audio import N_FRAMES, SAMPLE_RATE
+from whisper.decoding import (BeamSearchDecoder, DecodingOptions, DecodingTask,
+                              Inference, detect_language as detect_language_function)
+from whisper.model import ModelDimensions, disable_sdpa
+
+try:
+    import nncf
+    NNCF_AVAILABLE = True
+except ImportError:
+    NNCF_AVAILABLE = False
+
+# The three graphs that make up an exported Whisper model
+WHISPER_PARTS = ("encoder", "cross_kv", "decoder")
+
+# Decoder steps recorded per calibration clip: every CALIBRATION_STEP_STRIDE-th
+# step, at most CALIBRATION_STEPS_PER_CLIP of them
+CALIBRATION_STEP_STRIDE = 6
+CALIBRATION_STEPS_PER_CLIP = 8
+
+
+def whisper_ir_paths(model_dir: str, model_size: str, precision: str) -> Dict[str, str]:
+    """File paths of the IR files for each exported part of a Whisper model"""
+    return {
+        part: os.path.join(model_dir, f"whisper_{model_size}_{part}_{precision}.xml")
+        for part in WHISPER_PARTS
+    }
+
+
+def _attention(q, k, v, n_head, mask=None):
+    """Multi-head attention without SDPA so the graph traces into plain MatMul/Softmax"""
+    n_batch, n_ctx, n_state = q.shape
+    scale = (n_state // n_head) ** -0.25
+    q = q.view(n_batch, n_ctx, n_head, -1).permute(0, 2, 1, 3)
+    k = k.view(k.shape[0], k.shape[1], n_head, -1).permute(0, 2, 1, 3)
+    v = v.view(v.shape[0], v.shape[1], n_head, -1).permute(0, 2, 1, 3)
+
+    qk = (q * scale) @ (k * scale).transpose(-1, -2)
+    if mask is not None:
+        qk = qk + mask
+    w = torch.softmax(qk.float(), dim=-1).to(q.dtype)
+    return (w @ v).permute(0, 2, 1, 3).flatten(start_dim=2)
+
+
+class _CrossAttentionKV(torch.nn.Module):
+    """Projects encoder output into the cross-attention keys/values of every decoder block
+
+    These only depend on the audio, so they are computed once per clip instead
+    of once per generated token.
+    """
+
+    def __init__(self, decoder):
+        super().__init__()
+        self.blocks = decoder.blocks
+
+    def forward(self, audio_features):
+        kv = []
+        for block in self.blocks:
+            kv.append(block.cross_attn.key(audio_features))
+            kv.append(block.cross_attn.value(audio_features))
+        # (batch, 2 * n_layer, n_audio_ctx, n_state)
+        return torch.stack(kv, dim=1)
+
+
+class _DecoderWithCache(torch.nn.Module):
+    """Whisper text decoder with explicit self-attention KV-cache tensors
+
+    Inputs:
+        tokens: (batch, n_new_tokens) int64
+        self_kv: (batch, 2 * n_layer, n_past_tokens, n_state) cached self-attention keys/values
+        cross_kv: (batch, 2 * n_layer, n_audio_ctx, n_state) from _CrossAttentionKV
+
+    Outputs:
+        logits: (batch, n_new_tokens, n_vocab)
+        self_kv: cache extended with the new tokens
+    """
+
+    def __init__(self, decoder):
+        super().__init__()
+        self.decoder = decoder
+
+    def forward(self, tokens, self_kv, cross_kv):
+        decoder = self.decoder
+        offset = self_kv.shape[2]
+        n_new = tokens.shape[-1]
+
+        x = decoder.token_embedding(tokens) + decoder.positional_embedding[offset:offset + n_new]
+        # Causal mask rows for the new positions over all cached + new positions
+        mask = decoder.mask[offset:offset + n_new, :offset + n_new]
+
+        new_kv = []
+        for i, block in enumerate(decoder.blocks):
+            attn = block.attn
+            h = block.attn_ln(x)
+            k = torch.cat([self_kv[:, 2 * i], attn.key(h)], dim=1)
+            v = torch.cat([self_kv[:, 2 * i + 1], attn.value(h)], dim=1)
+            new_kv.append(k)
+            new_kv.append(v)
+            x = x + attn.out(_attention(attn.query(h), k, v, attn.n_head, mask))
+
+            cross = block.cross_attn
+            h = block.cross_attn_ln(x)
+            x = x + cross.out(_attention(cross.query(h), cross_kv[:, 2 * i], cross_kv[:, 2 * i + 1], cross.n_head))
+
+            x = x + block.mlp(block.mlp_ln(x))
+
+        x = decoder.ln(x)
+        logits = (x @ torch.transpose(decoder.token_embedding.weight.to(x.dtype), 0, 1)).float()
+        return logits, torch.stack(new_kv, dim=1)
+
+
+def generate_calibration_audio(num_clips: int = 16, seed: int = 0) -> List[np.ndarray]:
+    """Generate speech-like synthetic clips for post-training quantization
+
+    Harmonic tones with syllable-rate amplitude modulation, gliding pitch and
+    noise bursts exercise the mel filterbank roughly like voiced/unvoiced
+    speech, which is enough to collect activation ranges without shipping
+    audio fixtures.
+    """
+    rng = np.random.default_rng(seed)
+    clips = []
+    for _ in range(num_clips):
+        duration = rng.uniform(3.0, 12.0)
+        t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+
+        pitch = rng.uniform(90, 260) * (1 + 0.15 * np.sin(2 * np.pi * rng.uniform(0.2, 1.0) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+        voiced = sum(np.sin(h * phase) / h for h in range(1, 8))
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 6) * t)) ** 2
+        unvoiced = rng.normal(0, 0.3, size=len(t)) * (rng.random(len(t) // 1600 + 1).repeat(1600)[:len(t)] > 0.8)
+
+        audio = voiced * envelope + unvoiced
+        audio = 0.3 * audio / (np.abs(audio).max() + 1e-6)
+        clips.append(audio.astype(np.float32))
+    return clips
+
+
+def export_whisper_to_openvino(pytorch_model, model_dir: str, model_size: str, precision: str = "INT8",
+                               calibration_clips: Optional[List[np.ndarray]] = None) -> Dict[str, str]:
+    """Convert a PyTorch Whisper model to OpenVINO IR, optionally INT8-quantized
+
+    Args:
+        pytorch_model: Model returned by whisper.load_model
+        model_dir: Directory to write the IR files to
+        model_size: Whisper size name, used in the file names
+        precision: 'FP32', 'FP16' or 'INT8'
+        calibration_clips: Optional 16 kHz waveforms for INT8 calibration;
+            synthetic clips are generated when omitted
+
+    Returns:
+        Mapping of part name to the written IR .xml path
+    """
+    precision = precision.upper()
+    if precision == "INT8" and not NNCF_AVAILABLE:
+        print("NNCF is not installed; exporting FP16 IR instead of INT8.")
+        precision = "FP16"
+
+    paths = whisper_ir_paths(model_dir, model_size, precision)
+    os.makedirs(model_dir, exist_ok=True)
+    dims = pytorch_model.dims
+    pytorch_model = pytorch_model.float().eval()
+
+    print(f"Converting Whisper {model_size} to OpenVINO IR ({precision})...")
+    start_time = time.time()
+    with torch.no_grad(), disable_sdpa():
+        encoder_ir = ov.convert_model(
+            pytorch_model.encoder,
+            example_input=torch.zeros(1, dims.n_mels, N_FRAMES)
+        )
+        cross_kv_ir = ov.convert_model(
+            _CrossAttentionKV(pytorch_model.decoder),
+            example_input=torch.zeros(1, dims.n_audio_ctx, dims.n_audio_state)
+        )
+        # Trace with a non-empty cache; the converted graph keeps all dimensions dynamic
+        decoder_ir = ov.convert_model(
+            _DecoderWithCache(pytorch_model.decoder),
+            example_input=(
+                torch.zeros(1, 1, dtype=torch.int64),
+                torch.zeros(1, 2 * dims.n_text_layer, 3, dims.n_text_state),
+                torch.zeros(1, 2 * dims.n_text_layer, dims.n_audio_ctx, dims.n_text_state),
+            )
+        )
+    print(f"Conversion finished in {time.time() - start_time:.2f} seconds")
+
+    if precision == "INT8":
+        encoder_ir, cross_kv_ir, decoder_ir = _quantize_whisper(
+            pytorch_model, encoder_ir, cross_kv_ir, decoder_ir,
+            calibration_clips or generate_calibration_audio()
+        )
+
+    compress = precision != "FP32"
+    for part, ir in zip(WHISPER_PARTS, (encoder_ir, cross_kv_ir, decoder_ir)):
+        ov.save_model(ir, paths[part], compress_to_fp16=compress)
+        print(f"Saved {part} IR to {paths[part]}")
+
+    return paths
+
+
+def _quantize_whisper(pytorch_model, encoder_ir, cross_kv_ir, decoder_ir, clips):
+    """Post-training INT8 quantization of all three graphs with NNCF"""
+    core = ov.Core()
+    n_mels = pytorch_model.dims.n_mels
+    mels = [
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(clip), n_mels).unsqueeze(0).numpy()
+        for clip in clips
+    ]
+
+    print(f"Collecting calibration data from {len(clips)} clips...")
+    # Run the FP32 graphs once to record realistic decoder inputs
+    fp_model = OpenVINOWhisper(
+        pytorch_model,
+        core.compile_model(encoder_ir, "CPU"),
+        core.compile_model(cross_kv_ir, "CPU"),
+        core.compile_model(decoder_ir, "CPU"),
+        precision="FP32"
+    )
+    features = [fp_model.embed_audio(torch.from_numpy(mel)).numpy() for mel in mels]
+    decoder_inputs = []
+    options = DecodingOptions(fp16=False, without_timestamps=True, sample_len=48)
+    for mel in mels:
+        task = _OpenVINODecodingTask(fp_model, options)
+        task.inference.recorder = decoder_inputs
+        task.run(torch.from_numpy(mel))
+
+    def quantize(ir, samples):
+        return nncf.quantize(
+            ir,
+            nncf.Dataset(samples),
+            model_type=nncf.ModelType.TRANSFORMER,
+            subset_size=len(samples)
+        )
+
+    print(f"Quantizing encoder ({len(mels)} samples), cross-attention projection and decoder "
+          f"({len(decoder_inputs)} samples) to INT8...")
+    start_time = time.time()
+    encoder_ir = quantize(encoder_ir, mels)
+    cross_kv_ir = quantize(cross_kv_ir, features)
+    decoder_ir = quantize(decoder_ir, decoder_inputs)
+    print(f"Quantization finished in {time.time() - start_time:.2f} seconds")
+    return encoder_ir, cross_kv_ir, decoder_ir
+
+
+class OpenVINOInference(Inference):
+    """Whisper decoding Inference backed by the compiled decoder with KV-cache"""
+
+    def __init__(self, ov_model: "OpenVINOWhisper", initial_token_length: int):
+        self.ov_model = ov_model
+        self.initial_token_length = initial_token_length
+        self.request = ov_model.decoder.create_infer_request()
+        self.self_kv = None
+        self.cross_kv = None
+        # When set to a list, decoder inputs of every CALIBRATION_STEP_STRIDE-th
+        # step are appended, up to CALIBRATION_STEPS_PER_CLIP (used for calibration)
+        self.recorder = None
+        self.steps = 0
+
+    def logits(self, tokens: torch.Tensor, audio_features: torch.Tensor) -> torch.Tensor:
+        n_batch = tokens.shape[0]
+        if self.cross_kv is None:
+            cross_kv = self.ov_model.cross_attention_kv(audio_features)
+            if cross_kv.shape[0] != n_batch:
+                # Beam search / best-of repeat tokens per clip but not audio features
+                cross_kv = np.repeat(cross_kv, n_batch // cross_kv.shape[0], axis=0)
+            self.cross_kv = cross_kv
+            dims = self.ov_model.dims
+            self.self_kv = np.zeros((n_batch, 2 * dims.n_text_layer, 0, dims.n_text_state), dtype=np.float32)
+
+        if tokens.shape[-1] > self.initial_token_length:
+            # only need to use the last token except in the first forward pass
+            tokens = tokens[:, -1:]
+
+        inputs = [tokens.cpu().numpy().astype(np.int64), self.self_kv, self.cross_kv]
+        if (self.recorder is not None and self.steps % CALIBRATION_STEP_STRIDE == 0
+                and self.steps // CALIBRATION_STEP_STRIDE < CALIBRATION_STEPS_PER_CLIP):
+            # No copies: self_kv and cross_kv are replaced, never written to, so
+            # every recorded step of a clip shares the clip's cross-attention KV
+            self.recorder.append(inputs)
+        self.steps += 1
+
+        self.request.infer(inputs)
+        logits = np.copy(self.request.get_output_tensor(0).data)
+        self.self_kv = np.copy(self.request.get_output_tensor(1).data)
+        return torch.from_numpy(logits)
+
+    def rearrange_kv_cache(self, source_indices) -> None:
+        if source_indices != list(range(len(source_indices))):
+            self.self_kv = self.self_kv[source_indices]
+            self.cross_kv = self.cross_kv[source_indices]
+
+    def cleanup_caching(self) -> None:
+        self.self_kv = None
+        self.cross_kv = None
+        self.steps = 0
+
+
+class _OpenVINODecodingTask(DecodingTask):
+    """DecodingTask that runs the encoder and decoder through OpenVINO"""
+
+    def __init__(self, ov_model: "OpenVINOWhisper", options: DecodingOptions):
+        # The weight-free model spec provides tokenizer settings and dimensions
+        super().__init__(ov_model.model, options)
+        # Language detection goes through the compiled decoder too
+        self.model = ov_model
+        self.ov_model = ov_model
+        self.inference = OpenVINOInference(ov_model, len(self.initial_tokens))
+        if isinstance(self.decoder, BeamSearchDecoder):
+            self.decoder.inference = self.inference
+
+    def _get_audio_features(self, mel: torch.Tensor):
+        dims = self.ov_model.dims
+        if mel.shape[-2:] == (dims.n_audio_ctx, dims.n_audio_state):
+            # encoded audio features are given; skip audio encoding
+            return mel.float()
+        return self.ov_model.embed_audio(mel)
+
+
+def _whisper_spec(model) -> SimpleNamespace:
+    """What decoding needs from a PyTorch Whisper model besides its weights
+
+    DecodingTask builds a PyTorchInference it never uses here from
+    decoder.blocks, so an empty block list stands in for the decoder.
+    A spec (e.g. from `whisper_spec_from_metadata`) is returned as is.
+    """
+    if isinstance(model, SimpleNamespace):
+        return model
+    return SimpleNamespace(
+        dims=model.dims,
+        is_multilingual=model.is_multilingual,
+        num_languages=model.num_languages,
+        decoder=SimpleNamespace(blocks=[]),
+    )
+
+
+def whisper_spec_metadata(model) -> Dict[str, Any]:
+    """JSON-serializable spec of a PyTorch Whisper model, stored with its IR"""
+    return {
+        'dims': asdict(model.dims),
+        'is_multilingual': model.is_multilingual,
+        'num_languages': model.num_languages,
+    }
+
+
+def whisper_spec_from_metadata(metadata: Dict[str, Any]) -> Optional[SimpleNamespace]:
+    """Rebuild a spec saved by `whisper_spec_metadata`; None for entries without one"""
+    if 'dims' not in metadata:
+        return None
+    return SimpleNamespace(
+        dims=ModelDimensions(**metadata['dims']),
+        is_multilingual=metadata['is_multilingual'],
+        num_languages=metadata['num_languages'],
+        decoder=SimpleNamespace(blocks=[]),
+    )
+
+
+class OpenVINOWhisper:
+    """Drop-in replacement for a Whisper model that runs on compiled OpenVINO graphs
+
+    Exposes the same transcribe/decode/detect_language/embed_audio methods as
+    whisper.model.Whisper; everything else (dims, tokenizer settings) is
+    delegated to a spec copied from the PyTorch model, or read back from the
+    IR cache so the PyTorch weights never need to be loaded at all. No
+    reference to the PyTorch model is kept, so its encoder and decoder
+    weights are freed once the caller drops it.
+    """
+
+    def __init__(self, model, encoder: ov.CompiledModel, cross_kv: ov.CompiledModel,
+                 decoder: ov.CompiledModel, precision: str = "INT8"):
+        self.model = _whisper_spec(model)
+        self.encoder = encoder
+        self.cross_kv = cross_kv
+        self.decoder = decoder
+        self.precision = precision
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined on the wrapper
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    @property
+    def device(self):
+        return torch.device("cpu")
+
+    def embed_audio(self, mel: torch.Tensor) -> torch.Tensor:
+        if mel.ndim == 2:
+            mel = mel.unsqueeze(0)
+        request = self.encoder.create_infer_request()
+        request.infer([mel.cpu().float().numpy()])
+        return torch.from_numpy(np.copy(request.get_output_tensor(0).data))
+
+    def cross_attention_kv(self, audio_features: torch.Tensor) -> np.ndarray:
+        request = self.cross_kv.create_infer_request()
+        request.infer([audio_features.cpu().float().numpy()])
+        return np.copy(request.get_output_tensor(0).data)
+
+    def logits(self, tokens: torch.Tensor, audio_features: torch.Tensor) -> torch.Tensor:
+        """Decoder logits for full token sequences, without a KV-cache between calls"""
+        return OpenVINOInference(self, tokens.shape[-1]).logits(tokens, audio_features)
+
+    def detect_language(self, mel: torch.Tensor, tokenizer=None):
+        single = mel.ndim == 2
+        if single:
+            mel = mel.unsqueeze(0)
+        dims = self.dims
+        if mel.shape[-2:] != (dims.n_audio_ctx, dims.n_audio_state):
+            mel = self.embed_audio(mel)
+        language_tokens, language_probs = detect_language_function(self, mel, tokenizer)
+        if single:
+            return language_tokens[0], language_probs[0]
+        return language_tokens, language_probs
+
+    @torch.no_grad()
+    def decode(self, mel: torch.Tensor, options: DecodingOptions = DecodingOptions(), **kwargs):
+        if single := mel.ndim == 2:
+            mel = mel.unsqueeze(0)
+        if kwargs:
+            options = replace(options, **kwargs)
+        result = _OpenVINODecodingTask(self, options).run(mel)
+        return result[0] if single else result
+
+    def transcribe(self, audio, **kwargs):
+        kwargs.setdefault("fp16", False)
+        return whisper.transcribe(self, audio, **kwargs)
+
+
+def load_openvino_whisper(core: ov.Core, pytorch_model, paths: Dict[str, str], precision: str,
+                          device: str = "CPU", config: Optional[Dict[str, Any]] = None) -> OpenVINOWhisper:
+    """Compile previously exported IR files into an OpenVINOWhisper model
+
+    Args:
+        pytorch_model: The source model, or its spec from `whisper_spec_from_metadata`
+        config: compile_model() properties, e.g. a deployment profile
+    """
+    config = config or {}
+    # Compiling from the path lets OpenVINO import a cached blob without reading the IR
+    compiled = {
+        part: core.compile_model(paths[part], device, config)
+        for part in WHISPER_PARTS
+    }
+    ov_model = OpenVINOWhisper(
+        pytorch_model, compiled["encoder"], compiled["cross_kv"], compiled["decoder"], precision
+    )
+    ov_model.openvino_config = dict(config)
+    return ov_model
+
+
+def compare_with_pytorch(ov_model: OpenVINOWhisper, pytorch_model,
+                         clips: List[np.ndarray]) -> Dict[str, object]:
+    """Transcribe the same clips with PyTorch and OpenVINO and report agreement
+
+    Args:
+        ov_model: Compiled OpenVINO Whisper model
+        pytorch_model: Reference model returned by whisper.load_model
+        clips: 16 kHz float32 waveforms
+
+    Returns:
+        Dict with per-clip transcriptions, exact-match rate and timings
+    """
+    rows = []
+    pytorch_time = openvino_time = 0.0
+    for clip in clips:
+        start = time.perf_counter()
+        reference = pytorch_model.transcribe(clip, fp16=False, temperature=0.0)["text"].strip()
+        pytorch_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        candidate = ov_model.transcribe(clip, temperature=0.0)["text"].strip()
+        openvino_time += time.perf_counter() - start
+
+        rows.append({
+            'pytorch': reference,
+            'openvino': candidate,
+            'match': reference.lower() == candidate.lower()
+        })
+
+    return {
+        'precision': ov_model.precision,
+        'clips': rows,
+        'match_rate': sum(r['match'] for r in rows) / len(rows) if rows else 1.0,
+        'pytorch_seconds': round(pytorch_time, 3),
+        'openvino_seconds': round(openvino_time, 3),
+    }
+
+
+if __name__ == "__main__":
+    # Equivalence check: python whisper_openvino.py [model_size] [audio files...]
+    import sys
+    from audio_decoding import decode_audio_bytes
+    from openvino_optimization import optimize_whisper_model
+
+    size = sys.argv[1] if len(sys.argv) > 1 else "tiny"
+    reference_model = whisper.load_model(size, device="cpu")
+    model, _ = optimize_whisper_model(size, pytorch_model=reference_model)
+    if not isinstance(model, OpenVINOWhisper):
+        sys.exit("OpenVINO export failed; nothing to compare.")
+
+    test_clips = []
+    for path in sys.argv[2:]:
+        with open(path, 'rb') as f:
+            test_clips.append(decode_audio_bytes(f.read()))
+    if not test_clips:
+        test_clips = generate_calibration_audio(num_clips=4, seed=1234)
+
+    report = compare_with_pytorch(model, reference_model, test_clips)
+    for row in report['clips']:
+        print(f"{'OK  ' if row['match'] else 'DIFF'} pytorch={row['pytorch']!r} openvino={row['openvino']!r}")
+    print(f"Exact-match rate: {report['match_rate']:.0%} "
+          f"(PyTorch {report['pytorch_seconds']}s, OpenVINO {report['openvino_seconds']}s)")